@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Pooled AppleScript executor — one long-lived interpreter per app.
+
+Every `osascript scripts/<app>.applescript ...` call pays for a process
+launch, a compile of the script source and a fresh Apple Event connection.
+This keeps a small background server that holds one worker per app
+(applescript_worker.js under `osascript -l JavaScript`). A worker compiles
+each script once and calls its run handler for every later request.
+
+    applescript_pool.py run <app> [args...]   Run scripts/<app>.applescript
+    applescript_pool.py status                 Show the running workers
+    applescript_pool.py stop                   Shut the server down
+
+`run` starts the server on first use and falls back to plain osascript
+if the server can't be reached. The server exits after MACJUICE_POOL_IDLE
+seconds without requests.
+
+Workers speak JSON lines over their stdin/stdout pipes:
+
+    -> {"id": 1, "script": "/path/music.applescript", "args": ["now"]}
+    <- {"id": 1, "output": "..."}   or   {"id": 1, "error": "...", "number": -1728}
+
+"output" is the result as osascript would print it, or null when the
+script returned nothing (osascript prints nothing then, not even a newline).
+
+A request that runs past MACJUICE_POOL_TIMEOUT seconds kills its worker
+(it is stuck inside an Apple Event) and the next request starts a new one.
+MACJUICE_OSASCRIPT_WORKER swaps the worker command, e.g. for a fake
+stand-in when testing off macOS.
+"""
+
+import fcntl
+import json
+import os
+import shlex
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_JS = os.path.join(SCRIPTS_DIR, "applescript_worker.js")
+
+# $TMPDIR is per-user on macOS; /tmp is shared, so socket_dir_ok() checks it
+SOCKET_PATH = os.environ.get("MACJUICE_POOL_SOCKET") or os.path.join(
+    os.environ.get("TMPDIR") or "/tmp", f"macjuice-{os.getuid()}", "applescript.sock"
+)
+LOCK_PATH = SOCKET_PATH + ".lock"
+
+# Apple Events themselves time out after 120s by default
+REQUEST_TIMEOUT = float(os.environ.get("MACJUICE_POOL_TIMEOUT", "120"))
+IDLE_TIMEOUT = float(os.environ.get("MACJUICE_POOL_IDLE", "600"))
+STARTUP_WAIT = 3.0
+
+
+class WorkerError(Exception):
+    pass
+
+
+class WorkerUnavailable(WorkerError):
+    """The request never reached the worker, so it is safe to send again."""
+
+
+def worker_command():
+    override = os.environ.get("MACJUICE_OSASCRIPT_WORKER")
+    if override:
+        return shlex.split(override)
+    return ["osascript", "-l", "JavaScript", WORKER_JS]
+
+
+class Worker:
+    """One interpreter process; requests are matched to replies by id."""
+
+    def __init__(self, command):
+        self.proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self.started = time.time()
+        self.requests = 0
+        self._next_id = 0
+        self._replies = {}
+        self._dead = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._read_replies, daemon=True).start()
+
+    def _read_replies(self):
+        for line in self.proc.stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue  # stray output from a script's `log` etc.
+            with self._cond:
+                self._replies[reply.get("id")] = reply
+                self._cond.notify_all()
+        with self._cond:
+            self._dead = True
+            self._cond.notify_all()
+
+    def alive(self):
+        return not self._dead and self.proc.poll() is None
+
+    def call(self, script, args, timeout):
+        with self._cond:
+            self._next_id += 1
+            req_id = self._next_id
+        line = json.dumps({"id": req_id, "script": script, "args": args}) + "\n"
+        try:
+            with self._write_lock:
+                self.proc.stdin.write(line)
+                self.proc.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise WorkerUnavailable("worker exited")
+        self.requests += 1
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while req_id not in self._replies:
+                if self._dead:
+                    # The script may have run (and sent the message) — don't resend
+                    raise WorkerError("worker exited while running the script")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"AppleScript timed out after {timeout:g}s")
+                self._cond.wait(remaining)
+            return self._replies.pop(req_id)
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class Pool:
+    """Lazily started workers, one per app."""
+
+    def __init__(self, command=None):
+        self.command = command or worker_command()
+        self.workers = {}
+        self._lock = threading.Lock()
+
+    def _worker(self, app):
+        with self._lock:
+            worker = self.workers.get(app)
+            if worker is None or not worker.alive():
+                worker = self.workers[app] = Worker(self.command)
+            return worker
+
+    def _discard(self, app, worker):
+        with self._lock:
+            if self.workers.get(app) is worker:
+                del self.workers[app]
+        worker.close()
+
+    def run(self, app, args, timeout=REQUEST_TIMEOUT):
+        script = os.path.join(SCRIPTS_DIR, f"{app}.applescript")
+        worker = self._worker(app)
+        try:
+            return worker.call(script, args, timeout)
+        except TimeoutError:
+            # The interpreter is stuck mid-event; a fresh one is cheaper than waiting
+            self._discard(app, worker)
+            raise
+        except WorkerUnavailable:
+            self._discard(app, worker)
+            # Gone before it read the request (e.g. killed while idle), so
+            # nothing ran — retry once on a new worker
+            return self._worker(app).call(script, args, timeout)
+        except WorkerError:
+            self._discard(app, worker)
+            raise
+
+    def status(self):
+        with self._lock:
+            return {
+                app: {"pid": w.proc.pid, "requests": w.requests,
+                      "uptime": round(time.time() - w.started, 1)}
+                for app, w in self.workers.items() if w.alive()
+            }
+
+    def close(self):
+        with self._lock:
+            workers, self.workers = list(self.workers.values()), {}
+        for worker in workers:
+            worker.close()
+
+
+# --- Server -----------------------------------------------------------------
+
+def socket_dir_ok(create=False):
+    """True if the socket's directory is ours alone (a real dir, owner uid, mode 0700).
+
+    Anyone can create /tmp/macjuice-<uid> first; a server listening in a
+    directory they own would receive every script and its arguments.
+    """
+    directory = os.path.dirname(SOCKET_PATH)
+    if create:
+        try:
+            os.makedirs(directory, mode=0o700)
+        except FileExistsError:
+            pass
+    try:
+        st = os.lstat(directory)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and stat.S_IMODE(st.st_mode) & 0o077 == 0)
+
+
+def handle_request(pool, request):
+    op = request.get("op")
+    if op == "run":
+        app = request.get("app", "")
+        if not app or "/" in app:
+            return {"error": f"Bad app name: {app}"}
+        try:
+            return pool.run(app, request.get("args", []), request.get("timeout", REQUEST_TIMEOUT))
+        except TimeoutError as e:
+            return {"error": str(e), "timeout": True}
+        except (WorkerError, OSError) as e:
+            return {"error": str(e)}
+    if op == "status":
+        return {"workers": pool.status(), "pid": os.getpid()}
+    if op == "stop":
+        return {"stopping": True}
+    return {"error": f"Unknown op: {op}"}
+
+
+def serve():
+    if not socket_dir_ok(create=True):
+        print(f"Refusing to serve: {os.path.dirname(SOCKET_PATH)} is not a private directory",
+              file=sys.stderr)
+        sys.exit(1)
+    # Held for the server's lifetime: a second server starting at the same
+    # time gives up here instead of unlinking the first one's socket
+    lock = open(LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return
+    if request_server({"op": "status"}) is not None:
+        lock.close()
+        return  # another server already owns the socket
+    try:
+        os.unlink(SOCKET_PATH)
+    except FileNotFoundError:
+        pass
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    listener.listen(16)
+    listener.settimeout(1.0)
+
+    pool = Pool()
+    last_used = [time.monotonic()]
+    stopping = threading.Event()
+
+    def client(conn):
+        with conn, conn.makefile("rw", encoding="utf-8") as f:
+            line = f.readline()
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = {}
+            reply = handle_request(pool, request)
+            f.write(json.dumps(reply) + "\n")
+            f.flush()
+            if reply.get("stopping"):
+                stopping.set()
+        last_used[0] = time.monotonic()
+
+    try:
+        while not stopping.is_set():
+            if time.monotonic() - last_used[0] > IDLE_TIMEOUT:
+                break
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            last_used[0] = time.monotonic()
+            threading.Thread(target=client, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+        try:
+            os.unlink(SOCKET_PATH)
+        except FileNotFoundError:
+            pass
+        pool.close()
+        lock.close()
+
+
+# --- Client -----------------------------------------------------------------
+
+def request_server(request, timeout=None):
+    """Send one request to the server; None if it isn't running.
+
+    Raises socket.timeout if the server accepted but didn't answer in time.
+    """
+    if not socket_dir_ok():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(timeout)
+    with sock, sock.makefile("rw", encoding="utf-8") as f:
+        f.write(json.dumps(request) + "\n")
+        f.flush()
+        line = f.readline()
+    return json.loads(line) if line else None
+
+
+def start_server():
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + STARTUP_WAIT
+    while time.monotonic() < deadline:
+        if os.path.exists(SOCKET_PATH) and request_server({"op": "status"}) is not None:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run_direct(app, args):
+    script = os.path.join(SCRIPTS_DIR, f"{app}.applescript")
+    os.execvp("osascript", ["osascript", script] + args)
+
+
+def cmd_run(app, args):
+    if not socket_dir_ok(create=True):
+        print(f"  (ignoring AppleScript pool: {os.path.dirname(SOCKET_PATH)} "
+              "is not a private directory)", file=sys.stderr)
+        run_direct(app, args)
+    request = {"op": "run", "app": app, "args": args, "timeout": REQUEST_TIMEOUT}
+    try:
+        # Give the server a little longer than the request so it can report the timeout
+        reply = request_server(request, REQUEST_TIMEOUT + 5)
+        if reply is None and start_server():
+            reply = request_server(request, REQUEST_TIMEOUT + 5)
+    except socket.timeout:
+        reply = {"error": f"AppleScript timed out after {REQUEST_TIMEOUT:g}s", "timeout": True}
+    if reply is None:
+        run_direct(app, args)
+
+    if "error" in reply:
+        number = f" ({reply['number']})" if "number" in reply else ""
+        print(f"{app}.applescript: execution error: {reply['error']}{number}", file=sys.stderr)
+        sys.exit(124 if reply.get("timeout") else 1)
+    if reply.get("output") is not None:
+        print(reply["output"])
+
+
+def cmd_status():
+    reply = request_server({"op": "status"}, 5)
+    if reply is None:
+        print("AppleScript pool is not running")
+        return
+    workers = reply.get("workers", {})
+    print(f"AppleScript pool running (pid {reply.get('pid')}, {len(workers)} workers)")
+    for app, info in sorted(workers.items()):
+        print(f"  {app}: pid {info['pid']}, {info['requests']} requests, up {info['uptime']}s")
+
+
+def cmd_stop():
+    if request_server({"op": "stop"}, 5) is None:
+        print("AppleScript pool is not running")
+    else:
+        print("AppleScript pool stopped")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: applescript_pool.py <command> [args...]", file=sys.stderr)
+        print("Commands: run <app> [args...], status, stop, serve", file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+
+    if cmd == "run":
+        if len(sys.argv) < 3:
+            print("Usage: applescript_pool.py run <app> [args...]", file=sys.stderr)
+            sys.exit(1)
+        cmd_run(sys.argv[2], sys.argv[3:])
+    elif cmd == "serve":
+        serve()
+    elif cmd == "status":
+        cmd_status()
+    elif cmd == "stop":
+        cmd_stop()
+    else:
+        print(f"Unknown command: {cmd}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
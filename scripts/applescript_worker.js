@@ -0,0 +1,205 @@
+// applescript_worker.js — long-lived AppleScript host for applescript_pool.py
+//
+// Run as: osascript -l JavaScript applescript_worker.js
+//
+// Reads one JSON request per line on stdin:
+//   {"id": 1, "script": "/path/to/music.applescript", "args": ["now"]}
+// and writes one JSON response per line on stdout:
+//   {"id": 1, "output": "..."}
+//   {"id": 1, "error": "...", "number": -1728}
+//
+// Each script is compiled once (recompiled only if the file changes) and
+// its `on run argv` handler is called directly, so repeat calls skip both
+// the osascript launch and the compile step.
+//
+// Results are rendered the way osascript prints them (its default
+// human-readable form): lists as "a, b, c", numbers and booleans as
+// AppleScript writes them, "missing value", and "output": null when the
+// script returns nothing, so the pool prints exactly what osascript would.
+
+ObjC.import("Foundation");
+ObjC.import("OSAKit");
+
+var kCoreEventClass = 0x61657674;     // 'aevt'
+var kAEOpenApplication = 0x6f617070;  // 'oapp'
+var keyDirectObject = 0x2d2d2d2d;     // '----'
+var kAutoGenerateReturnID = -1;
+var kAnyTransactionID = 0;
+
+// Descriptor types (four-char codes) that displayValue() renders itself
+var typeUnicodeText = 0x75747874;     // 'utxt'
+var typeText = 0x54455854;            // 'TEXT'
+var typeUTF8Text = 0x75746638;        // 'utf8'
+var typeAEList = 0x6c697374;          // 'list'
+var typeAERecord = 0x7265636f;        // 'reco'
+var keyUserRecordFields = 0x75737266; // 'usrf'
+var typeSInt16 = 0x73686f72;          // 'shor'
+var typeSInt32 = 0x6c6f6e67;          // 'long'
+var typeSInt64 = 0x636f6d70;          // 'comp'
+var typeIEEE32BitFloatingPoint = 0x73696e67;  // 'sing'
+var typeIEEE64BitFloatingPoint = 0x646f7562;  // 'doub'
+var typeTrue = 0x74727565;            // 'true'
+var typeFalse = 0x66616c73;           // 'fals'
+var typeBoolean = 0x626f6f6c;         // 'bool'
+var typeNull = 0x6e756c6c;            // 'null'
+var typeType = 0x74797065;            // 'type'
+var cMissingValue = 0x6d736e67;       // 'msng'
+
+var displayScript = null;
+
+function scriptError(info, fallback) {
+    var e = new Error(fallback);
+    var d = (info && !info.isNil()) ? ObjC.deepUnwrap(info) : null;
+    if (d) {
+        if (d.NSAppleScriptErrorMessage) e.message = d.NSAppleScriptErrorMessage;
+        if (d.NSAppleScriptErrorNumber !== undefined) e.number = d.NSAppleScriptErrorNumber;
+    }
+    return e;
+}
+
+function loadScript(cache, path) {
+    var attrs = $.NSFileManager.defaultManager.attributesOfItemAtPathError(path, null);
+    if (attrs.isNil()) throw new Error("Script not found: " + path);
+    var mtime = attrs.fileModificationDate.timeIntervalSince1970;
+
+    var entry = cache[path];
+    if (entry && entry.mtime === mtime) return entry.script;
+
+    var err = Ref();
+    var script = $.NSAppleScript.alloc.initWithContentsOfURLError($.NSURL.fileURLWithPath(path), err);
+    if (script.isNil()) throw scriptError(err[0], "Could not load " + path);
+    if (!script.compileAndReturnError(err)) throw scriptError(err[0], "Could not compile " + path);
+
+    cache[path] = {script: script, mtime: mtime};
+    return script;
+}
+
+// AppleScript writes reals with a ".0" and switches to E notation outside 1e-4..1e4
+function formatReal(x) {
+    if (x === 0) return "0.0";
+    var ax = Math.abs(x);
+    if (ax >= 1e4 || ax < 1e-4) {
+        var parts = x.toExponential().split("e");
+        var mantissa = parts[0].indexOf(".") < 0 ? parts[0] + ".0" : parts[0];
+        var exponent = parseInt(parts[1], 10);
+        return mantissa + "E" + (exponent < 0 ? "-" : "+") + Math.abs(exponent);
+    }
+    var text = String(x);
+    return text.indexOf(".") < 0 ? text + ".0" : text;
+}
+
+// What OSAKit shows for a value (its source form), for types rendered above
+function sourceForm(desc) {
+    if (displayScript === null) {
+        displayScript = $.OSAScript.alloc.initWithSourceLanguage(
+            "", $.OSALanguage.languageForName("AppleScript"));
+    }
+    var rich = displayScript.richTextFromDescriptor(desc);
+    return (rich && !rich.isNil()) ? rich.string.js : "";
+}
+
+function displayValue(desc) {
+    var type = desc.descriptorType;
+    var i, items;
+    switch (type) {
+        case typeUnicodeText:
+        case typeText:
+        case typeUTF8Text:
+            return desc.stringValue.js;
+        case typeAEList:
+            items = [];
+            for (i = 1; i <= desc.numberOfItems; i++) items.push(displayValue(desc.descriptorAtIndex(i)));
+            return items.join(", ");
+        case typeAERecord:
+            var fields = desc.descriptorForKeyword(keyUserRecordFields);
+            if (desc.numberOfItems === 1 && fields && !fields.isNil()) {
+                // {label:value, ...} with user-defined labels only
+                items = [];
+                for (i = 1; i + 1 <= fields.numberOfItems; i += 2) {
+                    items.push(fields.descriptorAtIndex(i).stringValue.js + ":"
+                               + displayValue(fields.descriptorAtIndex(i + 1)));
+                }
+                return items.join(", ");
+            }
+            return sourceForm(desc);
+        case typeSInt16:
+        case typeSInt32:
+            return String(desc.int32Value);
+        case typeSInt64:
+            return String(Math.round(desc.doubleValue));
+        case typeIEEE32BitFloatingPoint:
+        case typeIEEE64BitFloatingPoint:
+            return formatReal(desc.doubleValue);
+        case typeTrue:
+        case typeFalse:
+        case typeBoolean:
+            return desc.booleanValue ? "true" : "false";
+        case typeType:
+            if (desc.typeCodeValue === cMissingValue) return "missing value";
+            return sourceForm(desc);
+        default:
+            return sourceForm(desc);
+    }
+}
+
+function callRunHandler(script, args) {
+    // Build the same 'aevt/oapp' event osascript sends, with argv as the direct object
+    var argv = $.NSAppleEventDescriptor.listDescriptor;
+    for (var i = 0; i < args.length; i++) {
+        argv.insertDescriptorAtIndex($.NSAppleEventDescriptor.descriptorWithString(args[i]), i + 1);
+    }
+    var event = $.NSAppleEventDescriptor.appleEventWithEventClassEventIDTargetDescriptorReturnIDTransactionID(
+        kCoreEventClass, kAEOpenApplication, $.NSAppleEventDescriptor.currentProcessDescriptor,
+        kAutoGenerateReturnID, kAnyTransactionID);
+    event.setParamDescriptorForKeyword(argv, keyDirectObject);
+
+    var err = Ref();
+    var result = script.executeAppleEventError(event, err);
+    if (result.isNil()) throw scriptError(err[0], "AppleScript error");
+    // No result at all: osascript prints nothing, not even a newline
+    if (result.descriptorType === typeNull) return null;
+    return displayValue(result);
+}
+
+function handle(cache, line) {
+    var request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        return {id: null, error: "Bad request: " + e.message};
+    }
+    try {
+        var script = loadScript(cache, request.script);
+        return {id: request.id, output: callRunHandler(script, request.args || [])};
+    } catch (e) {
+        var response = {id: request.id, error: e.message};
+        if (e.number !== undefined) response.number = e.number;
+        return response;
+    }
+}
+
+function run() {
+    var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    var cache = {};
+    var buffer = $.NSMutableData.data;
+
+    while (true) {
+        var data = stdin.availableData;
+        if (data.length === 0) break;  // EOF: the pool closed our stdin
+        buffer.appendData(data);
+
+        var text = $.NSString.alloc.initWithDataEncoding(buffer, $.NSUTF8StringEncoding);
+        if (text.isNil()) continue;  // split multi-byte character; wait for the rest
+
+        var lines = text.js.split("\n");
+        var rest = lines.pop();
+        buffer = $.NSMutableData.dataWithData($(rest).dataUsingEncoding($.NSUTF8StringEncoding));
+
+        for (var i = 0; i < lines.length; i++) {
+            if (lines[i].trim() === "") continue;
+            var response = JSON.stringify(handle(cache, lines[i])) + "\n";
+            stdout.writeData($(response).dataUsingEncoding($.NSUTF8StringEncoding));
+        }
+    }
+}
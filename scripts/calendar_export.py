@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""Export Apple Calendar occurrences as iCalendar or NDJSON, streamed from SQLite.
+
+    calendar_export.py [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--format ics|ndjson]
+                       [--calendar NAME] [--watermark FILE]
+
+Occurrences come from OccurrenceCache, so recurring events arrive already
+expanded: each occurrence is one standalone VEVENT (or JSON line). No
+master event with an RRULE is written, so in iCalendar each occurrence of
+a series gets its own UID, <series uid>-<occurrence start>; NDJSON keeps
+the series UID and adds recurrence_id. Rows are read in chunks and
+attendees are looked up per chunk, so memory stays flat however many years
+are exported.
+
+With --watermark FILE, only events modified at or after the time stored in
+FILE are exported, and FILE is advanced once the export completes. Events
+modified in that very second come again; they keep their UIDs, so an
+import replaces them rather than adding copies. Deleted
+events leave nothing behind in OccurrenceCache, so an incremental export
+cannot report them; run a full export to reconcile.
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import tracing
+from calendar_read import APPLE_EPOCH, from_apple, get_connection, to_apple
+
+EXPORT_CHUNK = 1000
+# Attendee lists are cached per series (recurring events repeat every chunk);
+# the cache is dropped when it grows past this many events
+ATTENDEE_CACHE = 5000
+
+DEFAULT_PAST_DAYS = 365
+DEFAULT_FUTURE_DAYS = 365
+
+PRODID = "-//macjuice//Calendar Export//EN"
+
+
+def utc_stamp(ts):
+    """Apple timestamp -> iCalendar UTC date-time (e.g. 20240601T153000Z)."""
+    t = time.gmtime(ts + APPLE_EPOCH)
+    return f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}T{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}Z"
+
+
+def iso(ts):
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts + APPLE_EPOCH, timezone.utc).isoformat(timespec="seconds")
+
+
+def ics_escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def ics_line(line):
+    """Fold a content line at 75 octets (RFC 5545 section 3.1)."""
+    if len(line) <= 75 and line.isascii():
+        return line + "\r\n"
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # Don't split a UTF-8 sequence
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode("utf-8"))
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def fetch_attendees(conn, item_ids, cache):
+    """Fill cache with {item_id: [(name, email), ...]} for item_ids not yet in it."""
+    missing = [item_id for item_id in item_ids if item_id not in cache]
+    if not missing:
+        return
+    if len(cache) + len(missing) > ATTENDEE_CACHE:
+        cache.clear()
+        missing = list(item_ids)
+    for item_id in missing:
+        cache[item_id] = []
+    placeholders = ",".join("?" for _ in missing)
+    rows = conn.execute(f"""
+        SELECT p.owner_id, i.display_name, p.email
+        FROM Participant p
+        LEFT JOIN Identity i ON p.identity_id = i.ROWID
+        WHERE p.owner_id IN ({placeholders})
+        ORDER BY p.owner_id, p.ROWID
+    """, missing).fetchall()
+    for item_id, name, email in rows:
+        attendee = (name, email)
+        if attendee not in cache[item_id]:
+            cache[item_id].append(attendee)
+
+
+def day_groups(cursor):
+    """Yield (day, rows) for consecutive rows of the same oc.day, reading in chunks."""
+    chunks = iter(lambda: cursor.fetchmany(EXPORT_CHUNK), [])
+    return itertools.groupby(itertools.chain.from_iterable(chunks), key=lambda row: row[-1])
+
+
+def iter_occurrences(conn, start_dt, end_dt, calendar=None, since=None):
+    """Yield one dict per occurrence in [start_dt, end_dt), in start order.
+
+    Rows stream in OccurrenceCache's day index order, so neither SQLite nor
+    this loop holds more than a day or so of rows. OccurrenceCache has a row
+    for every day an event spans: an occurrence is written on the first day
+    it appears and skipped after that, remembering it only until its end
+    day has gone by. Each batch of whole days is sorted by start before it
+    is written.
+    """
+    sql = """
+        SELECT ci.ROWID,
+               COALESCE(NULLIF(ci.unique_identifier, ''), ci.UUID),
+               ci.summary,
+               ci.description,
+               ci.all_day,
+               ci.has_recurrences,
+               ci.last_modified,
+               oc.occurrence_date,
+               oc.occurrence_start_date,
+               oc.occurrence_end_date,
+               c.title,
+               l.title,
+               oc.day
+        FROM OccurrenceCache oc
+        JOIN CalendarItem ci ON oc.event_id = ci.ROWID
+        JOIN Calendar c ON oc.calendar_id = c.ROWID
+        LEFT JOIN Location l ON ci.location_id = l.ROWID
+        WHERE oc.day >= ? AND oc.day < ?
+    """
+    params = [to_apple(start_dt), to_apple(end_dt)]
+    if calendar:
+        sql += " AND c.title = ? COLLATE NOCASE"
+        params.append(calendar)
+    if since is not None:
+        # Dates are whole seconds: an edit in the same second as the newest one
+        # exported last time must not be missed. It is written again under the
+        # same UID, which replaces the earlier copy on import.
+        sql += " AND COALESCE(ci.last_modified, 0) >= ?"
+        params.append(since)
+    sql += " ORDER BY oc.day"
+
+    attendees = {}
+    # (event, occurrence) -> its end, for occurrences that may show up on a later day
+    spanning = {}
+    batch = []
+    for day, rows in day_groups(conn.execute(sql, params)):
+        spanning = {key: end for key, end in spanning.items() if end >= day}
+        for row in rows:
+            key = (row[0], row[7])
+            if key in spanning:
+                continue
+            spanning[key] = row[9] if row[9] is not None else day
+            batch.append(row)
+        if len(batch) >= EXPORT_CHUNK:
+            yield from occurrence_batch(conn, batch, attendees)
+            batch = []
+    yield from occurrence_batch(conn, batch, attendees)
+
+
+def occurrence_batch(conn, rows, attendees):
+    """Turn rows covering whole days into occurrence dicts, in start order."""
+    if not rows:
+        return
+    fetch_attendees(conn, {row[0] for row in rows}, attendees)
+    rows.sort(key=lambda row: (row[-1], row[7] or 0, row[0]))
+    for (item_id, uid, summary, description, all_day, recurs, modified,
+         occ_date, occ_start, occ_end, cal_name, loc_name, _) in rows:
+        start = occ_start if occ_start is not None else occ_date
+        if start is None:
+            continue
+        yield {
+            "item_id": item_id,
+            "uid": uid or f"macjuice-{item_id}",
+            # The series' own date identifies this instance within it
+            "recurrence_id": occ_date if recurs else None,
+            "summary": summary or "(No title)",
+            "description": description,
+            "all_day": bool(all_day),
+            "start": start,
+            "end": occ_end,
+            "calendar": cal_name or "Unknown",
+            "location": loc_name,
+            "attendees": attendees.get(item_id, []),
+            "last_modified": modified,
+        }
+
+
+def all_day_dates(event):
+    """(first day, day after the last) for an all-day occurrence, as local dates."""
+    first = from_apple(event["start"]).date()
+    end = from_apple(event["end"]) if event["end"] is not None else None
+    # Calendar stores the end as midnight or as the last second of the final day
+    last = (end - timedelta(seconds=1)).date() if end else first
+    return first, max(last, first) + timedelta(days=1)
+
+
+def ics_event(event, now_stamp, bodies):
+    """Format one VEVENT.
+
+    Everything but the dates is the same for every occurrence of a series,
+    so that part is formatted once per event and kept in bodies.
+    """
+    uid = event["uid"]
+    if event["recurrence_id"] is not None:
+        # Without the master VEVENT a RECURRENCE-ID would dangle, so each
+        # occurrence stands alone under a UID of its own
+        uid = f"{uid}-{utc_stamp(event['recurrence_id'])}"
+    lines = ["BEGIN:VEVENT", f"UID:{uid}"]
+    if event["all_day"]:
+        first, after = all_day_dates(event)
+        lines.append(f"DTSTART;VALUE=DATE:{first:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{after:%Y%m%d}")
+    else:
+        lines.append(f"DTSTART:{utc_stamp(event['start'])}")
+        if event["end"] is not None:
+            lines.append(f"DTEND:{utc_stamp(event['end'])}")
+
+    body = bodies.get(event["item_id"])
+    if body is None:
+        if len(bodies) >= ATTENDEE_CACHE:
+            bodies.clear()
+        modified = event["last_modified"]
+        rest = [f"DTSTAMP:{utc_stamp(modified) if modified else now_stamp}",
+                f"SUMMARY:{ics_escape(event['summary'])}"]
+        if event["location"]:
+            rest.append(f"LOCATION:{ics_escape(event['location'])}")
+        if event["description"]:
+            rest.append(f"DESCRIPTION:{ics_escape(event['description'])}")
+        rest.append(f"CATEGORIES:{ics_escape(event['calendar'])}")
+        if modified:
+            rest.append(f"LAST-MODIFIED:{utc_stamp(modified)}")
+        for name, email in event["attendees"]:
+            params = f";CN=\"{name.replace(chr(34), '')}\"" if name else ""
+            rest.append(f"ATTENDEE{params}:mailto:{email}" if email
+                        else f"ATTENDEE{params}:invalid:nomail")
+        rest.append("END:VEVENT")
+        body = bodies[event["item_id"]] = "".join(ics_line(line) for line in rest)
+    return "".join(ics_line(line) for line in lines) + body
+
+
+def ndjson_event(event):
+    if event["all_day"]:
+        first, after = all_day_dates(event)
+        start, end = first.isoformat(), after.isoformat()
+    else:
+        start, end = iso(event["start"]), iso(event["end"])
+    return json.dumps({
+        "uid": event["uid"],
+        "recurrence_id": iso(event["recurrence_id"]),
+        "summary": event["summary"],
+        "start": start,
+        "end": end,
+        "all_day": event["all_day"],
+        "calendar": event["calendar"],
+        "location": event["location"],
+        "description": event["description"],
+        "attendees": [{"name": name, "email": email} for name, email in event["attendees"]],
+        "last_modified": iso(event["last_modified"]),
+    }, ensure_ascii=False) + "\n"
+
+
+def read_watermark(path):
+    try:
+        with open(path) as f:
+            return float(f.read().strip() or 0)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        print(f"Error: Watermark file is not a timestamp: {path}", file=sys.stderr)
+        sys.exit(1)
+
+
+def write_watermark(path, value):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{value!r}\n")
+    os.replace(tmp_path, path)
+
+
+def export(conn, out, start_dt, end_dt, fmt, calendar=None, since=None):
+    """Write occurrences to out; return (count, newest last_modified seen)."""
+    count = 0
+    newest = since
+    now_stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    bodies = {}
+    if fmt == "ics":
+        out.write(ics_line("BEGIN:VCALENDAR") + ics_line("VERSION:2.0")
+                  + ics_line(f"PRODID:{PRODID}") + ics_line("CALSCALE:GREGORIAN"))
+    with tracing.stage("export") as st:
+        for event in iter_occurrences(conn, start_dt, end_dt, calendar, since):
+            out.write(ics_event(event, now_stamp, bodies) if fmt == "ics" else ndjson_event(event))
+            count += 1
+            modified = event["last_modified"]
+            if modified is not None and (newest is None or modified > newest):
+                newest = modified
+        st.rows += count
+    if fmt == "ics":
+        out.write(ics_line("END:VCALENDAR"))
+    out.flush()
+    return count, newest
+
+
+def parse_date(value, flag):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        print(f"Error: {flag} must be YYYY-MM-DD", file=sys.stderr)
+        sys.exit(1)
+
+
+def usage():
+    print("Usage: calendar_export.py [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--format ics|ndjson]",
+          file=sys.stderr)
+    print("                          [--calendar NAME] [--watermark FILE]", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_dt = today - timedelta(days=DEFAULT_PAST_DAYS)
+    end_dt = today + timedelta(days=DEFAULT_FUTURE_DAYS)
+    fmt = "ics"
+    calendar = watermark = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--from" and args:
+            start_dt = parse_date(args.pop(0), "--from")
+        elif arg == "--to" and args:
+            # Inclusive: export through the end of that day
+            end_dt = parse_date(args.pop(0), "--to") + timedelta(days=1)
+        elif arg == "--format" and args and args[0] in ("ics", "ndjson"):
+            fmt = args.pop(0)
+        elif arg == "--calendar" and args:
+            calendar = args.pop(0)
+        elif arg == "--watermark" and args:
+            watermark = os.path.expanduser(args.pop(0))
+        else:
+            usage()
+
+    since = read_watermark(watermark) if watermark else None
+    conn = get_connection()
+    try:
+        count, newest = export(conn, sys.stdout, start_dt, end_dt, fmt, calendar, since)
+    except BrokenPipeError:
+        # Downstream stopped reading: the export is incomplete, keep the old watermark
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    print(f"  (exported {count} occurrences)", file=sys.stderr)
+    if watermark and newest is not None and newest != since:
+        write_watermark(watermark, newest)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ import sys
 import os
 from datetime import datetime, timedelta
 
+import tracing
+
 # Apple's Core Data epoch offset: 2001-01-01 00:00:00 UTC
 APPLE_EPOCH = 978307200
 
@@ -43,6 +45,7 @@ def format_duration(start_dt, end_dt):
     return f"{mins}m"
 
 
+@tracing.timed("format")
 def format_event(summary, start_dt, end_dt, cal_name, loc_name, all_day, attendees=None):
     """Format one event line matching the AppleScript output style."""
     if all_day:
@@ -72,9 +75,10 @@ def get_connection():
     if not os.path.exists(DB_PATH):
         print(f"Error: Calendar database not found at {DB_PATH}", file=sys.stderr)
         sys.exit(1)
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-    conn.execute("PRAGMA query_only = ON")
-    return conn
+    with tracing.stage("connect"):
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only = ON")
+    return tracing.traced(conn)
 
 
 def get_attendees_for_events(conn, start_dt, end_dt):
@@ -219,8 +223,12 @@ def cmd_yesterday(conn):
         print(line)
 
 
-def cmd_search(conn, query, past_days=90, future_days=90):
-    """Search events by title within a date range."""
+def find_events(conn, query, past_days=90, future_days=90, limit=30):
+    """Return events whose title matches query within a date range.
+
+    Each row is (summary, start, end, cal_name, loc_name, all_day) with
+    start/end already converted to local datetimes.
+    """
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     start = today - timedelta(days=past_days)
     end = today + timedelta(days=future_days)
@@ -243,14 +251,11 @@ def cmd_search(conn, query, past_days=90, future_days=90):
         WHERE oc.day >= ? AND oc.day < ?
           AND ci.summary LIKE ? COLLATE NOCASE
         ORDER BY oc.occurrence_date, ci.summary
-        LIMIT 30
+        LIMIT ?
     """
-    rows = conn.execute(sql, (start_apple, end_apple, pattern)).fetchall()
-
-    if not rows:
-        print(f"No events found matching: {query}")
-        return
+    rows = conn.execute(sql, (start_apple, end_apple, pattern, limit)).fetchall()
 
+    events = []
     for summary, occ_date, occ_start, occ_end, cal_name, loc_name, all_day in rows:
         start_ts = occ_start if occ_start is not None else occ_date
         end_ts = occ_end
@@ -258,8 +263,21 @@ def cmd_search(conn, query, past_days=90, future_days=90):
         end = from_apple(end_ts)
         if start is None:
             continue
-        print(format_event(summary or "(No title)", start, end,
-                           cal_name or "Unknown", loc_name, bool(all_day)))
+        events.append((summary or "(No title)", start, end,
+                       cal_name or "Unknown", loc_name, bool(all_day)))
+    return events
+
+
+def cmd_search(conn, query, past_days=90, future_days=90):
+    """Search events by title within a date range."""
+    events = find_events(conn, query, past_days, future_days)
+
+    if not events:
+        print(f"No events found matching: {query}")
+        return
+
+    for summary, start, end, cal_name, loc_name, all_day in events:
+        print(format_event(summary, start, end, cal_name, loc_name, all_day))
 
 
 def main():
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Run several HomeKit shortcuts at once, e.g. every light in a scene.
+
+    home_batch.py <action>... [--file scene.txt] [--jobs N] [--timeout secs] [--retries N]
+
+An action is a shortcut name ("Good Night", "homekit-lights-off") or a
+device=action pair ("porch-lights=off"), which runs the shortcut
+homekit-<device>-<action>. A trailing "+" ("porch-lights=off+") marks an
+action idempotent, safe to run twice. A scene file lists one action per
+line; blank lines and # comments are skipped, and "-" reads the list from
+stdin.
+
+Actions run as concurrent subprocesses, at most --jobs (default 4) at a
+time. Each attempt is killed after --timeout seconds (default 30). A failed
+or timed-out idempotent action is retried --retries times (default 1);
+others run once, because a killed attempt may already have flipped a
+toggle. Every action's result is printed as soon as it is final; the exit
+status is 1 if any action failed.
+
+The runner is the command each shortcut name is appended to. It defaults
+to home.applescript's "run", which goes through Shortcuts Events because
+`shortcuts run` hangs on HomeKit actions. Set MACJUICE_SHORTCUTS to use
+another, e.g. MACJUICE_SHORTCUTS="shortcuts run".
+"""
+
+import asyncio
+import os
+import re
+import shlex
+import sys
+import time
+
+import tracing
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RUNNER = ["osascript", os.path.join(SCRIPTS_DIR, "home.applescript"), "run"]
+
+DEFAULT_JOBS = 4
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 1
+RETRY_DELAY = 0.5
+IDEMPOTENT_MARK = "+"
+
+
+def runner_command():
+    override = os.environ.get("MACJUICE_SHORTCUTS")
+    return shlex.split(override) if override else DEFAULT_RUNNER
+
+
+def parse_action(action):
+    """'porch lights=off+' -> ('porch lights=off', True)."""
+    action = action.strip()
+    if action.endswith(IDEMPOTENT_MARK):
+        return action[:-len(IDEMPOTENT_MARK)].rstrip(), True
+    return action, False
+
+
+def shortcut_name(action):
+    """'porch lights=off' -> 'homekit-porch-lights-off'; names pass through."""
+    device, sep, state = action.partition("=")
+    if not sep:
+        return action.strip()
+    slug = re.sub(r"[^a-z0-9]+", "-", f"{device} {state}".lower()).strip("-")
+    return f"homekit-{slug}"
+
+
+def read_scene(path):
+    f = sys.stdin if path == "-" else open(os.path.expanduser(path))
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+async def run_once(runner, name, timeout):
+    """Run one attempt; return (ok, message)."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *runner, name,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        return False, f"cannot run {runner[0]}: {e.strerror or e}"
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False, f"timed out after {timeout:g}s"
+    out = stdout.decode(errors="replace").strip()
+    err = stderr.decode(errors="replace").strip()
+    # home.applescript reports failures in its output and still exits 0
+    if proc.returncode != 0 or out.startswith("ERROR"):
+        message = out or err or f"exit status {proc.returncode}"
+        if message.startswith("ERROR:"):
+            message = message[len("ERROR:"):]
+        return False, message.strip()
+    return True, out
+
+
+async def run_action(runner, action, slots, timeout, retries):
+    """Run one action, with retries if it is idempotent.
+
+    Returns (action, ok, message, attempts, seconds).
+    """
+    action, idempotent = parse_action(action)
+    name = shortcut_name(action)
+    started = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
+        async with slots:
+            with tracing.stage("shortcut") as st:
+                ok, message = await run_once(runner, name, timeout)
+                st.rows += 1
+        if ok or not idempotent or attempts > retries:
+            return action, ok, message, attempts, time.monotonic() - started
+        # Back off outside the semaphore so other actions can use the slot
+        await asyncio.sleep(RETRY_DELAY * attempts)
+
+
+async def run_batch(actions, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """Run all actions; print each result as it is final. Return the failure count."""
+    runner = runner_command()
+    slots = asyncio.Semaphore(jobs)
+    tasks = [run_action(runner, action, slots, timeout, retries) for action in actions]
+    failed = 0
+    for task in asyncio.as_completed(tasks):
+        action, ok, message, attempts, seconds = await task
+        tries = f", {attempts} attempts" if attempts > 1 else ""
+        if ok:
+            print(f"OK: {action} ({seconds:.1f}s{tries})", flush=True)
+        else:
+            failed += 1
+            print(f"ERROR: {action}: {message} ({seconds:.1f}s{tries})", flush=True)
+    return failed
+
+
+def main():
+    actions = []
+    jobs = DEFAULT_JOBS
+    timeout = DEFAULT_TIMEOUT
+    retries = DEFAULT_RETRIES
+
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--file" and args:
+            actions.extend(read_scene(args.pop(0)))
+        elif arg == "--jobs" and args:
+            jobs = max(1, int(args.pop(0)))
+        elif arg == "--timeout" and args:
+            timeout = float(args.pop(0))
+        elif arg == "--retries" and args:
+            retries = max(0, int(args.pop(0)))
+        else:
+            actions.append(arg)
+
+    if not actions:
+        print("Usage: home_batch.py <action>... [--file scene.txt] [--jobs N] "
+              "[--timeout secs] [--retries N]", file=sys.stderr)
+        print("  action: shortcut name, or device=action for homekit-<device>-<action>;",
+              file=sys.stderr)
+        print("          end it with + to retry it on failure (safe to run twice)",
+              file=sys.stderr)
+        sys.exit(1)
+
+    started = time.monotonic()
+    failed = asyncio.run(run_batch(actions, jobs, timeout, retries))
+    elapsed = time.monotonic() - started
+    print(f"  (ran {len(actions)} actions in {elapsed:.2f}s, {failed} failed)", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Python entry point for macjuice — runs the SQLite readers in-process.
+
+    python3 scripts/macjuice.py <app> <command> [args...]
+
+SQLite-backed reads are dispatched without starting bash or a second
+Python process, and each reader is imported only when its command runs.
+Everything else (AppleScript commands, help) is handed to the bash
+`macjuice` script, so both entry points accept the same arguments. The
+bash script in turn execs this one for every reader command.
+
+    --startup-profile   Report per-module import time for this invocation
+    --trace             Log per-stage timings and query plans (see tracing.py)
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASH_CLI = os.path.join(os.path.dirname(SCRIPTS_DIR), "macjuice")
+
+# app -> (reader module, commands it serves). The reader's main() is
+# called with sys.argv set to [reader, command, args...].
+READERS = {
+    "calendar": ("calendar_read", {"list", "today", "yesterday", "week", "upcoming", "past", "search"}),
+    "notes": ("notes_read", {"list", "folders", "read", "search"}),
+    "reminders": ("reminders_read", {"lists", "list", "all", "today", "overdue", "search"}),
+    "photos": ("photos_read", {"albums", "people", "list", "recent"}),
+    "messages": ("messages_read", {"read", "watch"}),
+    "music": ("music_read", {"search"}),
+}
+
+# (app, command) -> reader module whose main() takes only the args
+# (no command word), e.g. photos_search.py <query>.
+ARGS_ONLY_READERS = {
+    ("photos", "search"): "photos_search",
+    ("photos", "export"): "photos_export",
+    ("photos", "duplicates"): "photos_duplicates",
+    ("calendar", "export"): "calendar_export",
+    ("notes", "export"): "notes_export",
+    ("messages", "stats"): "messages_stats",
+    ("mail", "search"): "mail_search",
+    ("home", "batch"): "home_batch",
+}
+
+# (app, command) -> reader module for apps whose commands are split
+# across several readers; called like READERS.
+COMMAND_READERS = {
+    ("photos", "near"): "photos_geo",
+    ("photos", "bbox"): "photos_geo",
+    ("messages", "attachments"): "messages_attachments",
+    ("messages", "export-attachments"): "messages_attachments",
+}
+
+PROFILE_TOP = 15
+
+
+def route(app, cmd, args):
+    """Return (module_name, argv) for an in-process command, or None."""
+    if app == "search":
+        return "search_all", [cmd] + args
+    module = ARGS_ONLY_READERS.get((app, cmd))
+    if module:
+        return module, args
+    module = COMMAND_READERS.get((app, cmd))
+    if module:
+        return module, [cmd] + args
+    reader = READERS.get(app)
+    if reader and cmd in reader[1]:
+        return reader[0], [cmd] + args
+    return None
+
+
+def run_bash(argv):
+    """Replace this process with the bash CLI."""
+    os.execv("/bin/bash", ["bash", BASH_CLI] + argv)
+
+
+def dispatch(argv, from_bash=False):
+    if len(argv) < 2 or argv[0].startswith("-") or argv[1] in ("--help", "-h"):
+        run_bash(argv)
+
+    app, cmd, args = argv[0], argv[1], argv[2:]
+    target = route(app, cmd, args)
+    if target is None:
+        if from_bash:
+            # bash only sends what route() serves; handing it back would loop
+            print(f"Error: no reader for: {app} {cmd}", file=sys.stderr)
+            sys.exit(1)
+        run_bash(argv)
+
+    import importlib
+
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    module_name, reader_argv = target
+    module = importlib.import_module(module_name)
+    sys.argv = [module.__file__] + reader_argv
+    module.main()
+
+
+def profile_startup(argv):
+    """Re-run argv under `python -X importtime` and summarize import cost."""
+    import subprocess
+    import time
+
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__)] + argv,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+            continue
+        # import time: self [us] | cumulative | imported package
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        imports.append((int(fields[1]), int(fields[0]), fields[2].rstrip()))
+
+    top_level = sum(cumulative for cumulative, _, name in imports if not name.startswith("  "))
+    print("", file=sys.stderr)
+    print(f"Startup profile ({len(imports)} modules, {top_level / 1000:.1f}ms importing, "
+          f"{elapsed * 1000:.1f}ms total):", file=sys.stderr)
+    print(f"  {'cumulative':>10}  {'self':>8}  module", file=sys.stderr)
+    for cumulative, self_us, name in sorted(imports, reverse=True)[:PROFILE_TOP]:
+        print(f"  {cumulative / 1000:>8.2f}ms  {self_us / 1000:>6.2f}ms  {name.strip()}",
+              file=sys.stderr)
+    return proc.returncode
+
+
+def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] == "--trace":
+        # Must be set before any reader (and so tracing.py) is imported
+        os.environ["MACJUICE_TRACE"] = "1"
+        argv = argv[1:]
+    if "--startup-profile" in argv:
+        argv.remove("--startup-profile")
+        sys.exit(profile_startup(argv))
+    # Set by the bash script's run_reader; not passed on to anything we start
+    from_bash = os.environ.pop("MACJUICE_FROM_BASH", None) == "1"
+    dispatch(argv, from_bash)
+
+
+if __name__ == "__main__":
+    main()
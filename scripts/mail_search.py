@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Search Mail with one osascript per account, all accounts at once.
+
+    mail_search.py <query> [--account a,b] [--limit n] [--timeout secs]
+
+mail.applescript walks accounts one after another, so a single slow
+(typically Exchange) account holds up the results of all the others.
+Here every account gets its own osascript run, restricted to that account,
+in its own thread: results are printed as each account finishes, and
+accounts that run past the timeout are killed and reported on stderr.
+"""
+
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+import tracing
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIL_SCRIPT = os.path.join(SCRIPTS_DIR, "mail.applescript")
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_LIMIT = 20
+
+
+def osascript(args, timeout):
+    with tracing.stage("osascript") as st:
+        result = subprocess.run(
+            ["osascript", MAIL_SCRIPT, *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        st.bytes += len(result.stdout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "osascript failed")
+    return result.stdout
+
+
+def list_accounts(timeout):
+    """Return Mail's account names ("Name (address)" lines from `accounts`)."""
+    names = []
+    for line in osascript(["accounts"], timeout).splitlines():
+        name = line.rsplit(" (", 1)[0].strip()
+        if name:
+            names.append(name)
+    return names
+
+
+def search_account(query, account, deadline, results, procs, spawn_lock, stopped):
+    """Thread body: search one account and post (account, lines, error).
+
+    The osascript is only started if the deadline hasn't passed and
+    search_accounts hasn't stopped yet; both are checked under spawn_lock,
+    which search_accounts holds while it kills the stragglers, so no
+    osascript can start after that sweep.
+    """
+    try:
+        with tracing.stage("osascript") as st:
+            with spawn_lock:
+                timeout = deadline - time.monotonic()
+                if stopped.is_set() or timeout <= 0:
+                    raise subprocess.TimeoutExpired("osascript", 0)
+                proc = subprocess.Popen(
+                    ["osascript", MAIL_SCRIPT, "search", query, account],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                )
+                procs.append(proc)
+            try:
+                stdout, stderr = proc.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                raise
+            st.bytes += len(stdout)
+        if proc.returncode != 0:
+            raise RuntimeError(stderr.strip() or "osascript failed")
+        lines = stdout.strip().splitlines()
+        if lines and lines[0].startswith("No messages found"):
+            lines = []
+        results.put((account, lines, None))
+    except subprocess.TimeoutExpired:
+        results.put((account, None, "timed out"))
+    except Exception as e:
+        results.put((account, None, str(e) or type(e).__name__))
+
+
+def search_accounts(query, accounts, timeout=DEFAULT_TIMEOUT):
+    """Yield (account, lines, error) in the order accounts finish.
+
+    Accounts still running when the timeout elapses are yielded last, with
+    error "timed out", so the caller always hears about every account.
+    """
+    deadline = time.monotonic() + timeout
+    results = queue.Queue()
+    procs = []
+    spawn_lock = threading.Lock()
+    stopped = threading.Event()
+    for account in accounts:
+        # Daemon threads: an account stuck past the deadline can't hold up exit
+        threading.Thread(
+            target=search_account,
+            args=(query, account, deadline, results, procs, spawn_lock, stopped),
+            daemon=True,
+        ).start()
+
+    pending = list(accounts)
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            account, lines, error = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+        pending.remove(account)
+        yield account, lines, error
+
+    # Don't leave osascripts of timed-out accounts running behind us
+    with spawn_lock:
+        stopped.set()
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+    for account in pending:
+        yield account, None, "timed out"
+
+
+def mail_search(query, accounts=None, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT):
+    started = time.monotonic()
+    if not accounts:
+        try:
+            accounts = list_accounts(timeout)
+        except (subprocess.TimeoutExpired, RuntimeError) as e:
+            print(f"Error: could not list Mail accounts: {e}", file=sys.stderr)
+            sys.exit(1)
+    # Search an account named twice in --account only once. One named both by
+    # name and by address still runs twice; the msg_id check below drops the
+    # repeated messages.
+    accounts = list(dict.fromkeys(accounts))
+
+    seen = set()
+    shown = 0
+    for account, lines, error in search_accounts(query, accounts, timeout):
+        if error:
+            if error == "timed out":
+                error = f"timed out after {timeout:g}s"
+            print(f"  ({account}: {error})", file=sys.stderr)
+            continue
+        for line in lines:
+            msg_id = line.split(" | ", 1)[0]
+            if shown >= limit or msg_id in seen:
+                continue
+            seen.add(msg_id)
+            shown += 1
+            print(line, flush=True)
+
+    if not shown:
+        print(f"No messages found matching: {query}")
+
+    elapsed = time.monotonic() - started
+    print(f"  (searched {len(accounts)} accounts in {elapsed:.2f}s)", file=sys.stderr)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print("Usage: mail_search.py <query> [--account a,b] [--limit n] [--timeout secs]",
+              file=sys.stderr)
+        sys.exit(1)
+
+    query = sys.argv[1]
+    accounts = None
+    limit = DEFAULT_LIMIT
+    timeout = DEFAULT_TIMEOUT
+
+    args = sys.argv[2:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--account" and args:
+            accounts = [a.strip() for a in args.pop(0).split(",") if a.strip()]
+        elif arg == "--limit" and args:
+            limit = int(args.pop(0))
+        elif arg == "--timeout" and args:
+            timeout = float(args.pop(0))
+
+    mail_search(query, accounts, limit, timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -68,36 +68,6 @@ case "$CMD" in
         done
         ;;
 
-    read)
-        # Read messages from a specific chat (by phone, email, or display name)
-        CHAT="$1"
-        COUNT="${2:-20}"
-        if [[ -z "$CHAT" ]]; then
-            echo "Usage: macjuice messages read <chat> [count]"
-            echo "  <chat> can be a phone number, email, or group name"
-            exit 1
-        fi
-        CHAT_ESC=$(sql_escape "$CHAT")
-        sqlite3 -separator '|' "$DB" "
-            SELECT
-                datetime(m.date/1000000000 + 978307200, 'unixepoch', 'localtime') as time,
-                CASE WHEN m.is_from_me = 1 THEN 'Me' ELSE COALESCE(h.id, 'Unknown') END as sender,
-                m.text
-            FROM message m
-            LEFT JOIN handle h ON m.handle_id = h.ROWID
-            JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
-            JOIN chat c ON cmj.chat_id = c.ROWID
-            WHERE (c.display_name LIKE '%${CHAT_ESC}%'
-               OR c.chat_identifier LIKE '%${CHAT_ESC}%'
-               OR h.id LIKE '%${CHAT_ESC}%')
-               AND m.text IS NOT NULL AND m.text != ''
-            ORDER BY m.date DESC
-            LIMIT $COUNT;
-        " 2>&1 | while IFS='|' read -r time sender text; do
-            echo "[$time] $sender: $text"
-        done | tac
-        ;;
-
     recent)
         # Recent messages across all chats
         COUNT="${1:-20}"
@@ -164,17 +134,15 @@ case "$CMD" in
         ;;
 
     *)
-        echo "Usage: macjuice messages <command> [args]"
+        echo "Usage: messages-db.sh <command> [args]"
         echo ""
-        echo "Read commands (SQLite — fast):"
+        echo "Commands:"
         echo "  chats [count]          List chats with last message (default: 30)"
-        echo "  read <chat> [count]    Read messages from a chat (default: 20)"
         echo "  recent [count]         Recent messages across all chats (default: 20)"
         echo "  search <query> [count] Search message text (default: 20)"
         echo "  info                   Show database stats"
         echo ""
-        echo "Write commands (AppleScript):"
-        echo "  send <to> <message>    Send a message (phone, email, or contact name)"
+        echo "See 'macjuice messages --help' for read, watch, stats, attachments and send."
         echo ""
         echo "Requires Full Disk Access for Terminal.app"
         exit 1
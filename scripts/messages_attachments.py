@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""List and export iMessage/SMS attachments via SQLite (chat.db).
+
+    attachments [chat]                  stream attachment metadata, oldest first
+    export-attachments <chat> <dir>     copy a chat's attachment files into <dir>
+
+Exports copy files on a small thread pool and skip content already exported:
+files are compared by size first and by SHA-256 only when sizes match. Each
+exported attachment is appended to a manifest in <dir>, so an interrupted
+export picks up where it stopped.
+
+REQUIREMENT: Full Disk Access for the terminal running this.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import tracing
+from messages_read import ChatIndex, format_time, from_apple_ns, get_connection
+
+# One line of JSON per attachment handled (copied or duplicate), keyed by guid
+MANIFEST_NAME = ".macjuice-attachments.jsonl"
+
+# Copies run in parallel; rows are read ahead at most this many per worker
+EXPORT_WORKERS = 8
+QUEUE_PER_WORKER = 4
+COPY_CHUNK = 1 << 20
+
+
+def fetch_attachments(conn, chat_ids=None):
+    """Yield attachment rows (oldest first) as dicts, optionally only from chat_ids."""
+    sql = """
+        SELECT
+            a.ROWID,
+            a.guid,
+            a.filename,
+            COALESCE(NULLIF(a.transfer_name, ''), a.filename) AS name,
+            a.mime_type,
+            a.total_bytes,
+            m.date,
+            COALESCE(NULLIF(c.display_name, ''), c.chat_identifier, h.id, 'Unknown') AS chat,
+            CASE WHEN m.is_from_me = 1 THEN 'Me' ELSE COALESCE(h.id, 'Unknown') END AS sender
+        FROM attachment a
+        JOIN message_attachment_join maj ON maj.attachment_id = a.ROWID
+        JOIN message m ON m.ROWID = maj.message_id
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        LEFT JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+        LEFT JOIN chat c ON cmj.chat_id = c.ROWID
+        WHERE a.filename IS NOT NULL
+    """
+    params = []
+    if chat_ids is not None:
+        sql += f" AND cmj.chat_id IN ({','.join('?' * len(chat_ids))})"
+        params += chat_ids
+    sql += " ORDER BY m.date, a.ROWID"
+
+    # A message can sit in more than one chat; report each attachment once
+    seen = set()
+    for rowid, guid, filename, name, mime, size, date, chat_name, sender in conn.execute(sql, params):
+        if rowid in seen:
+            continue
+        seen.add(rowid)
+        yield {
+            "guid": guid,
+            "path": os.path.expanduser(filename),
+            "name": os.path.basename(name or filename),
+            "mime": mime or "",
+            "size": size or 0,
+            "date": from_apple_ns(date),
+            "chat": chat_name,
+            "sender": sender,
+        }
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def resolve_chat(conn, chat):
+    """Chat ROWIDs for chat via ChatIndex, or None (no filter) when chat is empty."""
+    return ChatIndex(conn).resolve(chat) if chat else None
+
+
+def cmd_list(conn, chat=None):
+    """Print attachment metadata as rows stream in."""
+    count = total = 0
+    for att in fetch_attachments(conn, resolve_chat(conn, chat)):
+        count += 1
+        total += att["size"]
+        missing = "" if os.path.exists(att["path"]) else "  (not on disk)"
+        print(f"[{format_time(att['date'])}] {att['chat']} | {att['sender']}: "
+              f"{att['name']} ({format_size(att['size'])}, {att['mime'] or 'unknown'}){missing}")
+    if not count:
+        print(f"No attachments found in chat: {chat}" if chat else "No attachments found.")
+        return
+    print(f"{count} attachment(s), {format_size(total)}")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_hashing(src, dest):
+    """Copy src to dest in one pass, returning (SHA-256 hex, bytes copied)."""
+    digest = hashlib.sha256()
+    copied = 0
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        for block in iter(lambda: fin.read(COPY_CHUNK), b""):
+            digest.update(block)
+            fout.write(block)
+            copied += len(block)
+    return digest.hexdigest(), copied
+
+
+class Exporter:
+    """Copy attachments into one folder, skipping content it already holds.
+
+    All bookkeeping (manifest, size/hash index, claimed names) lives behind
+    one lock; reading, hashing and writing file contents happen outside it.
+    """
+
+    def __init__(self, dest):
+        self.dest = dest
+        self.manifest_path = os.path.join(dest, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.done = set()          # guids already handled
+        self.sizes = set()         # sizes of exported files
+        self.by_hash = {}          # (size, sha256) -> exported file name
+        self.names = set(os.listdir(dest))
+        self.counts = {"copied": 0, "duplicate": 0, "skipped": 0, "missing": 0, "failed": 0}
+        self.bytes = 0
+        self._load_manifest()
+        self.manifest = open(self.manifest_path, "a")
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.done.add(entry["guid"])
+                    if entry.get("status") == "copied" and os.path.exists(
+                            os.path.join(self.dest, entry["file"])):
+                        self.sizes.add(entry["size"])
+                        self.by_hash[(entry["size"], entry["sha256"])] = entry["file"]
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self.manifest.close()
+
+    def _record(self, entry):
+        # Called with the lock held; flushed per line so a crash loses at most one
+        self.done.add(entry["guid"])
+        self.counts[entry["status"]] += 1
+        self.manifest.write(json.dumps(entry) + "\n")
+        self.manifest.flush()
+
+    def _claim_name(self, att):
+        """Reserve a file name (called with the lock held)."""
+        stamp = att["date"].strftime("%Y-%m-%d %H%M%S ") if att["date"] else ""
+        base, ext = os.path.splitext(stamp + att["name"])
+        name, n = base + ext, 2
+        while name in self.names:
+            name, n = f"{base} ({n}){ext}", n + 1
+        self.names.add(name)
+        return name
+
+    def wanted(self, att):
+        with self.lock:
+            if att["guid"] in self.done:
+                self.counts["skipped"] += 1
+                return False
+            return True
+
+    def export(self, att):
+        """Export one attachment; a failed copy is reported and counted, not raised."""
+        try:
+            self._export(att)
+        except OSError as e:
+            # Not recorded in the manifest, so the next run tries it again
+            with self.lock:
+                self.counts["failed"] += 1
+            print(f"  failed: {att['name']}: {e.strerror or e}", file=sys.stderr)
+
+    def _export(self, att):
+        src = att["path"]
+        try:
+            size = os.path.getsize(src)
+        except OSError:
+            # Not downloaded (offloaded to iCloud) — not recorded, so a later run retries
+            with self.lock:
+                self.counts["missing"] += 1
+            print(f"  missing: {att['name']} ({src})", file=sys.stderr)
+            return
+
+        # Only hash up front when something of the same size is already there
+        sha = None
+        with self.lock:
+            size_seen = size in self.sizes
+        if size_seen:
+            sha = file_sha256(src)
+            with self.lock:
+                existing = self.by_hash.get((size, sha))
+                if existing:
+                    self._record({"guid": att["guid"], "status": "duplicate",
+                                  "file": existing, "size": size, "sha256": sha})
+                    return
+
+        with self.lock:
+            name = self._claim_name(att)
+        final = os.path.join(self.dest, name)
+        partial = final + ".part"
+        try:
+            with tracing.stage("copy") as st:
+                copied_sha, copied = copy_hashing(src, partial)
+                st.rows += 1
+                st.bytes += copied
+            if att["date"]:
+                ts = att["date"].timestamp()
+                os.utime(partial, (ts, ts))
+        except OSError:
+            try:
+                os.unlink(partial)
+            except OSError:
+                pass
+            with self.lock:
+                self.names.discard(name)
+            raise
+
+        with self.lock:
+            # Another worker may have copied the same content meanwhile
+            existing = self.by_hash.get((copied, copied_sha))
+            if existing:
+                os.unlink(partial)
+                self.names.discard(name)
+                self._record({"guid": att["guid"], "status": "duplicate",
+                              "file": existing, "size": copied, "sha256": copied_sha})
+                return
+            os.replace(partial, final)
+            self.sizes.add(copied)
+            self.by_hash[(copied, copied_sha)] = name
+            self.bytes += copied
+            self._record({"guid": att["guid"], "status": "copied",
+                          "file": name, "size": copied, "sha256": copied_sha})
+
+
+def cmd_export(conn, chat, dest):
+    """Copy every attachment in a chat into dest, resuming a previous export.
+
+    Returns the number of attachments that could not be copied.
+    """
+    os.makedirs(dest, exist_ok=True)
+    chat_ids = resolve_chat(conn, chat)
+    exporter = Exporter(dest)
+    matched = 0
+    try:
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+            pending = set()
+            for att in fetch_attachments(conn, chat_ids):
+                matched += 1
+                if not exporter.wanted(att):
+                    continue
+                # Keep the read-ahead bounded for chats with years of files
+                if len(pending) >= EXPORT_WORKERS * QUEUE_PER_WORKER:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                pending.add(pool.submit(exporter.export, att))
+            for future in pending:
+                future.result()
+    finally:
+        exporter.close()
+
+    if not matched:
+        print(f"No attachments found in chat: {chat}")
+        return 0
+    c = exporter.counts
+    print(f"OK: Exported {c['copied']} file(s) ({format_size(exporter.bytes)}) to {dest}")
+    if c["duplicate"] or c["skipped"] or c["missing"]:
+        print(f"  {c['duplicate']} duplicate(s) skipped, {c['skipped']} already exported, "
+              f"{c['missing']} not on disk")
+    if c["failed"]:
+        print(f"Error: {c['failed']} attachment(s) could not be copied (re-run to retry)",
+              file=sys.stderr)
+    return c["failed"]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: messages_attachments.py <command> [args...]", file=sys.stderr)
+        print("Commands: attachments [chat], export-attachments <chat> <dir>", file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    if cmd == "export-attachments" and (len(sys.argv) < 4 or not sys.argv[2].strip()):
+        # An empty chat would match every chat and export the whole history
+        print("Usage: macjuice messages export-attachments <chat> <destination-folder>", file=sys.stderr)
+        sys.exit(1)
+    if cmd not in ("attachments", "export-attachments"):
+        print(f"Unknown command: {cmd}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_connection()
+    try:
+        if cmd == "attachments":
+            cmd_list(conn, sys.argv[2] if len(sys.argv) > 2 else None)
+        else:
+            failed = cmd_export(conn, sys.argv[2], os.path.abspath(os.path.expanduser(sys.argv[3])))
+            if failed:
+                sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""Read iMessage/SMS history via SQLite (chat.db) from Python.
+
+messages-db.sh covers the interactive read commands; this module holds the
+same queries for callers that need rows rather than printed text (e.g. the
+cross-app search), plus `read`, which resolves the chat name up front and
+reads only that chat's rows, and `watch`, which stays running and prints each
+new message as it lands.
+
+REQUIREMENT: Full Disk Access for the terminal running this.
+"""
+
+import heapq
+import itertools
+import sqlite3
+import sys
+import os
+import select
+import struct
+import time
+from datetime import datetime
+
+import tracing
+
+# Apple's Core Data epoch offset: 2001-01-01 00:00:00 UTC
+APPLE_EPOCH = 978307200
+
+DB_PATH = os.path.expanduser("~/Library/Messages/chat.db")
+
+CACHE_DIR = os.path.expanduser(os.environ.get("MACJUICE_CACHE_DIR", "~/Library/Caches/macjuice"))
+CHAT_INDEX_PATH = os.path.join(CACHE_DIR, "messages_chats.sqlite")
+CHAT_INDEX_VERSION = "1"
+
+# Handles/queries with at least this many digits (and only phone punctuation)
+# compare as bare digits, so "+1 (555) 123-4567" finds "+15551234567"
+PHONE_MIN_DIGITS = 7
+
+# watch: wake at least this often even if no file event arrives, in case
+# one was missed (cheap: a PRAGMA data_version check)
+WATCH_HEARTBEAT = 30.0
+# Poll interval for the stat() fallback when neither kqueue nor inotify exist
+WATCH_POLL = 0.25
+
+
+def from_apple_ns(ts):
+    """Convert a chat.db timestamp (nanoseconds since 2001) to local datetime."""
+    if not ts:
+        return None
+    # Pre-High Sierra databases stored whole seconds
+    if ts > 1e11:
+        ts = ts / 1e9
+    try:
+        return datetime.fromtimestamp(ts + APPLE_EPOCH)
+    except (OSError, OverflowError, ValueError):
+        return None
+
+
+def get_connection():
+    if not os.access(DB_PATH, os.R_OK):
+        print(f"Error: Cannot read Messages database at {DB_PATH}", file=sys.stderr)
+        print("Grant Full Disk Access to your terminal (see README).", file=sys.stderr)
+        sys.exit(1)
+    with tracing.stage("connect"):
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only = ON")
+    return tracing.traced(conn)
+
+
+def search_messages(conn, query, limit=20):
+    """Return (time, chat, sender, text) rows whose text contains query."""
+    sql = """
+        SELECT
+            m.date,
+            COALESCE(NULLIF(c.display_name, ''), h.id, 'Unknown') AS chat,
+            CASE WHEN m.is_from_me = 1 THEN 'Me' ELSE COALESCE(h.id, 'Unknown') END AS sender,
+            REPLACE(SUBSTR(m.text, 1, 100), CHAR(10), ' ') AS text
+        FROM message m
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        LEFT JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+        LEFT JOIN chat c ON cmj.chat_id = c.ROWID
+        WHERE m.text LIKE ?
+        ORDER BY m.date DESC
+        LIMIT ?
+    """
+    rows = conn.execute(sql, (f"%{query}%", limit)).fetchall()
+    return [(from_apple_ns(date), chat, sender, text) for date, chat, sender, text in rows]
+
+
+def format_time(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S") if dt else "unknown"
+
+
+def cmd_search(conn, query, limit):
+    """Search message text."""
+    for when, chat, sender, text in search_messages(conn, query, limit):
+        print(f"[{format_time(when)}] {chat} | {sender}: {text}")
+
+
+def normalize_key(text):
+    """Lowercase a chat name/handle; phone numbers collapse to their digits."""
+    text = (text or "").strip().lower()
+    digits = "".join(ch for ch in text if ch.isdigit())
+    if len(digits) >= PHONE_MIN_DIGITS and not text.strip("+0123456789 ().-"):
+        return digits
+    return text
+
+
+def trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def chat_state(conn):
+    """Return counts and maxima of the chat tables the chat index is built from.
+
+    chat.db's mtime moves with every message received, these only when a
+    chat is started, renamed or joined.
+    """
+    max_chat, chats, names, joins, max_handle = conn.execute("""
+        SELECT
+            (SELECT COALESCE(MAX(ROWID), 0) FROM chat),
+            (SELECT COUNT(*) FROM chat),
+            (SELECT TOTAL(LENGTH(display_name)) FROM chat),
+            (SELECT COUNT(*) FROM chat_handle_join),
+            (SELECT COALESCE(MAX(ROWID), 0) FROM handle)
+    """).fetchone()
+    return f"{max_chat}:{chats}:{names:.0f}:{joins}:{max_handle}"
+
+
+def chat_keys(conn):
+    """Yield (chat_id, key, is_handle) for every chat name, identifier and handle."""
+    for chat_id, name, ident in conn.execute(
+            "SELECT ROWID, display_name, chat_identifier FROM chat"):
+        for text in (name, ident):
+            key = normalize_key(text)
+            if key:
+                yield chat_id, key, 0
+    for chat_id, handle in conn.execute("""
+            SELECT chj.chat_id, h.id
+            FROM chat_handle_join chj
+            JOIN handle h ON h.ROWID = chj.handle_id"""):
+        key = normalize_key(handle)
+        if key:
+            yield chat_id, key, 1
+
+
+class ChatIndex:
+    """Resolve a chat query to chat ROWIDs without touching the message table.
+
+    Every chat is keyed by its display name, its identifier and the handles
+    taking part in it, each normalized with normalize_key(). Lookups go
+    through a trigram index (key prefixes for queries under three
+    characters) and verify candidates with a substring test, ranking:
+
+        0. the chat's name or identifier equals the query
+        1. the chat's name or identifier contains it
+        2. one of the chat's handles contains it
+
+    Only the best non-empty tier is returned, so "+1 (555) 123-4567" picks the
+    one-to-one chat(s) with that number rather than every group it is in.
+
+    The index is kept in CACHE_DIR and rebuilt when chat_state() changes.
+    """
+
+    def __init__(self, conn):
+        state = chat_state(conn)
+        if not self._is_current(state):
+            try:
+                self._build(conn, state)
+            except OSError:
+                # Cache dir not writable: build in memory for this run
+                self.index = tracing.traced(sqlite3.connect(":memory:"))
+                self._fill(conn, self.index, state)
+                return
+        self.index = tracing.traced(sqlite3.connect(f"file:{CHAT_INDEX_PATH}?mode=ro", uri=True))
+
+    @staticmethod
+    def _is_current(state):
+        if not os.path.exists(CHAT_INDEX_PATH):
+            return False
+        try:
+            index = sqlite3.connect(f"file:{CHAT_INDEX_PATH}?mode=ro", uri=True)
+            try:
+                meta = dict(index.execute("SELECT key, value FROM meta").fetchall())
+            finally:
+                index.close()
+        except sqlite3.Error:
+            return False
+        return (meta.get("version") == CHAT_INDEX_VERSION and meta.get("source") == DB_PATH
+                and meta.get("state") == state)
+
+    @staticmethod
+    def _fill(conn, index, state):
+        with tracing.stage("chat_index") as st:
+            index.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE keys (chat_id INTEGER NOT NULL, key TEXT NOT NULL, is_handle INTEGER NOT NULL);
+                CREATE TABLE grams (gram TEXT NOT NULL, chat_id INTEGER NOT NULL,
+                                    PRIMARY KEY (gram, chat_id)) WITHOUT ROWID;
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            rows = list(chat_keys(conn))
+            index.executemany("INSERT INTO keys VALUES (?, ?, ?)", rows)
+            index.executemany("INSERT OR IGNORE INTO grams VALUES (?, ?)",
+                              ((gram, chat_id) for chat_id, key, _ in rows for gram in trigrams(key)))
+            index.execute("CREATE INDEX keys_key ON keys (key)")
+            index.execute("CREATE INDEX keys_chat ON keys (chat_id)")
+            index.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", CHAT_INDEX_VERSION),
+                ("source", DB_PATH),
+                ("state", state),
+            ])
+            index.commit()
+            st.rows += len(rows)
+
+    def _build(self, conn, state):
+        """Write a fresh index next to the old one, then swap it in."""
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{CHAT_INDEX_PATH}.{os.getpid()}.tmp"
+        index = sqlite3.connect(tmp_path)
+        try:
+            self._fill(conn, index, state)
+        finally:
+            index.close()
+        os.replace(tmp_path, CHAT_INDEX_PATH)
+
+    def resolve(self, query):
+        """Return the ROWIDs of the chats best matching query (may be empty)."""
+        key = normalize_key(query)
+        if not key:
+            return []
+        if len(key) < 3:
+            # Too short for trigrams: candidates are chats with a key starting with it
+            candidates = "SELECT chat_id FROM keys WHERE key >= ? AND key < ?"
+            params = [key, key + "\U0010ffff"]
+        else:
+            grams = sorted(trigrams(key))
+            candidates = f"""
+                SELECT chat_id FROM grams WHERE gram IN ({','.join('?' * len(grams))})
+                GROUP BY chat_id HAVING COUNT(*) = ?"""
+            params = grams + [len(grams)]
+        rows = self.index.execute(f"""
+            SELECT chat_id, key, is_handle FROM keys
+            WHERE chat_id IN ({candidates}) AND instr(key, ?) > 0
+        """, params + [key]).fetchall()
+        best = {}
+        for chat_id, k, is_handle in rows:
+            tier = 2 if is_handle else (0 if k == key else 1)
+            best[chat_id] = min(best.get(chat_id, tier), tier)
+        for tier in range(3):
+            found = sorted(chat_id for chat_id, t in best.items() if t == tier)
+            if found:
+                return found
+        return []
+
+
+def read_chat(conn, chat_ids, limit=20):
+    """Return the last `limit` text messages across chat_ids, oldest first.
+
+    Each chat is read newest-first along chat_message_join's
+    (chat_id, message_date) index and stops after `limit` rows, so the cost
+    follows `limit`, not the size of the chat. The per-chat lists are then
+    merged by date.
+    """
+    sql = """
+        SELECT
+            cmj.message_date,
+            m.ROWID,
+            CASE WHEN m.is_from_me = 1 THEN 'Me' ELSE COALESCE(h.id, 'Unknown') END AS sender,
+            REPLACE(m.text, CHAR(10), ' ') AS text
+        FROM chat_message_join cmj
+        JOIN message m ON m.ROWID = cmj.message_id
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        WHERE cmj.chat_id = ?
+          AND m.text IS NOT NULL AND m.text != ''
+        ORDER BY cmj.message_date DESC, cmj.message_id DESC
+        LIMIT ?
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_message_join)")}
+    if "message_date" not in columns:
+        # Pre-Catalina databases: no denormalized date to walk, sort on message.date
+        sql = sql.replace("cmj.message_date", "m.date")
+    per_chat = [conn.execute(sql, (chat_id, limit)).fetchall() for chat_id in chat_ids]
+    newest = list(itertools.islice(heapq.merge(*per_chat, reverse=True), limit))
+    newest.reverse()
+    return [(from_apple_ns(date), sender, text) for date, _, sender, text in newest]
+
+
+def cmd_read(conn, chat, limit):
+    """Print the last messages of a chat, oldest first."""
+    chat_ids = ChatIndex(conn).resolve(chat)
+    if not chat_ids:
+        print(f"Chat not found: {chat}")
+        return
+    messages = read_chat(conn, chat_ids, limit)
+    if not messages:
+        print(f"No messages in chat: {chat}")
+        return
+    for when, sender, text in messages:
+        print(f"[{format_time(when)}] {sender}: {text}")
+
+
+class KqueueWaiter:
+    """Wake on writes to chat.db / chat.db-wal via kqueue (macOS)."""
+
+    FFLAGS = (getattr(select, "KQ_NOTE_WRITE", 0x2) | getattr(select, "KQ_NOTE_EXTEND", 0x4)
+              | getattr(select, "KQ_NOTE_ATTRIB", 0x8) | getattr(select, "KQ_NOTE_DELETE", 0x1)
+              | getattr(select, "KQ_NOTE_RENAME", 0x20))
+    GONE = getattr(select, "KQ_NOTE_DELETE", 0x1) | getattr(select, "KQ_NOTE_RENAME", 0x20)
+    # Open for event notification only, so we don't hold the file busy
+    O_EVTONLY = getattr(os, "O_EVTONLY", 0x8000)
+
+    def __init__(self, paths):
+        self.kq = select.kqueue()
+        self.paths = paths
+        self.fds = {}
+        self._arm()
+
+    def _arm(self):
+        for path in self.paths:
+            if path in self.fds:
+                continue
+            try:
+                fd = os.open(path, os.O_RDONLY | self.O_EVTONLY)
+            except FileNotFoundError:
+                continue  # the WAL comes and goes; the directory watch sees it return
+            self.fds[path] = fd
+            event = select.kevent(
+                fd,
+                filter=select.KQ_FILTER_VNODE,
+                flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                fflags=self.FFLAGS,
+            )
+            self.kq.control([event], 0)
+
+    def wait(self, timeout):
+        events = self.kq.control(None, 16, timeout)
+        for event in events:
+            if event.fflags & self.GONE:
+                for path, fd in list(self.fds.items()):
+                    if fd == event.ident:
+                        os.close(fd)
+                        del self.fds[path]
+        self._arm()
+        return bool(events)
+
+
+class InotifyWaiter:
+    """Wake on writes to chat.db / chat.db-wal via inotify (Linux)."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory: the WAL is deleted and recreated on checkpoints
+        directory = os.path.dirname(paths[0])
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, directory.encode(), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self.names = {os.path.basename(p).encode() for p in paths}
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def _drain(self):
+        """Read all pending events; True if any touched a watched file."""
+        hit = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return hit
+            pos = 0
+            while pos < len(data):
+                _, _, _, length = self.EVENT_HEADER.unpack_from(data, pos)
+                pos += self.EVENT_HEADER.size
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                # Ignore chat.db-shm: readers (including us) touch it constantly
+                if name in self.names:
+                    hit = True
+
+
+class StatWaiter:
+    """Fallback: poll file size/mtime when no event API is available."""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.last = self._stamp()
+
+    def _stamp(self):
+        stamp = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return stamp
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(WATCH_POLL)
+            stamp = self._stamp()
+            if stamp != self.last:
+                self.last = stamp
+                return True
+        return False
+
+
+def change_waiter(paths):
+    """Pick the cheapest way to sleep until one of paths changes."""
+    if hasattr(select, "kqueue"):
+        return KqueueWaiter([os.path.dirname(paths[0])] + paths)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter(paths)
+        except (OSError, AttributeError):
+            pass
+    return StatWaiter(paths)
+
+
+def fetch_new(conn, after_rowid, up_to_rowid, chat_ids=None, sender=None):
+    """Return (rowid, time, chat, sender, text) for after_rowid < ROWID <= up_to_rowid.
+
+    chat_ids (from ChatIndex.resolve) limits the rows to those chats.
+    """
+    sql = """
+        SELECT
+            m.ROWID,
+            m.date,
+            COALESCE(NULLIF(c.display_name, ''), c.chat_identifier, h.id, 'Unknown') AS chat,
+            CASE WHEN m.is_from_me = 1 THEN 'Me' ELSE COALESCE(h.id, 'Unknown') END AS sender,
+            REPLACE(m.text, CHAR(10), ' ') AS text
+        FROM message m
+        LEFT JOIN handle h ON m.handle_id = h.ROWID
+        LEFT JOIN chat_message_join cmj ON m.ROWID = cmj.message_id
+        LEFT JOIN chat c ON cmj.chat_id = c.ROWID
+        WHERE m.ROWID > ? AND m.ROWID <= ?
+          AND m.text IS NOT NULL AND m.text != ''
+    """
+    params = [after_rowid, up_to_rowid]
+    if chat_ids is not None:
+        sql += f" AND cmj.chat_id IN ({','.join('?' * len(chat_ids))})"
+        params += chat_ids
+    if sender:
+        if sender.lower() == "me":
+            sql += " AND m.is_from_me = 1"
+        else:
+            sql += " AND m.is_from_me = 0 AND h.id LIKE ?"
+            params.append(f"%{sender}%")
+    sql += " ORDER BY m.ROWID"
+    rows = conn.execute(sql, params).fetchall()
+    return [(rowid, from_apple_ns(date), chat_name, who, text)
+            for rowid, date, chat_name, who, text in rows]
+
+
+# watch --chat re-resolves the chat when this changes
+CHATS_CHANGED_SQL = "SELECT (SELECT MAX(ROWID) FROM chat), (SELECT COUNT(*) FROM chat_handle_join)"
+
+
+def cmd_watch(conn, chat=None, sender=None, since=None):
+    """Print new messages as they arrive, until interrupted."""
+    last_rowid = since
+    if last_rowid is None:
+        last_rowid = conn.execute("SELECT COALESCE(MAX(ROWID), 0) FROM message").fetchone()[0]
+    chat_ids = chats_seen = None
+    if chat:
+        chat_ids = ChatIndex(conn).resolve(chat)
+        if not chat_ids:
+            print(f"Chat not found: {chat}")
+            return
+        chats_seen = conn.execute(CHATS_CHANGED_SQL).fetchone()
+    waiter = change_waiter([DB_PATH, DB_PATH + "-wal"])
+    version = None
+
+    print(f"Watching for new messages (after #{last_rowid})... Ctrl-C to stop", file=sys.stderr)
+    while True:
+        # data_version only moves when another connection commits, so
+        # wakeups from unrelated writes (read receipts settle, WAL
+        # checkpoints) cost one PRAGMA and no query
+        current = conn.execute("PRAGMA data_version").fetchone()[0]
+        if current != version:
+            version = current
+            if chat:
+                state = conn.execute(CHATS_CHANGED_SQL).fetchone()
+                if state != chats_seen:
+                    # A chat was started or joined: it may match --chat better
+                    chats_seen = state
+                    chat_ids = ChatIndex(conn).resolve(chat)
+            # Bound the read by MAX(ROWID) taken first, so a message committed
+            # mid-read is picked up next time instead of skipped
+            newest = conn.execute("SELECT COALESCE(MAX(ROWID), 0) FROM message").fetchone()[0]
+            for _, when, chat_name, who, text in fetch_new(conn, last_rowid, newest, chat_ids, sender):
+                print(f"[{format_time(when)}] {chat_name} | {who}: {text}", flush=True)
+            # Filtered-out rows count as seen too
+            last_rowid = max(last_rowid, newest)
+        waiter.wait(WATCH_HEARTBEAT)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: messages_read.py <command> [args...]", file=sys.stderr)
+        print("Commands: search <query> [count], read <chat> [count], watch [--chat NAME] [--from HANDLE|me] [--since ROWID]",
+              file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    conn = get_connection()
+
+    try:
+        if cmd == "search":
+            if len(sys.argv) < 3:
+                print("Usage: messages_read.py search <query> [count]", file=sys.stderr)
+                sys.exit(1)
+            limit = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+            cmd_search(conn, sys.argv[2], limit)
+        elif cmd == "read":
+            if len(sys.argv) < 3:
+                print("Usage: macjuice messages read <chat> [count]", file=sys.stderr)
+                print("  <chat> can be a phone number, email, or group name", file=sys.stderr)
+                sys.exit(1)
+            limit = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+            cmd_read(conn, sys.argv[2], limit)
+        elif cmd == "watch":
+            opts = {"--chat": None, "--from": None, "--since": None}
+            args = sys.argv[2:]
+            while args:
+                arg = args.pop(0)
+                if arg in opts and args:
+                    opts[arg] = args.pop(0)
+                else:
+                    print("Usage: messages_read.py watch [--chat NAME] [--from HANDLE|me] "
+                          "[--since ROWID]", file=sys.stderr)
+                    sys.exit(1)
+            since = int(opts["--since"]) if opts["--since"] else None
+            try:
+                cmd_watch(conn, opts["--chat"], opts["--from"], since)
+            except KeyboardInterrupt:
+                pass
+        else:
+            print(f"Unknown command: {cmd}", file=sys.stderr)
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Message volume and reply-time stats from rollups kept beside chat.db.
+
+    messages_stats.py                              busiest chats
+    messages_stats.py --contacts                   busiest contacts
+    messages_stats.py <chat> [--by day|week|month] [--last N]
+
+chat.db is never rescanned for a report. Rollups live in a small SQLite
+file under the macjuice cache directory:
+
+    daily     per chat, per local day and direction: message count
+    contacts  the same per handle (the sender, or the 1:1 recipient)
+    chats     per chat: first/last message time and reply-tracking state
+    replies   per chat and direction: reply-time histogram (log2 seconds)
+
+Each run first folds in only the messages after the last processed ROWID,
+so keeping the rollups current costs time in proportion to what arrived
+since the previous run. Pass --rebuild to start over (e.g. after deleting
+conversations).
+
+REQUIREMENT: Full Disk Access for the terminal running this.
+"""
+
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import tracing
+from messages_read import APPLE_EPOCH, ChatIndex, DB_PATH, get_connection
+
+CACHE_DIR = os.path.expanduser(os.environ.get("MACJUICE_CACHE_DIR", "~/Library/Caches/macjuice"))
+STATS_PATH = os.path.join(CACHE_DIR, "messages_stats.sqlite")
+STATS_VERSION = "1"
+
+# A message answers the other side's last message only within this window
+REPLY_WINDOW = 24 * 3600
+FETCH_CHUNK = 5000
+
+TOP_CHATS = 20
+DEFAULT_PERIODS = {"day": 14, "week": 12, "month": 12}
+
+SCHEMA = """
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE daily (
+        chat_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        is_from_me INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (chat_id, day, is_from_me)
+    ) WITHOUT ROWID;
+    CREATE TABLE contacts (
+        handle_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        is_from_me INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (handle_id, day, is_from_me)
+    ) WITHOUT ROWID;
+    CREATE TABLE chats (
+        chat_id INTEGER PRIMARY KEY,
+        first_ts REAL NOT NULL,
+        last_ts REAL NOT NULL,
+        last_from_me INTEGER NOT NULL
+    );
+    CREATE TABLE replies (
+        chat_id INTEGER NOT NULL,
+        is_from_me INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        seconds REAL NOT NULL,
+        PRIMARY KEY (chat_id, is_from_me, bucket)
+    ) WITHOUT ROWID;
+"""
+
+
+def open_stats(rebuild=False):
+    """Open the rollup database, creating or resetting it as needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if rebuild and os.path.exists(STATS_PATH):
+        os.remove(STATS_PATH)
+    stats = sqlite3.connect(STATS_PATH, timeout=30)
+    try:
+        meta = dict(stats.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        meta = {}
+    # Rollups of another chat.db (e.g. a different HOME) are of no use here
+    current = meta.get("version") == STATS_VERSION and meta.get("source") == DB_PATH
+    if not current:
+        stats.close()
+        os.remove(STATS_PATH)
+        stats = sqlite3.connect(STATS_PATH, timeout=30)
+        stats.executescript(SCHEMA)
+        stats.executemany("INSERT INTO meta VALUES (?, ?)",
+                          [("version", STATS_VERSION), ("source", DB_PATH), ("last_rowid", "0")])
+        stats.commit()
+    return tracing.traced(stats)
+
+
+def message_filter(conn):
+    """Skip tapbacks and group events (renames, joins) where chat.db records them."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(message)")}
+    clauses = []
+    if "associated_message_type" in columns:
+        clauses.append("COALESCE(m.associated_message_type, 0) = 0")
+    if "item_type" in columns:
+        clauses.append("COALESCE(m.item_type, 0) = 0")
+    return "".join(f" AND {clause}" for clause in clauses)
+
+
+def reply_bucket(seconds):
+    return int(math.log2(seconds + 1))
+
+
+def update_rollups(conn, stats):
+    """Fold messages added since the last run into the rollups.
+
+    Runs in one IMMEDIATE transaction on the rollup database, so concurrent
+    runs queue up instead of counting the same messages twice, and a run
+    that dies midway leaves the previous state untouched.
+    """
+    stats.execute("BEGIN IMMEDIATE")
+    try:
+        last_rowid = int(stats.execute("SELECT value FROM meta WHERE key = 'last_rowid'").fetchone()[0])
+        # Bound the read by MAX(ROWID) taken first, like messages watch
+        newest = conn.execute("SELECT COALESCE(MAX(ROWID), 0) FROM message").fetchone()[0]
+        if newest < last_rowid:
+            # chat.db was replaced (restore, new Mac): the ROWIDs no longer line up
+            stats.rollback()
+            stats.close()
+            print("  (messages database changed, rebuilding stats...)", file=sys.stderr)
+            stats = open_stats(rebuild=True)
+            return update_rollups(conn, stats)
+        if newest == last_rowid:
+            stats.rollback()
+            return stats
+        if last_rowid == 0:
+            print("  (building message stats...)", file=sys.stderr)
+
+        daily, contacts, replies, days = {}, {}, {}, {}
+        chats = {chat_id: [first, last, from_me] for chat_id, first, last, from_me
+                 in stats.execute("SELECT chat_id, first_ts, last_ts, last_from_me FROM chats")}
+
+        with tracing.stage("rollup") as st:
+            cursor = conn.execute(f"""
+                SELECT
+                    cmj.chat_id,
+                    m.handle_id,
+                    m.is_from_me,
+                    CASE WHEN m.date > 100000000000 THEN m.date / 1000000000.0 ELSE m.date END
+                        + {APPLE_EPOCH} AS ts
+                FROM message m
+                JOIN chat_message_join cmj ON cmj.message_id = m.ROWID
+                WHERE m.ROWID > ? AND m.ROWID <= ? AND m.date > 0{message_filter(conn)}
+                ORDER BY m.ROWID
+            """, (last_rowid, newest))
+            while True:
+                rows = cursor.fetchmany(FETCH_CHUNK)
+                if not rows:
+                    break
+                st.rows += len(rows)
+                for chat_id, handle_id, from_me, ts in rows:
+                    from_me = 1 if from_me else 0
+                    # Local-time day, formatted once per quarter hour (UTC offsets
+                    # are whole quarter hours) rather than once per message
+                    slot = int(ts // 900)
+                    day = days.get(slot)
+                    if day is None:
+                        day = days[slot] = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+                    key = (chat_id, day, from_me)
+                    daily[key] = daily.get(key, 0) + 1
+                    if handle_id:
+                        key = (handle_id, day, from_me)
+                        contacts[key] = contacts.get(key, 0) + 1
+
+                    state = chats.get(chat_id)
+                    if state is None:
+                        chats[chat_id] = [ts, ts, from_me]
+                        continue
+                    # Messages arrive in ROWID order, which can lag message time for
+                    # synced history; only a forward step in time counts as a reply
+                    gap = ts - state[1]
+                    if state[2] != from_me and 0 <= gap <= REPLY_WINDOW:
+                        key = (chat_id, from_me, reply_bucket(gap))
+                        count, seconds = replies.get(key, (0, 0.0))
+                        replies[key] = (count + 1, seconds + gap)
+                    if ts < state[0]:
+                        state[0] = ts
+                    if ts >= state[1]:
+                        state[1] = ts
+                        state[2] = from_me
+
+        stats.executemany("""
+            INSERT INTO daily VALUES (?, ?, ?, ?)
+            ON CONFLICT (chat_id, day, is_from_me) DO UPDATE SET count = count + excluded.count
+        """, [(*key, count) for key, count in daily.items()])
+        stats.executemany("""
+            INSERT INTO contacts VALUES (?, ?, ?, ?)
+            ON CONFLICT (handle_id, day, is_from_me) DO UPDATE SET count = count + excluded.count
+        """, [(*key, count) for key, count in contacts.items()])
+        stats.executemany("""
+            INSERT INTO replies VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (chat_id, is_from_me, bucket) DO UPDATE SET
+                count = count + excluded.count, seconds = seconds + excluded.seconds
+        """, [(*key, count, seconds) for key, (count, seconds) in replies.items()])
+        stats.executemany("INSERT OR REPLACE INTO chats VALUES (?, ?, ?, ?)",
+                          [(chat_id, *state) for chat_id, state in chats.items()])
+        stats.execute("UPDATE meta SET value = ? WHERE key = 'last_rowid'", (str(newest),))
+        stats.commit()
+    except BaseException:
+        stats.rollback()
+        raise
+    return stats
+
+
+def reply_summary(stats, chat_ids, from_me):
+    """Return (replies, median seconds, mean seconds) or None when there are none.
+
+    The median is interpolated inside its log2 histogram bucket.
+    """
+    placeholders = ",".join("?" for _ in chat_ids)
+    rows = stats.execute(f"""
+        SELECT bucket, SUM(count), SUM(seconds) FROM replies
+        WHERE chat_id IN ({placeholders}) AND is_from_me = ?
+        GROUP BY bucket ORDER BY bucket
+    """, (*chat_ids, from_me)).fetchall()
+    total = sum(count for _, count, _ in rows)
+    if not total:
+        return None
+    seconds = sum(s for _, _, s in rows)
+    half, seen = total / 2, 0
+    for bucket, count, _ in rows:
+        if seen + count >= half:
+            low, high = 2 ** bucket - 1, 2 ** (bucket + 1) - 1
+            median = low + (high - low) * (half - seen) / count
+            break
+        seen += count
+    return total, median, seconds / total
+
+
+def format_duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+
+def format_replies(stats, chat_ids):
+    parts = []
+    for from_me, who in ((1, "you"), (0, "them")):
+        summary = reply_summary(stats, chat_ids, from_me)
+        if summary:
+            n, median, mean = summary
+            parts.append(f"{who} ~{format_duration(median)} (avg {format_duration(mean)}, {n})")
+    return "replies: " + ", ".join(parts) if parts else ""
+
+
+def format_day(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+def chat_names(conn):
+    return {chat_id: name for chat_id, name in conn.execute("""
+        SELECT ROWID, COALESCE(NULLIF(display_name, ''), chat_identifier, 'Unknown') FROM chat
+    """)}
+
+
+def cmd_top_chats(conn, stats):
+    rows = stats.execute("""
+        SELECT d.chat_id,
+               SUM(CASE WHEN d.is_from_me = 1 THEN d.count ELSE 0 END),
+               SUM(CASE WHEN d.is_from_me = 0 THEN d.count ELSE 0 END),
+               c.first_ts, c.last_ts
+        FROM daily d JOIN chats c ON c.chat_id = d.chat_id
+        GROUP BY d.chat_id
+        ORDER BY SUM(d.count) DESC
+        LIMIT ?
+    """, (TOP_CHATS,)).fetchall()
+    if not rows:
+        print("No messages found.")
+        return
+    names = chat_names(conn)
+    for chat_id, sent, received, first, last in rows:
+        print(f"{names.get(chat_id, f'chat #{chat_id}')} — {sent + received} msgs "
+              f"(sent {sent} / received {received}), {format_day(first)} to {format_day(last)}")
+        replies = format_replies(stats, [chat_id])
+        if replies:
+            print(f"    {replies}")
+
+
+def cmd_top_contacts(conn, stats):
+    rows = stats.execute("""
+        SELECT handle_id,
+               SUM(CASE WHEN is_from_me = 1 THEN count ELSE 0 END),
+               SUM(CASE WHEN is_from_me = 0 THEN count ELSE 0 END),
+               MIN(day), MAX(day)
+        FROM contacts
+        GROUP BY handle_id
+        ORDER BY SUM(count) DESC
+        LIMIT ?
+    """, (TOP_CHATS,)).fetchall()
+    if not rows:
+        print("No messages found.")
+        return
+    handles = dict(conn.execute("SELECT ROWID, id FROM handle"))
+    for handle_id, sent, received, first, last in rows:
+        print(f"{handles.get(handle_id, f'handle #{handle_id}')} — {sent + received} msgs "
+              f"(sent {sent} / received {received}), {first} to {last}")
+
+
+PERIOD_SQL = {
+    "day": "day",
+    "week": "strftime('%Y-W%W', day)",
+    "month": "substr(day, 1, 7)",
+}
+
+
+def cmd_chat(conn, stats, chat, by, last):
+    chat_ids = ChatIndex(conn).resolve(chat)
+    if not chat_ids:
+        print(f"Chat not found: {chat}")
+        return
+    placeholders = ",".join("?" for _ in chat_ids)
+    span = stats.execute(f"""
+        SELECT MIN(first_ts), MAX(last_ts) FROM chats WHERE chat_id IN ({placeholders})
+    """, chat_ids).fetchone()
+    if span[0] is None:
+        print(f"No messages in chat: {chat}")
+        return
+    rows = stats.execute(f"""
+        SELECT {PERIOD_SQL[by]} AS period,
+               SUM(CASE WHEN is_from_me = 1 THEN count ELSE 0 END),
+               SUM(CASE WHEN is_from_me = 0 THEN count ELSE 0 END)
+        FROM daily
+        WHERE chat_id IN ({placeholders})
+        GROUP BY period
+        ORDER BY period DESC
+        LIMIT ?
+    """, (*chat_ids, last)).fetchall()
+    total_sent, total_received = stats.execute(f"""
+        SELECT SUM(CASE WHEN is_from_me = 1 THEN count ELSE 0 END),
+               SUM(CASE WHEN is_from_me = 0 THEN count ELSE 0 END)
+        FROM daily WHERE chat_id IN ({placeholders})
+    """, chat_ids).fetchone()
+
+    names = chat_names(conn)
+    title = ", ".join(names.get(chat_id, f"chat #{chat_id}") for chat_id in chat_ids)
+    print(f"{title} — {total_sent + total_received} msgs (sent {total_sent} / received {total_received}), "
+          f"{format_day(span[0])} to {format_day(span[1])}")
+    replies = format_replies(stats, chat_ids)
+    if replies:
+        print(f"  {replies}")
+    for period, sent, received in reversed(rows):
+        print(f"  {period}  sent {sent:>5}  received {received:>5}")
+
+
+def usage():
+    print("Usage: messages_stats.py [--contacts] [--rebuild]", file=sys.stderr)
+    print("       messages_stats.py <chat> [--by day|week|month] [--last N] [--rebuild]", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    chat = None
+    by = "day"
+    last = None
+    contacts = rebuild = False
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--by" and args and args[0] in PERIOD_SQL:
+            by = args.pop(0)
+        elif arg == "--last" and args and args[0].isdigit():
+            last = int(args.pop(0))
+        elif arg == "--contacts":
+            contacts = True
+        elif arg == "--rebuild":
+            rebuild = True
+        elif not arg.startswith("--") and chat is None:
+            chat = arg
+        else:
+            usage()
+
+    conn = get_connection()
+    stats = open_stats(rebuild)
+    try:
+        stats = update_rollups(conn, stats)
+        if chat:
+            cmd_chat(conn, stats, chat, by, last or DEFAULT_PERIODS[by])
+        elif contacts:
+            cmd_top_contacts(conn, stats)
+        else:
+            cmd_top_chats(conn, stats)
+    finally:
+        stats.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""Search the Music library from an indexed snapshot of its XML export.
+
+    music_read.py search <query> [--limit N] [--rebuild]
+
+Queries combine free words with field filters; quote values with spaces:
+
+    music_read.py search 'artist:"pink floyd" year:1973'
+    music_read.py search 'album:abbey year:1965-1970 genre:rock'
+    music_read.py search 'playlist:running dance'
+
+Fields: artist, album, year (1973 or 1970-1979), genre, name, playlist.
+Free words must each appear in the track name, artist or album.
+
+Music writes its library as XML when "Share Library XML with other
+applications" is on (Settings > Advanced), or via File > Library > Export
+Library. The XML is parsed with iterparse, one track or playlist at a
+time, into a small SQLite file under the macjuice cache directory with
+artist, album and genre tables, indexes on the filter columns and a
+trigram full-text index for free words and name: filters. The snapshot is
+rebuilt automatically when the XML changes. Without an XML file, search
+falls back to asking Music.app over AppleScript and keeps the output in
+the result cache next to the other AppleScript reads.
+"""
+
+import os
+import shlex
+import sqlite3
+import subprocess
+import sys
+import time
+import zlib
+import xml.etree.ElementTree as ET
+
+import tracing
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.expanduser(os.environ.get("MACJUICE_CACHE_DIR", "~/Library/Caches/macjuice"))
+INDEX_PATH = os.path.join(CACHE_DIR, "music_library.sqlite")
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+INDEX_VERSION = "3"
+
+LIBRARY_PATHS = [
+    "~/Music/Music/Library.xml",
+    "~/Music/iTunes/iTunes Music Library.xml",
+    "~/Music/iTunes/iTunes Library.xml",
+]
+
+FIELDS = {"artist", "album", "year", "genre", "name", "playlist"}
+MAX_RESULTS = 20
+# Trigram full-text search can't look up anything shorter
+MIN_FTS_LENGTH = 3
+
+
+def library_path():
+    """Return the library XML to index, or None if there isn't one."""
+    override = os.environ.get("MACJUICE_MUSIC_LIBRARY")
+    if override:
+        return os.path.expanduser(override)
+    for path in LIBRARY_PATHS:
+        path = os.path.expanduser(path)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return f"v{INDEX_VERSION}|{path}|{st.st_mtime_ns}:{st.st_size}"
+
+
+def fold(text):
+    return (text or "").strip().casefold()
+
+
+# --- XML parsing ---
+
+def plist_value(elem):
+    """Convert a complete plist element to the matching Python value."""
+    tag = elem.tag
+    if tag == "integer":
+        return int(elem.text or 0)
+    if tag == "real":
+        return float(elem.text or 0)
+    if tag in ("string", "date"):
+        return elem.text or ""
+    if tag == "true":
+        return True
+    if tag == "false":
+        return False
+    if tag == "dict":
+        children = list(elem)
+        return {children[i].text: plist_value(children[i + 1]) for i in range(0, len(children) - 1, 2)}
+    if tag == "array":
+        return [plist_value(child) for child in elem]
+    return None  # <data>: artwork and other blobs aren't needed
+
+
+def iter_library(path):
+    """Yield ("Tracks", track) and ("Playlists", playlist) dicts one at a time.
+
+    Layout: <plist><dict> ... <key>Tracks</key><dict> <key>id</key><dict>track</dict> ...
+    </dict> <key>Playlists</key><array> <dict>playlist</dict> ... </array> ...
+    Each track or playlist is converted as soon as it closes and then
+    dropped from the tree, so memory stays flat however big the library is.
+    """
+    depth = 0
+    last_key = None
+    section = container = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 3 and elem.tag in ("dict", "array") and last_key in ("Tracks", "Playlists"):
+                section, container = last_key, elem
+            continue
+        if depth == 3:
+            if elem.tag == "key":
+                last_key = elem.text
+            elif elem is container:
+                elem.clear()
+                section = container = None
+        elif depth == 4 and section and elem.tag == "dict":
+            yield section, plist_value(elem)
+            container.clear()
+        depth -= 1
+
+
+# --- Snapshot ---
+
+SCHEMA = """
+    PRAGMA journal_mode = OFF;
+    PRAGMA synchronous = OFF;
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE artists (id INTEGER PRIMARY KEY, name TEXT NOT NULL, key TEXT NOT NULL);
+    CREATE TABLE genres (id INTEGER PRIMARY KEY, name TEXT NOT NULL, key TEXT NOT NULL);
+    CREATE TABLE albums (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        key TEXT NOT NULL,
+        artist_id INTEGER,
+        year INTEGER
+    );
+    CREATE TABLE tracks (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL,
+        artist_id INTEGER,
+        album_id INTEGER,
+        genre_id INTEGER,
+        year INTEGER,
+        disc INTEGER,
+        number INTEGER,
+        duration_ms INTEGER,
+        plays INTEGER,
+        added TEXT,
+        search TEXT NOT NULL
+    );
+    CREATE TABLE playlists (id INTEGER PRIMARY KEY, name TEXT NOT NULL, key TEXT NOT NULL);
+    CREATE TABLE playlist_tracks (
+        playlist_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        track_id INTEGER NOT NULL,
+        PRIMARY KEY (playlist_id, position)
+    ) WITHOUT ROWID;
+"""
+
+
+class Interner:
+    """Assign small integer ids to names as they are first seen."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def get(self, *key):
+        if key not in self.ids:
+            self.ids[key] = len(self.ids) + 1
+        return self.ids[key]
+
+
+def build_index(path, stamp):
+    """Parse the library XML into a fresh snapshot, then swap it in."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{INDEX_PATH}.{os.getpid()}.tmp"
+    artists, albums, genres = Interner(), Interner(), Interner()
+    artist_rows, album_rows, genre_rows = {}, {}, {}
+    tracks, playlists, playlist_tracks = [], [], []
+
+    with tracing.stage("parse") as st:
+        for section, item in iter_library(path):
+            st.rows += 1
+            if section == "Tracks":
+                artist = (item.get("Artist") or "").strip()
+                album_artist = (item.get("Album Artist") or "").strip() or artist
+                album = (item.get("Album") or "").strip()
+                artist_id = artists.get(fold(artist)) if artist else None
+                album_artist_id = artists.get(fold(album_artist)) if album_artist else None
+                for name, aid in ((artist, artist_id), (album_artist, album_artist_id)):
+                    if aid:
+                        artist_rows.setdefault(aid, (aid, name, fold(name)))
+                album_id = None
+                if album:
+                    # The same album title by different artists is a different album
+                    album_id = albums.get(fold(album), album_artist_id)
+                    album_rows.setdefault(album_id, (album_id, album, fold(album), album_artist_id, item.get("Year")))
+                name = item.get("Name") or ""
+                genre = (item.get("Genre") or "").strip()
+                genre_id = genres.get(fold(genre)) if genre else None
+                if genre_id:
+                    genre_rows.setdefault(genre_id, (genre_id, genre, fold(genre)))
+                tracks.append((
+                    item["Track ID"], name, fold(name), artist_id, album_id, genre_id,
+                    item.get("Year"), item.get("Disc Number"), item.get("Track Number"),
+                    item.get("Total Time"), item.get("Play Count", 0), item.get("Date Added"),
+                    "\n".join(fold(part) for part in dict.fromkeys((name, artist, album_artist, album))),
+                ))
+            elif not item.get("Master") and item.get("Visible", True):
+                # The master playlist is the whole library again
+                playlist_id = item.get("Playlist ID")
+                if playlist_id is None:
+                    continue
+                playlists.append((playlist_id, item.get("Name") or "", fold(item.get("Name"))))
+                for position, entry in enumerate(item.get("Playlist Items") or []):
+                    playlist_tracks.append((playlist_id, position, entry.get("Track ID")))
+
+    with tracing.stage("index") as st:
+        index = sqlite3.connect(tmp_path)
+        try:
+            index.executescript(SCHEMA)
+            index.executemany("INSERT INTO artists VALUES (?, ?, ?)", artist_rows.values())
+            index.executemany("INSERT INTO albums VALUES (?, ?, ?, ?, ?)", album_rows.values())
+            index.executemany("INSERT INTO genres VALUES (?, ?, ?)", genre_rows.values())
+            index.executemany("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              tracks)
+            index.executemany("INSERT OR REPLACE INTO playlists VALUES (?, ?, ?)", playlists)
+            index.executemany("INSERT OR REPLACE INTO playlist_tracks VALUES (?, ?, ?)", playlist_tracks)
+            # Build the indexes after the bulk load — much faster than maintaining them per row
+            index.executescript("""
+                CREATE INDEX tracks_artist ON tracks (artist_id);
+                CREATE INDEX tracks_album ON tracks (album_id);
+                CREATE INDEX tracks_year ON tracks (year);
+                CREATE INDEX tracks_genre ON tracks (genre_id);
+                CREATE INDEX albums_artist ON albums (artist_id);
+            """)
+            build_fts(index)
+            index.execute("INSERT INTO meta VALUES ('source', ?)", (stamp,))
+            st.rows += len(tracks)
+            index.commit()
+        finally:
+            index.close()
+        os.replace(tmp_path, INDEX_PATH)
+
+
+def build_fts(index):
+    """Add a trigram index over track names and search text, if SQLite has one.
+
+    Contentless: it only answers which track ids contain a substring, the
+    text itself stays in tracks. Without FTS5 or its trigram tokenizer
+    (SQLite before 3.34) search scans tracks instead.
+    """
+    try:
+        index.execute("""CREATE VIRTUAL TABLE tracks_fts USING fts5(
+            name, search, content='', tokenize='trigram')""")
+    except sqlite3.OperationalError:
+        return
+    index.execute("INSERT INTO tracks_fts (rowid, name, search) SELECT id, name_key, search FROM tracks")
+
+
+def has_fts(index):
+    return index.execute("SELECT 1 FROM sqlite_master WHERE name = 'tracks_fts'").fetchone() is not None
+
+
+def index_is_current(stamp):
+    try:
+        index = sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return False
+    try:
+        row = index.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return row is not None and row[0] == stamp
+    except sqlite3.Error:
+        return False
+    finally:
+        index.close()
+
+
+def open_index(path, rebuild=False):
+    stamp = source_stamp(path)
+    if rebuild or not index_is_current(stamp):
+        print("  (indexing Music library...)", file=sys.stderr)
+        build_index(path, stamp)
+    return tracing.traced(sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True))
+
+
+# --- Queries ---
+
+def parse_query(query):
+    """Split a query into ([(field, value)], [free words])."""
+    try:
+        tokens = shlex.split(query)
+    except ValueError:
+        # Unbalanced quote: take the words as they are
+        tokens = query.split()
+    filters, words = [], []
+    for token in tokens:
+        field, sep, value = token.partition(":")
+        if sep and fold(field) in FIELDS and value.strip():
+            filters.append((fold(field), value.strip()))
+        elif token.strip():
+            words.append(fold(token))
+    return filters, words
+
+
+def year_range(value):
+    """'1973' -> (1973, 1973); '1970-1979' or '1970..1979' -> (1970, 1979)."""
+    low, _, high = value.replace("..", "-").partition("-")
+    try:
+        low = int(low)
+        high = int(high) if high else low
+    except ValueError:
+        return None
+    return min(low, high), max(low, high)
+
+
+def find_tracks(index, query, limit=MAX_RESULTS):
+    """Return (name, artist, album, year) for tracks matching query."""
+    filters, words = parse_query(query)
+    clauses, params = [], []
+    # Substrings the trigram index can narrow down first; each is still
+    # checked with instr below, so FTS folding never changes the matches
+    matches = []
+    fts = has_fts(index)
+
+    def substring(column, fts_column, key):
+        clauses.append(f"instr(t.{column}, ?)")
+        params.append(key)
+        if fts and len(key) >= MIN_FTS_LENGTH:
+            matches.append(f'{fts_column} : "{key.replace(chr(34), chr(34) * 2)}"')
+
+    for field, value in filters:
+        key = fold(value)
+        if field == "artist":
+            # Matches the track artist or, on compilations, the album artist
+            clauses.append("""(t.artist_id IN (SELECT id FROM artists WHERE instr(key, ?))
+                OR t.album_id IN (SELECT al2.id FROM albums al2
+                                  JOIN artists ar2 ON ar2.id = al2.artist_id
+                                  WHERE instr(ar2.key, ?)))""")
+            params += [key, key]
+        elif field == "album":
+            clauses.append("t.album_id IN (SELECT id FROM albums WHERE instr(key, ?))")
+            params.append(key)
+        elif field == "year":
+            years = year_range(value)
+            if years is None:
+                return []
+            clauses.append("t.year BETWEEN ? AND ?")
+            params += list(years)
+        elif field == "genre":
+            clauses.append("t.genre_id IN (SELECT id FROM genres WHERE instr(key, ?))")
+            params.append(key)
+        elif field == "name":
+            substring("name_key", "name", key)
+        elif field == "playlist":
+            clauses.append("""t.id IN (SELECT pt.track_id FROM playlist_tracks pt
+                JOIN playlists p ON p.id = pt.playlist_id WHERE instr(p.key, ?))""")
+            params.append(key)
+    for word in words:
+        substring("search", "search", word)
+    if not clauses:
+        return []
+    if matches:
+        clauses.insert(0, "t.id IN (SELECT rowid FROM tracks_fts WHERE tracks_fts MATCH ?)")
+        params.insert(0, " AND ".join(matches))
+
+    sql = f"""
+        SELECT t.name, ar.name, al.name, t.year
+        FROM tracks t
+        LEFT JOIN artists ar ON ar.id = t.artist_id
+        LEFT JOIN albums al ON al.id = t.album_id
+        WHERE {" AND ".join(clauses)}
+        ORDER BY ar.key, al.year, al.key, t.disc, t.number, t.name
+        LIMIT ?
+    """
+    return index.execute(sql, params + [limit]).fetchall()
+
+
+def result_entry(args):
+    """Result cache entry for an AppleScript call, laid out like the bash
+    cached_applescript: <app>-<checksum>.key holds the full key (and its
+    mtime the store time), .out the output. Write commands to Music drop
+    every music-* entry, and the LRU eviction covers these files too.
+    """
+    key = " ".join(shlex.quote(a) for a in args)
+    return key, os.path.join(RESULT_CACHE_DIR, f"{args[0]}-py-{zlib.crc32(key.encode()):08x}")
+
+
+def cache_read(args):
+    ttl = int(os.environ.get("MACJUICE_CACHE_TTL", "300"))
+    if ttl <= 0 or os.environ.get("MACJUICE_NO_CACHE"):
+        return None
+    key, entry = result_entry(args)
+    try:
+        with open(entry + ".key", encoding="utf-8") as f:
+            if f.read().rstrip("\n") != key or time.time() - os.path.getmtime(entry + ".key") >= ttl:
+                return None
+        with open(entry + ".out", encoding="utf-8") as f:
+            output = f.read()
+        os.utime(entry + ".out")  # recently used
+        return output
+    except OSError:
+        return None
+
+
+def cache_write(args, output):
+    if int(os.environ.get("MACJUICE_CACHE_TTL", "300")) <= 0:
+        return
+    key, entry = result_entry(args)
+    try:
+        os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(output)
+        with open(entry + ".key", "w", encoding="utf-8") as f:
+            f.write(key + "\n")
+        os.replace(tmp, entry + ".out")
+        cache_evict()
+    except OSError:
+        pass  # a cache that can't be written just means running AppleScript next time
+
+
+def cache_evict():
+    limit = int(os.environ.get("MACJUICE_CACHE_MAX", "100"))
+    outs = [os.path.join(RESULT_CACHE_DIR, n) for n in os.listdir(RESULT_CACHE_DIR) if n.endswith(".out")]
+    outs.sort(key=os.path.getmtime, reverse=True)
+    for stale in outs[limit:]:
+        base = stale[:-len(".out")]
+        for path in (stale, base + ".key"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def search_applescript(query):
+    """No library XML: hand the search to music.applescript, through the
+    same result cache as the other AppleScript reads."""
+    args = ["music", "search", query]
+    output = cache_read(args)
+    if output is not None:
+        sys.stdout.write(output)
+        return
+    print("  (no Music library XML found; searching via Music.app — see music_read.py --help)",
+          file=sys.stderr)
+    script = os.path.join(SCRIPTS_DIR, "music.applescript")
+    try:
+        result = subprocess.run(["osascript", script, "search", query], stdout=subprocess.PIPE, text=True)
+    except OSError as e:
+        print(f"Error: can't run osascript: {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(result.stdout)
+    # Failures and usage errors are printed, not cached
+    if result.returncode != 0:
+        sys.exit(result.returncode)
+    if not any(line.lower().startswith(("error:", "usage:")) for line in result.stdout.splitlines()):
+        cache_write(args, result.stdout)
+
+
+@tracing.timed("format")
+def print_tracks(rows):
+    for name, artist, album, _ in rows:
+        print(f"{name} - {artist or ''} [{album or ''}]")
+
+
+def cmd_search(query, shown, limit, rebuild):
+    path = library_path()
+    if path is None or not os.path.exists(path):
+        search_applescript(shown)
+        return
+    index = open_index(path, rebuild)
+    try:
+        rows = find_tracks(index, query, limit)
+    finally:
+        index.close()
+    if not rows:
+        print(f"No tracks found matching: {shown}")
+        return
+    print_tracks(rows)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ("--help", "-h") or args[0] != "search":
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(0 if args and args[0] in ("--help", "-h") else 1)
+
+    limit = MAX_RESULTS
+    rebuild = False
+    words = []
+    args = args[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--limit" and args:
+            limit = int(args.pop(0))
+        elif arg == "--rebuild":
+            rebuild = True
+        else:
+            words.append(arg)
+    if not words:
+        print("Usage: music_read.py search <query> [--limit N] [--rebuild]", file=sys.stderr)
+        sys.exit(1)
+    # Several arguments arrive already split by the shell: keep each one a
+    # single token ("artist:Pink Floyd"); one argument is split on spaces
+    query = words[0] if len(words) == 1 else " ".join(shlex.quote(w) for w in words)
+    cmd_search(query, " ".join(words), limit, rebuild)
+
+
+if __name__ == "__main__":
+    main()
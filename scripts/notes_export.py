@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Export Apple Notes to Markdown or plain-text files, one per note, by folder.
+
+    notes_export.py <dir> [--format md|txt]
+
+NoteStore.sqlite is read once: note metadata first, then bodies only for
+notes that changed. Bodies are decompressed and decoded on a process pool.
+A manifest in <dir> records each note's ZMODIFICATIONDATE1 and file, so a
+re-run rewrites only notes edited, renamed or moved since the last export,
+and removes files of notes that were deleted.
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import tracing
+from notes_read import APPLE_EPOCH, apple_date, extract_plaintext, get_db
+
+MANIFEST_NAME = ".macjuice-notes.json"
+
+# Below this many changed notes, decoding inline beats starting a pool
+POOL_MIN_NOTES = 200
+BODY_BATCH = 500
+MAX_NAME = 120
+NO_FOLDER = "Notes"
+
+
+def safe_name(name, fallback):
+    """Make a note or folder title usable as a single path component."""
+    name = re.sub(r'[\x00-\x1f/\\:*?"<>|]+', "-", name or "").strip(" .-")
+    return name[:MAX_NAME].rstrip(" .") or fallback
+
+
+def entity_ids(db, name):
+    return [row[0] for row in db.execute("SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = ?", (name,))]
+
+
+def load_notes(db):
+    """Return [(pk, title, folder, created, modified)] for live notes, no bodies."""
+    columns = {row[1] for row in db.execute("PRAGMA table_info(ZICCLOUDSYNCINGOBJECT)")}
+    # Locked notes are encrypted; there is nothing readable to export
+    locked = ("AND COALESCE(n.ZISPASSWORDPROTECTED, 0) != 1"
+              if "ZISPASSWORDPROTECTED" in columns else "")
+    return db.execute(f"""
+        SELECT n.Z_PK, n.ZTITLE1, f.ZTITLE2, n.ZCREATIONDATE1, n.ZMODIFICATIONDATE1
+        FROM ZICCLOUDSYNCINGOBJECT n
+        LEFT JOIN ZICCLOUDSYNCINGOBJECT f ON f.Z_PK = n.ZFOLDER
+        WHERE n.ZTITLE1 IS NOT NULL AND n.ZTITLE1 != ''
+          AND n.ZNOTEDATA IS NOT NULL
+          AND COALESCE(n.ZMARKEDFORDELETION, 0) != 1
+          {locked}
+        ORDER BY n.Z_PK
+    """).fetchall()
+
+
+def load_attachments(db, pks):
+    """Return {note pk: [(filename, type), ...]} for the given notes."""
+    ents = entity_ids(db, "ICAttachment")
+    if not ents or not pks:
+        return {}
+    found = {}
+    for start in range(0, len(pks), BODY_BATCH):
+        batch = pks[start:start + BODY_BATCH]
+        rows = db.execute(f"""
+            SELECT a.ZNOTE, COALESCE(a.ZFILENAME, m.ZFILENAME), a.ZTYPEUTI
+            FROM ZICCLOUDSYNCINGOBJECT a
+            LEFT JOIN ZICCLOUDSYNCINGOBJECT m ON m.Z_PK = a.ZMEDIA
+            WHERE a.Z_ENT IN ({",".join("?" for _ in ents)})
+              AND a.ZNOTE IN ({",".join("?" for _ in batch)})
+              AND COALESCE(a.ZMARKEDFORDELETION, 0) != 1
+            ORDER BY a.ZNOTE, a.Z_PK
+        """, [*ents, *batch]).fetchall()
+        for note, filename, uti in rows:
+            found.setdefault(note, []).append((filename, uti))
+    return found
+
+
+def body_batches(db, pks):
+    """Yield lists of (pk, ZDATA) for the given notes, BODY_BATCH at a time."""
+    for start in range(0, len(pks), BODY_BATCH):
+        batch = pks[start:start + BODY_BATCH]
+        yield db.execute(f"""
+            SELECT n.Z_PK, nb.ZDATA
+            FROM ZICCLOUDSYNCINGOBJECT n
+            JOIN ZICNOTEDATA nb ON nb.Z_PK = n.ZNOTEDATA
+            WHERE n.Z_PK IN ({",".join("?" for _ in batch)})
+        """, batch).fetchall()
+
+
+def decode_body(blob):
+    """Pool worker: gunzip and decode one note body."""
+    return extract_plaintext(blob)
+
+
+def decode_batches(db, pks):
+    """Yield (pk, plaintext) for the given notes.
+
+    Large exports decode on a process pool, one batch ahead: the next batch
+    is submitted before the current one is handed back for writing, so at
+    most two batches of compressed bodies are held at a time.
+    """
+    if len(pks) < POOL_MIN_NOTES:
+        for batch in body_batches(db, pks):
+            for pk, blob in batch:
+                yield pk, extract_plaintext(blob)
+        return
+    with ProcessPoolExecutor() as pool:
+        pending = None
+        for batch in body_batches(db, pks):
+            submitted = ([pk for pk, _ in batch],
+                         pool.map(decode_body, [blob for _, blob in batch], chunksize=16))
+            if pending:
+                yield from zip(*pending)
+            pending = submitted
+        if pending:
+            yield from zip(*pending)
+
+
+def render(fmt, title, created, modified, body, attachments):
+    lines = body.splitlines()
+    # The decoded body normally repeats the title as its first line
+    if lines and lines[0].strip() == title.strip():
+        lines = lines[1:]
+    body = "\n".join(lines).strip()
+
+    if fmt == "md":
+        out = [f"# {title}", "", f"Created: {apple_date(created)} | Modified: {apple_date(modified)}", ""]
+        if body:
+            out += [body, ""]
+        if attachments:
+            out += ["## Attachments", ""]
+            out += [f"- {name or '(unnamed)'} ({uti or 'unknown type'})" for name, uti in attachments]
+            out.append("")
+    else:
+        out = [f"Title: {title}", f"Modified: {apple_date(modified)}", f"Created: {apple_date(created)}", ""]
+        if body:
+            out += [body, ""]
+        if attachments:
+            out.append("Attachments:")
+            out += [f"  {name or '(unnamed)'} ({uti or 'unknown type'})" for name, uti in attachments]
+            out.append("")
+    return "\n".join(out)
+
+
+def plan_paths(notes, fmt):
+    """Map note pk -> relative output path, keeping names unique per folder."""
+    taken = set()
+    paths = {}
+    for pk, title, folder, _, _ in notes:
+        folder_dir = safe_name(folder, NO_FOLDER)
+        base = safe_name(title, f"Note {pk}")
+        rel = os.path.join(folder_dir, f"{base}.{fmt}")
+        if rel.lower() in taken:
+            rel = os.path.join(folder_dir, f"{base} ({pk}).{fmt}")
+        taken.add(rel.lower())
+        paths[pk] = rel
+    return paths
+
+
+def load_manifest(dest):
+    try:
+        with open(os.path.join(dest, MANIFEST_NAME)) as f:
+            return {int(pk): entry for pk, entry in json.load(f).items()}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(dest, manifest):
+    path = os.path.join(dest, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({str(pk): entry for pk, entry in sorted(manifest.items())}, f, indent=0)
+    os.replace(tmp_path, path)
+
+
+def write_note(dest, rel, text, modified):
+    path = os.path.join(dest, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    if modified is not None:
+        ts = modified + APPLE_EPOCH
+        os.utime(tmp_path, (ts, ts))
+    os.replace(tmp_path, path)
+
+
+def remove_file(dest, rel):
+    path = os.path.join(dest, rel)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    # Drop the folder too once its last note is gone
+    try:
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
+
+
+def export_notes(dest, fmt):
+    os.makedirs(dest, exist_ok=True)
+    db = get_db()
+    try:
+        notes = load_notes(db)
+        paths = plan_paths(notes, fmt)
+        old = load_manifest(dest)
+        manifest = {}
+        changed = []
+        for pk, title, folder, created, modified in notes:
+            entry = old.get(pk)
+            if (entry and entry["modified"] == modified and entry["file"] == paths[pk]
+                    and os.path.exists(os.path.join(dest, paths[pk]))):
+                manifest[pk] = entry
+            else:
+                changed.append((pk, title, created, modified))
+
+        # Notes that were deleted, renamed or moved leave their old file behind
+        removed = 0
+        for pk, entry in old.items():
+            if pk not in manifest and entry["file"] != paths.get(pk):
+                remove_file(dest, entry["file"])
+                removed += pk not in paths
+
+        if changed:
+            meta = {pk: (title, created, modified) for pk, title, created, modified in changed}
+            pks = list(meta)
+            attachments = load_attachments(db, pks)
+            with tracing.stage("export") as st:
+                for pk, body in decode_batches(db, pks):
+                    title, created, modified = meta[pk]
+                    text = render(fmt, title, created, modified, body, attachments.get(pk, []))
+                    write_note(dest, paths[pk], text, modified)
+                    manifest[pk] = {"modified": modified, "file": paths[pk]}
+                    st.rows += 1
+                    st.bytes += len(text)
+        save_manifest(dest, manifest)
+    finally:
+        db.close()
+
+    print(f"OK: Exported {len(changed)} note(s) to {dest}")
+    if len(notes) - len(changed) or removed:
+        print(f"  {len(notes) - len(changed)} unchanged, {removed} removed")
+
+
+def main():
+    fmt = "md"
+    dest = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--format" and args and args[0] in ("md", "txt"):
+            fmt = args.pop(0)
+        elif not arg.startswith("--") and dest is None:
+            dest = os.path.abspath(os.path.expanduser(arg))
+        else:
+            dest = None
+            break
+    if not dest:
+        print("Usage: notes_export.py <destination-folder> [--format md|txt]", file=sys.stderr)
+        sys.exit(1)
+    export_notes(dest, fmt)
+
+
+if __name__ == "__main__":
+    main()
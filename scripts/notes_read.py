@@ -2,11 +2,10 @@
 """Fast Apple Notes reader via SQLite — bypasses AppleScript hangs."""
 
 import sqlite3
-import gzip
 import os
 import sys
-import re
-from datetime import datetime, timezone
+
+import tracing
 
 NOTES_DB = os.path.expanduser(
     "~/Library/Group Containers/group.com.apple.notes/NoteStore.sqlite"
@@ -20,13 +19,20 @@ def get_db():
     if not os.path.exists(NOTES_DB):
         print("Error: Notes database not found", file=sys.stderr)
         sys.exit(1)
-    return sqlite3.connect(NOTES_DB)
+    with tracing.stage("connect"):
+        conn = sqlite3.connect(NOTES_DB)
+    return tracing.traced(conn)
 
 
+@tracing.timed("decode")
 def extract_plaintext(data_blob):
     """Extract readable text from a Notes protobuf/gzip blob."""
     if not data_blob:
         return ""
+    # Imported here so list/folders never pay for the decoders
+    import gzip
+    import re
+
     try:
         data = gzip.decompress(data_blob)
     except Exception:
@@ -75,6 +81,8 @@ def extract_plaintext(data_blob):
 
 def apple_date(ts):
     """Convert Apple Core Data timestamp to readable string."""
+    from datetime import datetime, timezone
+
     if ts is None:
         return "unknown"
     dt = datetime.fromtimestamp(ts + APPLE_EPOCH, tz=timezone.utc)
@@ -177,15 +185,19 @@ def read_note(title):
     db.close()
 
 
-def search_notes(query, limit=20):
-    db = get_db()
+def find_notes(db, query, limit=20):
+    """Return (title, modified, modified_ts) rows matching query.
+
+    Titles are matched in SQL first; only when nothing matches are note
+    bodies decompressed and scanned.
+    """
     cur = db.cursor()
 
     # First search titles
     cur.execute(
         """
         SELECT n.ZTITLE1, datetime(n.ZMODIFICATIONDATE1 + ?, 'unixepoch') as modified,
-               n.ZNOTEDATA
+               n.ZMODIFICATIONDATE1
         FROM ZICCLOUDSYNCINGOBJECT n
         WHERE n.ZTITLE1 IS NOT NULL AND n.ZTITLE1 != ''
           AND n.ZTITLE1 LIKE ?
@@ -201,7 +213,7 @@ def search_notes(query, limit=20):
         cur.execute(
             """
             SELECT n.ZTITLE1, datetime(n.ZMODIFICATIONDATE1 + ?, 'unixepoch') as modified,
-                   nb.ZDATA
+                   n.ZMODIFICATIONDATE1, nb.ZDATA
             FROM ZICCLOUDSYNCINGOBJECT n
             JOIN ZICNOTEDATA nb ON nb.Z_PK = n.ZNOTEDATA
             WHERE n.ZTITLE1 IS NOT NULL AND n.ZTITLE1 != ''
@@ -210,12 +222,19 @@ def search_notes(query, limit=20):
             (APPLE_EPOCH,),
         )
         for row in cur.fetchall():
-            plaintext = extract_plaintext(row[2])
+            plaintext = extract_plaintext(row[3])
             if query.lower() in plaintext.lower():
-                results.append(row)
+                results.append(row[:3])
                 if len(results) >= limit:
                     break
 
+    return results
+
+
+def search_notes(query, limit=20):
+    db = get_db()
+    results = find_notes(db, query, limit)
+
     if not results:
         print(f"No notes found matching: {query}")
     else:
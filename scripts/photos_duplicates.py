@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Find duplicate and near-duplicate photos by perceptual hash.
+
+    photos_duplicates.py [--threshold N] [--export <dir>]
+
+Each photo gets a 64-bit DCT perceptual hash (pHash), computed from the
+small JPEG derivatives Photos keeps inside the library rather than the
+originals. Hashes are cached in a sidecar SQLite file keyed by ZUUID and
+only recomputed when the derivative changes.
+
+Candidate pairs come from multi-index hashing: the 64 bits are split into
+threshold + 1 chunks, so any two hashes within the threshold agree exactly
+on at least one chunk. Only hashes sharing a chunk value are compared, with
+NumPy doing the XOR/popcount for whole buckets at a time.
+
+--export sends every photo except the first-imported one of each group to
+photos_export.export_by_uuid.
+
+Requires numpy and Pillow: pip3 install numpy pillow
+"""
+
+import os
+import sqlite3
+import sys
+
+import tracing
+from photos_search import LIBRARY_PATH, apple_ts_to_str, get_connection
+
+CACHE_DIR = os.path.expanduser(os.environ.get("MACJUICE_CACHE_DIR", "~/Library/Caches/macjuice"))
+HASH_DB_PATH = os.path.join(CACHE_DIR, "photos_phash.sqlite")
+
+DERIVATIVES_DIR = os.path.join(LIBRARY_PATH, "resources", "derivatives")
+ORIGINALS_DIR = os.path.join(LIBRARY_PATH, "originals")
+IMAGE_EXTS = (".jpeg", ".jpg", ".png")
+
+HASH_SIZE = 8       # 8x8 low-frequency DCT coefficients -> 64 bits
+DCT_SIZE = 32       # images are reduced to 32x32 before the DCT
+HASH_BATCH = 2048   # images decoded and hashed per batch
+DEFAULT_THRESHOLD = 6
+MAX_THRESHOLD = 16
+
+# Buckets up to this size are paired with vectorized sorted-neighbour
+# comparisons; bigger ones (e.g. hundreds of blank frames) are compared
+# block-wise on their own, BLOCK_CELLS distances at a time
+SMALL_BUCKET = 64
+BLOCK_CELLS = 4_000_000
+
+
+def require_imaging():
+    try:
+        import numpy  # noqa: F401
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        print("Error: photos duplicates needs numpy and Pillow", file=sys.stderr)
+        print("Install them with: pip3 install numpy pillow", file=sys.stderr)
+        sys.exit(1)
+
+
+# --- Hashing ----------------------------------------------------------------
+
+def find_derivatives():
+    """Map asset UUID -> smallest local derivative image path.
+
+    Derivatives are named <UUID>_<variant>.jpeg under
+    resources/derivatives/<X>/ and resources/derivatives/masters/<X>/.
+    """
+    best = {}
+    roots = [DERIVATIVES_DIR, os.path.join(DERIVATIVES_DIR, "masters")]
+    for root in roots:
+        try:
+            subdirs = [e.path for e in os.scandir(root) if e.is_dir() and e.name != "masters"]
+        except FileNotFoundError:
+            continue
+        for subdir in subdirs:
+            for entry in os.scandir(subdir):
+                if not entry.name.lower().endswith(IMAGE_EXTS):
+                    continue
+                uuid = entry.name.split("_", 1)[0].split(".", 1)[0]
+                size = entry.stat().st_size
+                if uuid not in best or size < best[uuid][1]:
+                    best[uuid] = (entry.path, size)
+    return {uuid: path for uuid, (path, _) in best.items()}
+
+
+def dct_matrix(n):
+    import numpy as np
+
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    m[0, :] = np.sqrt(1.0 / n)
+    return m
+
+
+def load_pixels(path):
+    """Decode an image to a DCT_SIZE x DCT_SIZE grayscale array, or None."""
+    import numpy as np
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            # JPEG draft mode decodes at reduced scale — most of the speedup
+            img.draft("L", (DCT_SIZE * 2, DCT_SIZE * 2))
+            img = img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.BILINEAR)
+            return np.asarray(img, dtype=np.float32)
+    except (OSError, ValueError):
+        return None
+
+
+@tracing.timed("decode")
+def phash_batch(pixels):
+    """pHash a (n, 32, 32) stack at once: 2-D DCT, keep 8x8, compare to median."""
+    import numpy as np
+
+    d = dct_matrix(DCT_SIZE).astype(np.float32)
+    coeffs = d @ pixels @ d.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(pixels), -1)
+    # The DC term only measures overall brightness; leave it out of the median
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    bits = (low > median).astype(np.uint64)
+    weights = np.uint64(1) << np.arange(HASH_SIZE * HASH_SIZE, dtype=np.uint64)
+    return (bits * weights).sum(axis=1, dtype=np.uint64)
+
+
+def open_hash_cache():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache = sqlite3.connect(HASH_DB_PATH)
+    cache.execute("""
+        CREATE TABLE IF NOT EXISTS phash (
+            uuid TEXT PRIMARY KEY,
+            hash INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            mtime REAL NOT NULL
+        )
+    """)
+    return cache
+
+
+def to_signed(h):
+    """SQLite integers are signed 64-bit; store the hash's bit pattern."""
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def load_hashes(assets, derivatives):
+    """Return {uuid: hash} for assets, hashing only new or changed images."""
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = open_hash_cache()
+    cached = {
+        uuid: (h & ((1 << 64) - 1), source, mtime)
+        for uuid, h, source, mtime in cache.execute("SELECT uuid, hash, source, mtime FROM phash")
+    }
+
+    hashes = {}
+    todo = []
+    for uuid, directory, filename in assets:
+        path = derivatives.get(uuid)
+        if path is None and directory and filename and filename.lower().endswith(IMAGE_EXTS):
+            path = os.path.join(ORIGINALS_DIR, directory, filename)
+        if path is None:
+            continue
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        hit = cached.get(uuid)
+        if hit and hit[1] == path and hit[2] == mtime:
+            hashes[uuid] = hit[0]
+        else:
+            todo.append((uuid, path, mtime))
+
+    if todo:
+        print(f"  (hashing {len(todo)} photos...)", file=sys.stderr)
+    # Pillow releases the GIL while decoding, so threads scale here
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        for start in range(0, len(todo), HASH_BATCH):
+            batch = todo[start:start + HASH_BATCH]
+            pixels = list(pool.map(lambda t: load_pixels(t[1]), batch))
+            done = [(t, p) for t, p in zip(batch, pixels) if p is not None]
+            if not done:
+                continue
+            new_hashes = phash_batch(np.stack([p for _, p in done]))
+            rows = []
+            for ((uuid, path, mtime), _), h in zip(done, new_hashes.tolist()):
+                hashes[uuid] = h
+                rows.append((uuid, to_signed(h), path, mtime))
+            # Commit per batch so an interrupted first run keeps its progress
+            cache.executemany("INSERT OR REPLACE INTO phash VALUES (?, ?, ?, ?)", rows)
+            cache.commit()
+    cache.close()
+    return hashes
+
+
+# --- Matching ---------------------------------------------------------------
+
+def popcount(x):
+    """Per-element bit count of a uint64 array."""
+    import numpy as np
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+
+def chunk_bounds(threshold):
+    """Split 64 bits into threshold + 1 nearly equal chunks."""
+    chunks = threshold + 1
+    step, extra = divmod(HASH_SIZE * HASH_SIZE, chunks)
+    bounds = [0]
+    for c in range(chunks):
+        bounds.append(bounds[-1] + step + (1 if c < extra else 0))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def candidate_pairs(hashes, threshold):
+    """Return (i, j, distance) arrays for all pairs within threshold bits."""
+    import numpy as np
+
+    n = len(hashes)
+    found_i, found_j, found_d = [], [], []
+
+    def keep(i, j, d):
+        mask = d <= threshold
+        found_i.append(np.minimum(i, j)[mask])
+        found_j.append(np.maximum(i, j)[mask])
+        found_d.append(d[mask])
+
+    for lo, hi in chunk_bounds(threshold):
+        keys = (hashes >> np.uint64(lo)) & np.uint64((1 << (hi - lo)) - 1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_hashes = hashes[order]
+
+        # Bucket sizes, to pick the small-bucket path or the block path
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        small_max = int(min(sizes.max(initial=1), SMALL_BUCKET))
+        in_small = np.repeat(sizes <= SMALL_BUCKET, sizes)
+
+        # Compare every item with the next k items in sort order; pairs in
+        # the same small bucket are all reached for k < bucket size
+        for k in range(1, small_max):
+            same = (sorted_keys[:-k] == sorted_keys[k:]) & in_small[:-k]
+            idx = np.flatnonzero(same)
+            if idx.size == 0:
+                continue
+            d = popcount(sorted_hashes[idx] ^ sorted_hashes[idx + k])
+            keep(order[idx], order[idx + k], d)
+
+        for start, size in zip(starts[sizes > SMALL_BUCKET], sizes[sizes > SMALL_BUCKET]):
+            members = order[start:start + size]
+            bucket = hashes[members]
+            block = max(1, BLOCK_CELLS // size)
+            for r in range(0, size, block):
+                rows = bucket[r:r + block]
+                d = popcount(rows[:, None] ^ bucket[None, :])
+                upper = np.arange(size)[None, :] > np.arange(r, r + len(rows))[:, None]
+                ri, cj = np.nonzero((d <= threshold) & upper)
+                keep(members[ri + r], members[cj], d[ri, cj])
+
+    if not found_i:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+    i = np.concatenate(found_i).astype(np.int64)
+    j = np.concatenate(found_j).astype(np.int64)
+    d = np.concatenate(found_d).astype(np.int64)
+    # The same pair can share several chunks — keep one copy
+    _, first = np.unique(i * n + j, return_index=True)
+    return i[first], j[first], d[first]
+
+
+def group_pairs(n, pairs_i, pairs_j):
+    """Union-find the pairs into groups of indices (only groups of 2+)."""
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(pairs_i.tolist(), pairs_j.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups = {}
+    for x in range(n):
+        groups.setdefault(find(x), []).append(x)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def find_duplicates(conn, threshold=DEFAULT_THRESHOLD):
+    """Return groups of near-duplicate assets, each sorted first-imported first.
+
+    Each asset is a dict with uuid, hash, filename, date, added and its
+    Hamming distance from the first asset of the group.
+    """
+    import numpy as np
+
+    rows = conn.execute("""
+        SELECT ZUUID, ZDIRECTORY, ZFILENAME, ZDATECREATED, ZADDEDDATE
+        FROM ZASSET
+        WHERE ZTRASHEDSTATE = 0
+          AND ZKIND = 0
+          AND ZUUID IS NOT NULL
+    """).fetchall()
+    info = {uuid: (filename, created, added) for uuid, _, filename, created, added in rows}
+
+    hashes = load_hashes([(uuid, d, f) for uuid, d, f, _, _ in rows], find_derivatives())
+    uuids = list(hashes)
+    values = np.array([hashes[u] for u in uuids], dtype=np.uint64)
+
+    with tracing.stage("match") as st:
+        pairs_i, pairs_j, _ = candidate_pairs(values, threshold)
+        st.rows += len(pairs_i)
+
+    groups = []
+    for members in group_pairs(len(uuids), pairs_i, pairs_j):
+        assets = []
+        for m in members:
+            filename, created, added = info[uuids[m]]
+            assets.append({"uuid": uuids[m], "hash": hashes[uuids[m]],
+                           "filename": filename or "(no filename)",
+                           "date": created, "added": added})
+        assets.sort(key=lambda a: (a["added"] is None, a["added"] or 0))
+        # Distance from the photo that would be kept
+        for a in assets:
+            a["distance"] = bin(a["hash"] ^ assets[0]["hash"]).count("1")
+        groups.append(assets)
+    groups.sort(key=lambda g: (-len(g), g[0]["filename"]))
+    return groups
+
+
+def main():
+    threshold = DEFAULT_THRESHOLD
+    export_dir = None
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--threshold" and args:
+            threshold = int(args.pop(0))
+        elif arg == "--export" and args:
+            export_dir = os.path.abspath(args.pop(0))
+        else:
+            print("Usage: photos_duplicates.py [--threshold N] [--export <dir>]", file=sys.stderr)
+            sys.exit(1)
+
+    if not 0 <= threshold <= MAX_THRESHOLD:
+        print(f"Error: --threshold must be between 0 and {MAX_THRESHOLD}", file=sys.stderr)
+        sys.exit(1)
+    if export_dir and not os.path.isdir(export_dir):
+        print(f"Error: Destination folder does not exist: {export_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    require_imaging()
+    conn = get_connection()
+    try:
+        groups = find_duplicates(conn, threshold)
+    finally:
+        conn.close()
+
+    if not groups:
+        print("No duplicate photos found.")
+        return
+
+    extras = []
+    for n, group in enumerate(groups, 1):
+        print(f"Group {n} ({len(group)} photos):")
+        for k, asset in enumerate(group):
+            mark = "keep" if k == 0 else f"d={asset['distance']:<2}"
+            print(f"  {mark}  {asset['filename']}  |  {apple_ts_to_str(asset['date'])}  |  {asset['uuid']}")
+            if k:
+                extras.append(asset["uuid"])
+    print(f"\n{len(groups)} group(s), {len(extras)} duplicate(s)")
+
+    if export_dir:
+        from photos_export import export_by_uuid
+
+        print(f"\nExporting {len(extras)} duplicates to {export_dir}...")
+        try:
+            count = export_by_uuid(extras, export_dir)
+            print(f"OK: Exported {count} items to {export_dir}")
+        except RuntimeError as e:
+            print(f"Export error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,11 @@
 #!/usr/bin/env python3
-"""Export Apple Photos matching a search query — SQLite search + targeted AppleScript export."""
+"""Export Apple Photos matching a search query or person — SQLite search + targeted AppleScript export."""
 
-import sqlite3
 import subprocess
 import sys
 import os
 
-# Reuse search logic from photos_search
-from photos_search import (
-    DB_PATH,
-    search_metadata,
-    search_ocr,
-    MAX_RESULTS,
-)
+import tracing
 
 
 def export_by_uuid(uuids, dest_folder):
@@ -42,12 +35,14 @@ tell application "Photos"
 end tell
 """
 
-    result = subprocess.run(
-        ["osascript", "-e", script],
-        capture_output=True,
-        text=True,
-        timeout=120,
-    )
+    with tracing.stage("osascript") as st:
+        result = subprocess.run(
+            ["osascript", "-e", script],
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        st.rows += len(uuids)
 
     if result.returncode != 0:
         raise RuntimeError(result.stderr.strip())
@@ -69,38 +64,62 @@ def get_uuids_for_pks(conn, pks):
     return [row[0] for row in rows if row[0]]
 
 
+def usage():
+    print("Usage: photos_export.py <query> <destination-folder> [--limit N]", file=sys.stderr)
+    print("       photos_export.py --person NAME [query] <destination-folder> [--limit N]",
+          file=sys.stderr)
+    sys.exit(1)
+
+
+def pop_limit(args):
+    """Remove --limit N from args; None (export every match) if absent."""
+    if "--limit" not in args:
+        return None
+    i = args.index("--limit")
+    try:
+        limit = int(args[i + 1])
+    except (IndexError, ValueError):
+        usage()
+    if limit < 1:
+        usage()
+    del args[i:i + 2]
+    return limit
+
+
 def main():
     if len(sys.argv) < 3:
-        print("Usage: photos_export.py <query> <destination-folder>", file=sys.stderr)
-        sys.exit(1)
+        usage()
+
+    # Reuse search logic from photos_search (imported only once args are valid)
+    from photos_search import describe_search, find_photos, get_connection, parse_search_args
+
+    args = sys.argv[1:]
+    limit = pop_limit(args)
+    positional, person = parse_search_args(args)
+    if not positional or (not person and len(positional) < 2):
+        usage()
 
-    query = sys.argv[1]
-    dest_folder = os.path.abspath(sys.argv[2])
+    query = positional[0] if len(positional) > 1 else None
+    dest_folder = os.path.abspath(positional[-1])
 
     if not os.path.isdir(dest_folder):
         print(f"Error: Destination folder does not exist: {dest_folder}", file=sys.stderr)
         sys.exit(1)
 
-    if not os.path.exists(DB_PATH):
-        print(f"Error: Photos database not found at {DB_PATH}", file=sys.stderr)
-        sys.exit(1)
-
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-    conn.execute("PRAGMA query_only = ON")
+    conn = get_connection()
 
-    # Search (same as photos_search.py)
-    meta_results = search_metadata(conn, query)
-    existing_pks = {r["pk"] for r in meta_results}
-    remaining = MAX_RESULTS - len(meta_results)
-    ocr_results = search_ocr(conn, query, existing_pks, remaining)
-    all_results = meta_results + ocr_results
+    # Search (same as photos_search.py, but every match unless --limit is given)
+    all_results = find_photos(conn, query, person, limit)
 
     if not all_results:
-        print(f"No photos found matching: {query}")
+        if person:
+            print(f"No photos found {describe_search(query, person)}")
+        else:
+            print(f"No photos found matching: {query}")
         conn.close()
         sys.exit(0)
 
-    print(f"Found {len(all_results)} photo(s) matching \"{query}\"")
+    print(f"Found {len(all_results)} photo(s) {describe_search(query, person)}")
     for r in all_results:
         print(f"  {r['filename']}  |  {r['date']}")
 
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Find Apple Photos by location via a sidecar grid index.
+
+    photos_geo.py near <lat> <lon> [--radius 2km] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+    photos_geo.py bbox <south> <west> <north> <east> [--from ...] [--to ...]
+
+Every geotagged asset is bucketed into a CELL_DEG x CELL_DEG grid cell and
+stored in a small SQLite file under the macjuice cache directory, indexed
+on (cell_lat, cell_lon, date). A query reads only the cells overlapping
+its bounding box and runs the exact distance check on those candidates,
+so it stays fast with hundreds of thousands of geotagged photos. Before
+each query, assets added or edited since the last one (by Z_PK and
+ZMODIFICATIONDATE) are folded into the index; it is only rebuilt from
+scratch when assets were deleted outright.
+"""
+
+import math
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import tracing
+from photos_search import APPLE_EPOCH, DB_PATH, apple_ts_to_str, get_connection
+
+CACHE_DIR = os.path.expanduser(os.environ.get("MACJUICE_CACHE_DIR", "~/Library/Caches/macjuice"))
+INDEX_PATH = os.path.join(CACHE_DIR, "photos_geo.sqlite")
+
+# ~1.1 km of latitude per cell: small enough that a 1 km radius touches
+# a handful of cells, large enough that a city-sized box isn't thousands
+CELL_DEG = 0.01
+INDEX_VERSION = "2"
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 111.32
+
+# Up to this many rows of cells, seek each row on (cell_lat, cell_lon);
+# bigger boxes fall back to one range scan over cell_lat
+MAX_SEEK_ROWS = 500
+
+DEFAULT_RADIUS_KM = 1.0
+MAX_RESULTS = 50
+
+# Photos stores -180.0 in both columns for assets without a location
+NO_LOCATION = -180.0
+
+
+def cell(deg):
+    return math.floor(deg / CELL_DEG)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def source_state(conn):
+    """Return the max Z_PK, max ZMODIFICATIONDATE and row count of ZASSET.
+
+    Unlike the mtime of Photos.sqlite and its WAL, which photoanalysisd
+    touches constantly, these only move when assets are added, edited or
+    removed.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(ZASSET)")}
+    modified = "MAX(ZMODIFICATIONDATE)" if "ZMODIFICATIONDATE" in columns else "NULL"
+    max_pk, max_mod, count = conn.execute(
+        f"SELECT COALESCE(MAX(Z_PK), 0), {modified}, COUNT(*) FROM ZASSET"
+    ).fetchone()
+    return {"max_pk": max_pk, "max_mod": max_mod, "count": count}
+
+
+def read_meta(index):
+    try:
+        meta = dict(index.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        return None
+    if meta.get("version") != INDEX_VERSION or meta.get("source") != DB_PATH:
+        return None
+    return {
+        "max_pk": int(meta["max_pk"]),
+        "max_mod": float(meta["max_mod"]) if meta.get("max_mod") else None,
+        "count": int(meta["count"]),
+    }
+
+
+def write_meta(index, state):
+    index.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+        ("version", INDEX_VERSION),
+        ("source", DB_PATH),
+        ("max_pk", str(state["max_pk"])),
+        ("max_mod", "" if state["max_mod"] is None else repr(state["max_mod"])),
+        ("count", str(state["count"])),
+    ])
+
+
+def located_rows(rows):
+    """(pk, lat, lon, date) rows -> geo rows, skipping assets without a location."""
+    for pk, lat, lon, date in rows:
+        if lat is None or lon is None or (lat == NO_LOCATION and lon == NO_LOCATION):
+            continue
+        yield cell(lat), cell(lon), date, lat, lon, pk
+
+
+def build_index(conn, state):
+    """Write a fresh grid index next to the old one, then swap it in."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{INDEX_PATH}.{os.getpid()}.tmp"
+    with tracing.stage("index") as st:
+        index = sqlite3.connect(tmp_path)
+        try:
+            index.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE geo (
+                    cell_lat INTEGER NOT NULL,
+                    cell_lon INTEGER NOT NULL,
+                    date REAL,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    pk INTEGER NOT NULL
+                );
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            rows = conn.execute("""
+                SELECT Z_PK, ZLATITUDE, ZLONGITUDE, ZDATECREATED
+                FROM ZASSET
+                WHERE ZTRASHEDSTATE = 0
+            """)
+            index.executemany("INSERT INTO geo VALUES (?, ?, ?, ?, ?, ?)", located_rows(rows))
+            # Build the indexes after the bulk load — much faster than maintaining them per row
+            index.execute("CREATE INDEX geo_cell ON geo (cell_lat, cell_lon, date)")
+            index.execute("CREATE INDEX geo_pk ON geo (pk)")
+            write_meta(index, state)
+            st.rows += index.execute("SELECT COUNT(*) FROM geo").fetchone()[0]
+            index.commit()
+        finally:
+            index.close()
+        os.replace(tmp_path, INDEX_PATH)
+
+
+def update_index(conn, state):
+    """Fold assets added or edited since the index was built into it.
+
+    Returns False when that isn't possible (no usable index, or assets were
+    deleted outright) and a full rebuild is needed.
+    """
+    if not os.path.exists(INDEX_PATH):
+        return False
+    index = sqlite3.connect(INDEX_PATH, timeout=30)
+    try:
+        # IMMEDIATE: a concurrent refresh waits here, then finds nothing left to do
+        index.execute("BEGIN IMMEDIATE")
+        meta = read_meta(index)
+        if meta is None:
+            return False
+        if meta == state:
+            return True
+        added = conn.execute("SELECT COUNT(*) FROM ZASSET WHERE Z_PK > ?", (meta["max_pk"],)).fetchone()[0]
+        if state["count"] != meta["count"] + added:
+            return False
+
+        sql = "SELECT Z_PK, ZLATITUDE, ZLONGITUDE, ZDATECREATED, ZTRASHEDSTATE FROM ZASSET WHERE Z_PK > ?"
+        params = [meta["max_pk"]]
+        if meta["max_mod"] is not None:
+            sql += " OR ZMODIFICATIONDATE > ?"
+            params.append(meta["max_mod"])
+        with tracing.stage("index") as st:
+            changed = conn.execute(sql, params).fetchall()
+            index.executemany("DELETE FROM geo WHERE pk = ?", [(row[0],) for row in changed])
+            index.executemany("INSERT INTO geo VALUES (?, ?, ?, ?, ?, ?)",
+                              located_rows(row[:4] for row in changed if not row[4]))
+            write_meta(index, state)
+            st.rows += len(changed)
+        index.commit()
+        return True
+    except sqlite3.Error:
+        return False
+    finally:
+        index.close()
+
+
+def open_index(conn):
+    state = source_state(conn)
+    if not update_index(conn, state):
+        print("  (building location index...)", file=sys.stderr)
+        build_index(conn, state)
+    return tracing.traced(sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True))
+
+
+def lon_ranges(west, east):
+    """Split a longitude span that crosses the antimeridian into two."""
+    if east - west >= 360:
+        return [(-180.0, 180.0)]
+    if west < -180:
+        return [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return [(west, 180.0), (-180.0, east - 360)]
+    if west > east:
+        return [(west, 180.0), (-180.0, east)]
+    return [(west, east)]
+
+
+def query_box(index, south, west, north, east, start, end, newest=None):
+    """Return (pk, lat, lon, date) for assets in the box, reading only overlapping cells.
+
+    With newest=N, only the N most recent from each longitude span are returned.
+    """
+    south, north = max(south, -90.0), min(north, 90.0)
+    lat_cells = list(range(cell(south), cell(north) + 1))
+    if len(lat_cells) <= MAX_SEEK_ROWS:
+        # IN (...) makes SQLite seek each cell row instead of scanning a whole latitude band
+        lat_sql = f"cell_lat IN ({','.join('?' * len(lat_cells))})"
+    else:
+        lat_sql = "cell_lat BETWEEN ? AND ?"
+        lat_cells = [lat_cells[0], lat_cells[-1]]
+
+    rows = []
+    for w, e in lon_ranges(west, east):
+        sql = f"""
+            SELECT pk, lat, lon, date FROM geo
+            WHERE {lat_sql}
+              AND cell_lon BETWEEN ? AND ?
+              AND lat BETWEEN ? AND ?
+              AND lon BETWEEN ? AND ?
+        """
+        params = lat_cells + [cell(w), cell(e), south, north, w, e]
+        if start is not None:
+            sql += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND date < ?"
+            params.append(end)
+        if newest is not None:
+            sql += " ORDER BY date DESC LIMIT ?"
+            params.append(newest)
+        rows.extend(index.execute(sql, params).fetchall())
+    return rows
+
+
+def describe(conn, pks):
+    """Look up filenames for the result pks in Photos.sqlite."""
+    if not pks:
+        return {}
+    placeholders = ",".join("?" * len(pks))
+    rows = conn.execute(
+        f"SELECT Z_PK, ZFILENAME FROM ZASSET WHERE Z_PK IN ({placeholders})", list(pks)
+    ).fetchall()
+    return dict(rows)
+
+
+def find_near(conn, lat, lon, radius_km, start=None, end=None, limit=MAX_RESULTS):
+    """Return (pk, lat, lon, date, distance_km) within radius_km, nearest first."""
+    index = open_index(conn)
+    try:
+        dlat = radius_km / KM_PER_DEG_LAT
+        # Longitude degrees shrink toward the poles, so size the box for its
+        # poleward edge; right at a pole take every longitude
+        cos_lat = math.cos(math.radians(min(90.0, abs(lat) + dlat)))
+        dlon = radius_km / (KM_PER_DEG_LAT * cos_lat) if cos_lat > 1e-6 else 360.0
+        candidates = query_box(index, lat - dlat, lon - dlon, lat + dlat, lon + dlon, start, end)
+    finally:
+        index.close()
+
+    hits = []
+    for pk, plat, plon, date in candidates:
+        dist = haversine_km(lat, lon, plat, plon)
+        if dist <= radius_km:
+            hits.append((pk, plat, plon, date, dist))
+    hits.sort(key=lambda h: h[4])
+    return hits[:limit]
+
+
+def find_in_box(conn, south, west, north, east, start=None, end=None, limit=MAX_RESULTS):
+    """Return (pk, lat, lon, date) inside the box, newest first."""
+    index = open_index(conn)
+    try:
+        rows = query_box(index, south, west, north, east, start, end, newest=limit)
+    finally:
+        index.close()
+    rows.sort(key=lambda r: r[3] or 0, reverse=True)
+    return rows[:limit]
+
+
+def parse_radius(text):
+    """Parse a radius like 2, 2km or 500m into kilometres."""
+    text = text.strip().lower()
+    try:
+        if text.endswith("km"):
+            return float(text[:-2])
+        if text.endswith("m"):
+            return float(text[:-1]) / 1000
+        return float(text)
+    except ValueError:
+        print(f"Error: Bad radius: {text} (e.g. 2km, 500m)", file=sys.stderr)
+        sys.exit(1)
+
+
+def parse_day(text, end_of_day=False):
+    """Parse YYYY-MM-DD into an Apple timestamp (start of day, or start of the next)."""
+    try:
+        day = datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        print(f"Error: Bad date: {text} (expected YYYY-MM-DD)", file=sys.stderr)
+        sys.exit(1)
+    if end_of_day:
+        day += timedelta(days=1)
+    return day.timestamp() - APPLE_EPOCH
+
+
+def parse_options(args):
+    """Split positional numbers from --radius/--from/--to/--limit options."""
+    opts = {"radius": DEFAULT_RADIUS_KM, "start": None, "end": None, "limit": MAX_RESULTS}
+    positional = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--radius" and args:
+            opts["radius"] = parse_radius(args.pop(0))
+        elif arg == "--from" and args:
+            opts["start"] = parse_day(args.pop(0))
+        elif arg == "--to" and args:
+            opts["end"] = parse_day(args.pop(0), end_of_day=True)
+        elif arg == "--limit" and args:
+            opts["limit"] = int(args.pop(0))
+        else:
+            positional.append(arg)
+    try:
+        coords = [float(p) for p in positional]
+    except ValueError:
+        print(f"Error: Expected coordinates, got: {' '.join(positional)}", file=sys.stderr)
+        sys.exit(1)
+    return coords, opts
+
+
+def cmd_near(conn, lat, lon, opts):
+    hits = find_near(conn, lat, lon, opts["radius"], opts["start"], opts["end"], opts["limit"])
+    if not hits:
+        print(f"No photos found within {opts['radius']:g} km of {lat}, {lon}")
+        return
+    names = describe(conn, [h[0] for h in hits])
+    for pk, plat, plon, date, dist in hits:
+        print(f"{names.get(pk) or '(no filename)'} | {apple_ts_to_str(date)} | "
+              f"{dist:.2f} km | {plat:.5f}, {plon:.5f}")
+
+
+def cmd_bbox(conn, south, west, north, east, opts):
+    rows = find_in_box(conn, south, west, north, east, opts["start"], opts["end"], opts["limit"])
+    if not rows:
+        print(f"No photos found in box {south}, {west} — {north}, {east}")
+        return
+    names = describe(conn, [r[0] for r in rows])
+    for pk, plat, plon, date in rows:
+        print(f"{names.get(pk) or '(no filename)'} | {apple_ts_to_str(date)} | "
+              f"{plat:.5f}, {plon:.5f}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: photos_geo.py <command> [args...]", file=sys.stderr)
+        print("Commands: near <lat> <lon> [--radius 2km], bbox <south> <west> <north> <east>",
+              file=sys.stderr)
+        print("Options: --from YYYY-MM-DD, --to YYYY-MM-DD, --limit N", file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    coords, opts = parse_options(sys.argv[2:])
+
+    if cmd == "near":
+        if len(coords) != 2:
+            print("Usage: photos_geo.py near <lat> <lon> [--radius 2km]", file=sys.stderr)
+            sys.exit(1)
+    elif cmd == "bbox":
+        if len(coords) != 4:
+            print("Usage: photos_geo.py bbox <south> <west> <north> <east>", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print(f"Unknown command: {cmd}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = get_connection()
+    try:
+        if cmd == "near":
+            cmd_near(conn, coords[0], coords[1], opts)
+        else:
+            cmd_bbox(conn, *coords, opts)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
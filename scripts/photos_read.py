@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Read Apple Photos albums, people and recent items via SQLite — no media item iteration.
+
+Listings are paged with a keyset cursor (creation date, primary key) so
+each page is a single index range read, however deep into a 100K+ item
+library it starts. When a page is full, the cursor for the next one is
+printed to stderr:
+
+    photos_read.py recent 50
+      (more: --after 745523100.0,81234)
+    photos_read.py recent 50 --after 745523100.0,81234
+"""
+
+import sys
+
+from photos_search import PERSON_NAME, apple_ts_to_str, face_columns, get_connection
+
+DEFAULT_COUNT = 20
+
+# ZGENERICALBUM.ZKIND for albums the user made (folders, smart albums and
+# the built-in collections use other kinds)
+USER_ALBUM_KIND = 2
+
+# Shared column list so recent and album listings yield the same row shape:
+# (pk, filename, date_created, description)
+ITEM_COLUMNS = """
+    a.Z_PK,
+    a.ZFILENAME,
+    a.ZDATECREATED,
+    d.ZLONGDESCRIPTION
+"""
+
+ITEM_JOINS = """
+    LEFT JOIN ZADDITIONALASSETATTRIBUTES attr ON attr.ZASSET = a.Z_PK
+    LEFT JOIN ZASSETDESCRIPTION d ON d.ZASSETATTRIBUTES = attr.Z_PK
+"""
+
+
+def album_join_table(conn):
+    """Find the album/asset join table, e.g. Z_28ASSETS(Z_28ALBUMS, Z_3ASSETS).
+
+    The entity numbers in its name change between Photos versions, so
+    look for the Z_<n>ASSETS table that has an ALBUMS column.
+    """
+    tables = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'Z_[0-9]*ASSETS'"
+    ).fetchall()
+    for (table,) in tables:
+        cols = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+        album_col = next((c for c in cols if c.endswith("ALBUMS")), None)
+        asset_col = next((c for c in cols if c.endswith("ASSETS") and not c.startswith("Z_FOK")), None)
+        if album_col and asset_col:
+            return table, album_col, asset_col
+    print("Error: Could not find the album table in Photos.sqlite", file=sys.stderr)
+    sys.exit(1)
+
+
+def parse_cursor(cursor):
+    """Parse a "date,pk" cursor printed by a previous page."""
+    try:
+        ts, pk = cursor.split(",")
+        return float(ts), int(pk)
+    except ValueError:
+        print(f"Error: Bad cursor: {cursor} (expected date,pk)", file=sys.stderr)
+        sys.exit(1)
+
+
+def fetch_page(conn, from_sql, params, count, after):
+    """Fetch one page of items newest first, plus the cursor for the next page.
+
+    from_sql must end in a WHERE clause; the keyset condition is appended.
+    """
+    sql = f"SELECT {ITEM_COLUMNS} {from_sql} AND a.ZDATECREATED IS NOT NULL"
+    params = list(params)
+    if after is not None:
+        sql += " AND (a.ZDATECREATED, a.Z_PK) < (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY a.ZDATECREATED DESC, a.Z_PK DESC LIMIT ?"
+    # One extra row tells us whether another page exists
+    params.append(count + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) > count:
+        rows = rows[:count]
+        pk, _, ts, _ = rows[-1]
+        next_cursor = f"{ts!r},{pk}"
+    return rows, next_cursor
+
+
+def print_items(rows, next_cursor):
+    for _, filename, date_ts, desc in rows:
+        line = f"{filename or '(no filename)'} | {apple_ts_to_str(date_ts)}"
+        if desc:
+            line += f" | {desc}"
+        print(line)
+    if next_cursor:
+        print(f"  (more: --after {next_cursor})", file=sys.stderr)
+
+
+def cmd_albums(conn):
+    """List user albums with their item counts."""
+    table, album_col, asset_col = album_join_table(conn)
+    sql = f"""
+        SELECT g.ZTITLE, COUNT(a.Z_PK)
+        FROM ZGENERICALBUM g
+        LEFT JOIN {table} j ON j.{album_col} = g.Z_PK
+        LEFT JOIN ZASSET a ON a.Z_PK = j.{asset_col} AND a.ZTRASHEDSTATE = 0
+        WHERE g.ZKIND = ?
+          AND g.ZTRASHEDSTATE = 0
+          AND g.ZTITLE IS NOT NULL
+        GROUP BY g.Z_PK
+        ORDER BY g.ZTITLE COLLATE NOCASE
+    """
+    rows = conn.execute(sql, (USER_ALBUM_KIND,)).fetchall()
+    if not rows:
+        print("No albums found.")
+        return
+    for title, count in rows:
+        print(f"{title} ({count} items)")
+
+
+def cmd_list(conn, album, count, after):
+    """List the items in one album, newest first."""
+    found = conn.execute(
+        "SELECT 1 FROM ZGENERICALBUM WHERE ZTITLE = ? AND ZTRASHEDSTATE = 0 LIMIT 1",
+        (album,),
+    ).fetchone()
+    if not found:
+        print(f"Album not found: {album}")
+        return
+
+    table, album_col, asset_col = album_join_table(conn)
+    from_sql = f"""
+        FROM ZGENERICALBUM g
+        JOIN {table} j ON j.{album_col} = g.Z_PK
+        JOIN ZASSET a ON a.Z_PK = j.{asset_col}
+        {ITEM_JOINS}
+        WHERE g.ZTITLE = ?
+          AND g.ZTRASHEDSTATE = 0
+          AND a.ZTRASHEDSTATE = 0
+    """
+    rows, next_cursor = fetch_page(conn, from_sql, (album,), count, after)
+    if not rows:
+        print(f"No photos in album: {album}")
+        return
+    print_items(rows, next_cursor)
+
+
+def cmd_recent(conn, count, after):
+    """List the most recently taken items."""
+    from_sql = f"""
+        FROM ZASSET a
+        {ITEM_JOINS}
+        WHERE a.ZTRASHEDSTATE = 0
+    """
+    rows, next_cursor = fetch_page(conn, from_sql, (), count, after)
+    if not rows:
+        print("No photos found.")
+        return
+    print_items(rows, next_cursor)
+
+
+def cmd_people(conn):
+    """List named people with the number of photos each appears in."""
+    asset_col, person_col = face_columns(conn)
+    sql = f"""
+        SELECT {PERSON_NAME} AS name, COUNT(DISTINCT a.Z_PK) AS photos
+        FROM ZPERSON p
+        JOIN ZDETECTEDFACE f ON f.{person_col} = p.Z_PK
+        JOIN ZASSET a ON a.Z_PK = f.{asset_col}
+        WHERE a.ZTRASHEDSTATE = 0
+          AND {PERSON_NAME} IS NOT NULL
+        GROUP BY p.Z_PK
+        ORDER BY photos DESC, name COLLATE NOCASE
+    """
+    rows = conn.execute(sql).fetchall()
+    if not rows:
+        print("No named people found.")
+        return
+    for name, count in rows:
+        print(f"{name} ({count} photos)")
+
+
+def parse_paging(args):
+    """Parse [count] [--after cursor] into (count, after)."""
+    count = DEFAULT_COUNT
+    after = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--after" and args:
+            after = parse_cursor(args.pop(0))
+        elif arg.isdigit():
+            count = int(arg)
+    return count, after
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: photos_read.py <command> [args...]", file=sys.stderr)
+        print("Commands: albums, people, list <album> [count] [--after cursor], "
+              "recent [count] [--after cursor]", file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    conn = get_connection()
+
+    try:
+        if cmd == "albums":
+            cmd_albums(conn)
+        elif cmd == "people":
+            cmd_people(conn)
+        elif cmd == "list":
+            if len(sys.argv) < 3:
+                print("Usage: photos_read.py list <album> [count] [--after cursor]", file=sys.stderr)
+                sys.exit(1)
+            count, after = parse_paging(sys.argv[3:])
+            cmd_list(conn, sys.argv[2], count, after)
+        elif cmd == "recent":
+            count, after = parse_paging(sys.argv[2:])
+            cmd_recent(conn, count, after)
+        else:
+            print(f"Unknown command: {cmd}", file=sys.stderr)
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,69 @@
 #!/usr/bin/env python3
-"""Search Apple Photos library via SQLite — filename, title, description, and OCR text."""
+"""Search Apple Photos library via SQLite — filename, title, description, OCR text and people."""
 
 import sqlite3
 import sys
 import os
-import plistlib
-import re
-from datetime import datetime, timezone
 
-# Apple's Core Data epoch: 2001-01-01 00:00:00 UTC
-APPLE_EPOCH = datetime(2001, 1, 1, tzinfo=timezone.utc)
+import tracing
 
-DB_PATH = os.path.expanduser(
-    "~/Pictures/Photos Library.photoslibrary/database/Photos.sqlite"
+# Apple's Core Data epoch offset: 2001-01-01 00:00:00 UTC
+APPLE_EPOCH = 978307200
+
+LIBRARY_PATH = os.path.expanduser(
+    os.environ.get("MACJUICE_PHOTOS_LIBRARY", "~/Pictures/Photos Library.photoslibrary")
 )
+DB_PATH = os.path.join(LIBRARY_PATH, "database", "Photos.sqlite")
 MAX_RESULTS = 30
 
-# Optional: LZFSE decompression for OCR data
-try:
-    import liblzfse
-    HAS_LZFSE = True
-except ImportError:
-    HAS_LZFSE = False
+# Optional: LZFSE decompression for OCR data (imported on first use)
+_liblzfse = None
+
+
+def load_lzfse():
+    """Return the liblzfse module, or None if pyliblzfse isn't installed."""
+    global _liblzfse
+    if _liblzfse is None:
+        try:
+            import liblzfse
+            _liblzfse = liblzfse
+        except ImportError:
+            _liblzfse = False
+    return _liblzfse or None
 
 
 def apple_ts_to_str(ts):
     """Convert Apple Core Data timestamp to readable date string."""
+    from datetime import datetime
+
     if ts is None:
         return "unknown date"
     try:
-        dt = datetime.fromtimestamp(APPLE_EPOCH.timestamp() + ts)
+        dt = datetime.fromtimestamp(APPLE_EPOCH + ts)
         return dt.strftime("%Y-%m-%d %H:%M")
     except (OSError, OverflowError, ValueError):
         return "unknown date"
 
 
+def get_connection():
+    if not os.path.exists(DB_PATH):
+        print(f"Error: Photos database not found at {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    with tracing.stage("connect"):
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only = ON")
+    return tracing.traced(conn)
+
+
+@tracing.timed("decode")
 def extract_ocr_text(blob):
     """Decode NSKeyedArchiver binary plist, decompress LZFSE, extract OCR words."""
-    if blob is None or not HAS_LZFSE:
+    liblzfse = load_lzfse()
+    if blob is None or liblzfse is None:
         return ""
+    import plistlib
+    import re
+
     try:
         plist = plistlib.loads(blob)
         objects = plist.get("$objects", [])
@@ -97,7 +122,12 @@ def extract_ocr_text(blob):
     return ""
 
 
-def search_metadata(conn, query):
+def sql_limit(limit):
+    """LIMIT parameter for limit; None means no limit (SQLite reads -1 as none)."""
+    return -1 if limit is None else limit
+
+
+def search_metadata(conn, query, limit=MAX_RESULTS):
     """Search filename, title, description via SQL LIKE (fast)."""
     pattern = f"%{query}%"
     sql = """
@@ -119,7 +149,7 @@ def search_metadata(conn, query):
         ORDER BY a.ZDATECREATED DESC
         LIMIT ?
     """
-    rows = conn.execute(sql, (pattern, pattern, pattern, MAX_RESULTS)).fetchall()
+    rows = conn.execute(sql, (pattern, pattern, pattern, sql_limit(limit))).fetchall()
     results = []
     for pk, filename, date_ts, title, desc in rows:
         match_field = "filename"
@@ -137,6 +167,7 @@ def search_metadata(conn, query):
                 "pk": pk,
                 "filename": filename or "(no filename)",
                 "date": apple_ts_to_str(date_ts),
+                "ts": date_ts,
                 "match": match_field,
                 "context": context,
             }
@@ -144,10 +175,105 @@ def search_metadata(conn, query):
     return results
 
 
+def face_columns(conn):
+    """Return ZDETECTEDFACE's (asset, person) column names.
+
+    macOS 14 renamed ZASSET/ZPERSON to ZASSETFORFACE/ZPERSONFORFACE.
+    """
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(ZDETECTEDFACE)").fetchall()}
+    if not cols:
+        print("Error: This Photos library has no face data (ZDETECTEDFACE)", file=sys.stderr)
+        sys.exit(1)
+    asset_col = "ZASSETFORFACE" if "ZASSETFORFACE" in cols else "ZASSET"
+    person_col = "ZPERSONFORFACE" if "ZPERSONFORFACE" in cols else "ZPERSON"
+    return asset_col, person_col
+
+
+# A person's name as shown in Photos: full name, else the short display name
+PERSON_NAME = "COALESCE(NULLIF(p.ZFULLNAME, ''), NULLIF(p.ZDISPLAYNAME, ''))"
+
+
+def matching_people(conn, person):
+    """Return {Z_PK: name} for people whose full or display name contains person.
+
+    ZPERSON is small (one row per face cluster), so it is read once and
+    matched in Python, casefolded so "élise" finds "Élise". The face lookups
+    then go through the ZDETECTEDFACE person index instead of a LIKE join.
+    """
+    key = person.casefold()
+    people = {}
+    for pk, full, display in conn.execute("SELECT Z_PK, ZFULLNAME, ZDISPLAYNAME FROM ZPERSON"):
+        if any(key in (n or "").casefold() for n in (full, display)):
+            people[pk] = full or display
+    return people
+
+
+def search_person(conn, person, query=None, limit=MAX_RESULTS):
+    """Find photos of a named person, optionally also matching query in metadata.
+
+    limit=None returns every match (photos export wants all of them).
+    """
+    asset_col, person_col = face_columns(conn)
+    people = matching_people(conn, person)
+    if not people:
+        return []
+    # Person pks, not names: names can contain the GROUP_CONCAT separator
+    sql = f"""
+        SELECT
+            a.Z_PK,
+            a.ZFILENAME,
+            a.ZDATECREATED,
+            GROUP_CONCAT(DISTINCT f.{person_col})
+        FROM ZDETECTEDFACE f
+        JOIN ZASSET a ON a.Z_PK = f.{asset_col}
+    """
+    params = list(people)
+    where = f"""
+        WHERE f.{person_col} IN ({",".join("?" * len(people))})
+          AND a.ZTRASHEDSTATE = 0
+    """
+    if query:
+        sql += """
+        LEFT JOIN ZADDITIONALASSETATTRIBUTES attr ON attr.ZASSET = a.Z_PK
+        LEFT JOIN ZASSETDESCRIPTION d ON d.ZASSETATTRIBUTES = attr.Z_PK
+        """
+        where += """
+          AND (
+            a.ZFILENAME LIKE ? COLLATE NOCASE
+            OR attr.ZTITLE LIKE ? COLLATE NOCASE
+            OR d.ZLONGDESCRIPTION LIKE ? COLLATE NOCASE
+          )
+        """
+        params += [f"%{query}%"] * 3
+    sql += where + """
+        GROUP BY a.Z_PK
+        ORDER BY a.ZDATECREATED DESC
+        LIMIT ?
+    """
+    params.append(sql_limit(limit))
+
+    results = []
+    for pk, filename, date_ts, person_pks in conn.execute(sql, params).fetchall():
+        names = ", ".join(dict.fromkeys(
+            people[int(p)] for p in str(person_pks).split(",") if people.get(int(p))))
+        results.append(
+            {
+                "pk": pk,
+                "filename": filename or "(no filename)",
+                "date": apple_ts_to_str(date_ts),
+                "ts": date_ts,
+                "match": "person",
+                "context": f"person: {names}" if names else "",
+            }
+        )
+    return results
+
+
 def search_ocr(conn, query, existing_pks, remaining):
     """Search OCR text by decoding binary plist blobs with LZFSE decompression."""
-    if remaining <= 0 or not HAS_LZFSE:
-        if not HAS_LZFSE:
+    has_lzfse = load_lzfse() is not None
+    if remaining <= 0 or not has_lzfse:
+        if not has_lzfse:
             print(
                 "  (OCR search skipped — install pyliblzfse: pip3 install pyliblzfse)",
                 file=sys.stderr,
@@ -189,6 +315,7 @@ def search_ocr(conn, query, existing_pks, remaining):
                     "pk": pk,
                     "filename": filename or "(no filename)",
                     "date": apple_ts_to_str(date_ts),
+                    "ts": date_ts,
                     "match": "ocr",
                     "context": f"ocr: {snippet}",
                 }
@@ -198,37 +325,68 @@ def search_ocr(conn, query, existing_pks, remaining):
     return results
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: photos_search.py <query>", file=sys.stderr)
-        sys.exit(1)
-
-    query = sys.argv[1]
+def find_photos(conn, query=None, person=None, limit=MAX_RESULTS):
+    """Run a `photos search`: by person if given, else metadata then OCR.
 
-    if not os.path.exists(DB_PATH):
-        print(f"Error: Photos database not found at {DB_PATH}", file=sys.stderr)
-        sys.exit(1)
-
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-    conn.execute("PRAGMA query_only = ON")
+    limit=None returns every match.
+    """
+    if person:
+        return search_person(conn, person, query, limit)
 
     # Phase 1: fast metadata search (filename, title, description)
-    meta_results = search_metadata(conn, query)
+    meta_results = search_metadata(conn, query, limit)
     existing_pks = {r["pk"] for r in meta_results}
 
     # Phase 2: OCR search (slower, fills remaining slots)
-    remaining = MAX_RESULTS - len(meta_results)
+    remaining = (limit if limit is not None else float("inf")) - len(meta_results)
     ocr_results = search_ocr(conn, query, existing_pks, remaining)
 
-    conn.close()
+    return meta_results + ocr_results
 
-    all_results = meta_results + ocr_results
+
+def describe_search(query, person):
+    """Describe a search for messages, e.g. 'of Alice matching "beach"'."""
+    parts = []
+    if person:
+        parts.append(f"of {person}")
+    if query:
+        parts.append(f"matching \"{query}\"")
+    return " ".join(parts)
+
+
+def parse_search_args(args):
+    """Split args into (positional args, --person value or None)."""
+    query_args = []
+    person = None
+    while args:
+        arg = args.pop(0)
+        if arg == "--person" and args:
+            person = args.pop(0)
+        else:
+            query_args.append(arg)
+    return query_args, person
+
+
+def main():
+    positional, person = parse_search_args(sys.argv[1:])
+    if not positional and not person:
+        print("Usage: photos_search.py <query> [--person NAME]", file=sys.stderr)
+        print("       photos_search.py --person NAME", file=sys.stderr)
+        sys.exit(1)
+
+    query = positional[0] if positional else None
+    conn = get_connection()
+    all_results = find_photos(conn, query, person)
+    conn.close()
 
     if not all_results:
-        print(f"No photos found matching: {query}")
+        if person:
+            print(f"No photos found {describe_search(query, person)}")
+        else:
+            print(f"No photos found matching: {query}")
         sys.exit(0)
 
-    print(f"Found {len(all_results)} photo(s) matching \"{query}\":\n")
+    print(f"Found {len(all_results)} photo(s) {describe_search(query, person)}:\n")
     for r in all_results:
         line = f"  {r['filename']}  |  {r['date']}  |  [{r['match']}]"
         if r["context"]:
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Read Apple Reminders via SQLite — no Apple Events, filters done in SQL."""
+
+import glob
+import sqlite3
+import sys
+import os
+from datetime import datetime, timedelta
+
+import tracing
+
+# Apple's Core Data epoch offset: 2001-01-01 00:00:00 UTC
+APPLE_EPOCH = 978307200
+
+# Reminders keeps one Core Data store per account (iCloud, local, ...)
+STORES_GLOB = os.path.expanduser(
+    "~/Library/Group Containers/group.com.apple.reminders/Container_v1/Stores/Data-*.sqlite"
+)
+
+MAX_ALL = 50
+MAX_SEARCH = 20
+
+# Shared column list so every query yields the same row shape:
+# (title, list_name, due, completed, priority)
+REMINDER_COLUMNS = """
+    r.ZTITLE,
+    l.ZNAME,
+    r.ZDUEDATE,
+    r.ZCOMPLETED,
+    r.ZPRIORITY
+"""
+
+# ZREMCDBASELIST also holds smart lists and other list-like entities; only
+# rows of the REMCDList entity are the lists AppleScript's `lists` returns
+LIST_ENTITY = "(SELECT Z_ENT FROM Z_PRIMARYKEY WHERE Z_NAME = 'REMCDList')"
+
+REMINDER_FROM = f"""
+    FROM ZREMCDREMINDER r
+    JOIN ZREMCDBASELIST l ON r.ZLIST = l.Z_PK
+    WHERE r.ZMARKEDFORDELETION = 0
+      AND l.ZMARKEDFORDELETION = 0
+      AND l.Z_ENT = {LIST_ENTITY}
+"""
+
+
+def to_apple(dt):
+    """Convert a datetime to Apple Core Data timestamp."""
+    return dt.timestamp() - APPLE_EPOCH
+
+
+def from_apple(ts):
+    """Convert Apple Core Data timestamp to local datetime."""
+    if ts is None:
+        return None
+    try:
+        return datetime.fromtimestamp(ts + APPLE_EPOCH)
+    except (OSError, OverflowError, ValueError):
+        return None
+
+
+def short_date(dt):
+    """Format a date like AppleScript's short date string (e.g. 2/14/2025)."""
+    return dt.strftime("%m/%d/%Y").lstrip("0").replace("/0", "/")
+
+
+def short_time(dt):
+    """Format a time like AppleScript's time string (e.g. 5:00 PM)."""
+    return dt.strftime("%I:%M %p").lstrip("0")
+
+
+def get_connections():
+    """Open every Reminders store that actually holds reminder tables."""
+    paths = sorted(glob.glob(STORES_GLOB))
+    if not paths:
+        print(f"Error: Reminders database not found at {STORES_GLOB}", file=sys.stderr)
+        sys.exit(1)
+
+    conns = []
+    for path in paths:
+        try:
+            with tracing.stage("connect"):
+                conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+                conn.execute("PRAGMA query_only = ON")
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ZREMCDREMINDER'"
+            ).fetchone()
+        except sqlite3.Error:
+            continue
+        if has_table:
+            conns.append(tracing.traced(conn))
+        else:
+            conn.close()
+    return conns
+
+
+def query_all(conns, sql, params=()):
+    """Run the same query against every store and concatenate the rows."""
+    rows = []
+    for conn in conns:
+        try:
+            rows.extend(conn.execute(sql, params).fetchall())
+        except sqlite3.Error:
+            # Older/empty stores may lack a column — skip rather than fail
+            continue
+    return rows
+
+
+def by_due_then_title(row):
+    """Sort key: reminders with a due date first (soonest first), then by title."""
+    due = row[2]
+    return (due is None, due or 0, (row[0] or "").lower())
+
+
+def cmd_lists(conns):
+    """List all reminder lists with their incomplete counts."""
+    sql = f"""
+        SELECT l.ZNAME,
+               SUM(CASE WHEN r.Z_PK IS NOT NULL AND r.ZCOMPLETED = 0
+                             AND r.ZMARKEDFORDELETION = 0 THEN 1 ELSE 0 END)
+        FROM ZREMCDBASELIST l
+        LEFT JOIN ZREMCDREMINDER r ON r.ZLIST = l.Z_PK
+        WHERE l.ZMARKEDFORDELETION = 0
+          AND l.Z_ENT = {LIST_ENTITY}
+          AND l.ZNAME IS NOT NULL
+        GROUP BY l.Z_PK
+    """
+    rows = query_all(conns, sql)
+    if not rows:
+        print("No reminder lists found")
+        return
+    for name, incomplete in sorted(rows, key=lambda r: r[0].lower()):
+        print(f"{name} ({incomplete or 0} incomplete)")
+
+
+def cmd_list(conns, list_name):
+    """List incomplete reminders in one list."""
+    found = query_all(
+        conns,
+        f"SELECT 1 FROM ZREMCDBASELIST WHERE ZNAME = ? AND ZMARKEDFORDELETION = 0 AND Z_ENT = {LIST_ENTITY}",
+        (list_name,),
+    )
+    if not found:
+        print(f"List not found: {list_name}")
+        return
+
+    sql = f"""
+        SELECT {REMINDER_COLUMNS}
+        {REMINDER_FROM}
+          AND r.ZCOMPLETED = 0
+          AND l.ZNAME = ?
+    """
+    rows = sorted(query_all(conns, sql, (list_name,)), key=by_due_then_title)
+    if not rows:
+        print(f"No incomplete reminders in: {list_name}")
+        return
+
+    for title, _, due, _, priority in rows:
+        line = f"☐ {title}"
+        due_dt = from_apple(due)
+        if due_dt is not None:
+            line += f" (due: {short_date(due_dt)})"
+        if priority == 1:
+            line = "❗" + line
+        elif priority == 5:
+            line = "❕" + line
+        print(line)
+
+
+def cmd_all(conns):
+    """List incomplete reminders across all lists."""
+    sql = f"""
+        SELECT {REMINDER_COLUMNS}
+        {REMINDER_FROM}
+          AND r.ZCOMPLETED = 0
+        ORDER BY r.ZDUEDATE IS NULL, r.ZDUEDATE
+        LIMIT ?
+    """
+    rows = sorted(query_all(conns, sql, (MAX_ALL,)), key=by_due_then_title)[:MAX_ALL]
+    if not rows:
+        print("No incomplete reminders")
+        return
+
+    for title, list_name, due, _, _ in rows:
+        line = f"☐ {title} [{list_name}]"
+        due_dt = from_apple(due)
+        if due_dt is not None:
+            line += f" (due: {short_date(due_dt)})"
+        print(line)
+
+
+def cmd_today(conns):
+    """List incomplete reminders due today."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    sql = f"""
+        SELECT {REMINDER_COLUMNS}
+        {REMINDER_FROM}
+          AND r.ZCOMPLETED = 0
+          AND r.ZDUEDATE >= ? AND r.ZDUEDATE < ?
+    """
+    rows = sorted(query_all(conns, sql, (to_apple(today), to_apple(tomorrow))),
+                  key=by_due_then_title)
+    if not rows:
+        print("No reminders due today")
+        return
+
+    for title, list_name, due, _, _ in rows:
+        print(f"☐ {title} @ {short_time(from_apple(due))} [{list_name}]")
+
+
+def cmd_overdue(conns):
+    """List incomplete reminders whose due date has passed."""
+    sql = f"""
+        SELECT {REMINDER_COLUMNS}
+        {REMINDER_FROM}
+          AND r.ZCOMPLETED = 0
+          AND r.ZDUEDATE IS NOT NULL
+          AND r.ZDUEDATE < ?
+    """
+    rows = sorted(query_all(conns, sql, (to_apple(datetime.now()),)), key=by_due_then_title)
+    if not rows:
+        print("No overdue reminders")
+        return
+
+    for title, list_name, due, _, _ in rows:
+        print(f"⚠️ {title} (was due: {short_date(from_apple(due))}) [{list_name}]")
+
+
+def find_reminders(conns, query, limit=MAX_SEARCH):
+    """Return reminders (complete or not) whose title contains query."""
+    sql = f"""
+        SELECT {REMINDER_COLUMNS}
+        {REMINDER_FROM}
+          AND r.ZTITLE LIKE ? COLLATE NOCASE
+        ORDER BY r.ZCOMPLETED, r.ZDUEDATE IS NULL, r.ZDUEDATE
+        LIMIT ?
+    """
+    rows = query_all(conns, sql, (f"%{query}%", limit))
+    rows.sort(key=lambda r: (bool(r[3]),) + by_due_then_title(r))
+    return rows[:limit]
+
+
+def cmd_search(conns, query):
+    """Search reminders by title."""
+    rows = find_reminders(conns, query)
+    if not rows:
+        print(f"No reminders found matching: {query}")
+        return
+
+    for title, list_name, _, completed, _ in rows:
+        if completed:
+            print(f"☑ {title} [{list_name}] (completed)")
+        else:
+            print(f"☐ {title} [{list_name}]")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: reminders_read.py <command> [args...]", file=sys.stderr)
+        print("Commands: lists, list [listname], all, today, overdue, search <query>",
+              file=sys.stderr)
+        sys.exit(1)
+
+    cmd = sys.argv[1]
+    conns = get_connections()
+
+    try:
+        if cmd == "lists":
+            cmd_lists(conns)
+        elif cmd == "list":
+            list_name = sys.argv[2] if len(sys.argv) > 2 else "Reminders"
+            cmd_list(conns, list_name)
+        elif cmd == "all":
+            cmd_all(conns)
+        elif cmd == "today":
+            cmd_today(conns)
+        elif cmd == "overdue":
+            cmd_overdue(conns)
+        elif cmd == "search":
+            if len(sys.argv) < 3:
+                print("Usage: reminders_read.py search <query>", file=sys.stderr)
+                sys.exit(1)
+            cmd_search(conns, sys.argv[2])
+        else:
+            print(f"Unknown command: {cmd}", file=sys.stderr)
+            sys.exit(1)
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
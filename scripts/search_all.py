@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Search photos, notes, calendar, messages, reminders and mail at once.
+
+Every source runs in its own thread inside this one process, so the total
+wait is set by the slowest source instead of the sum of all of them.
+Results from all sources are printed as one list, newest first, once every
+source has finished; with --stream each source's results are printed as
+soon as it finishes instead. Sources that run past the timeout are
+reported and dropped.
+"""
+
+import contextlib
+import math
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Apple's Core Data epoch offset: 2001-01-01 00:00:00 UTC
+APPLE_EPOCH = 978307200
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_LIMIT = 10
+
+# Seconds search_mail stops short of the overall deadline. A source only
+# counts if its results reach the queue before that deadline, and after its
+# own one search_mail still has to kill the accounts that are still running
+# and collect the output of the rest; that takes a few milliseconds, so a
+# quarter second leaves plenty of room even on a loaded machine.
+MAIL_MARGIN = 0.25
+
+
+class TimedOut(Exception):
+    """A source's SQLite statement was interrupted at its deadline."""
+
+
+def from_apple(ts):
+    """Convert Apple Core Data timestamp to local datetime."""
+    if ts is None:
+        return None
+    try:
+        return datetime.fromtimestamp(ts + APPLE_EPOCH)
+    except (OSError, OverflowError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def interrupt_after(conns, timeout):
+    """Abort any running SQLite statement on conns once timeout elapses.
+
+    The sqlite3.OperationalError an aborted statement raises comes out as
+    TimedOut; errors before the deadline pass through unchanged.
+    """
+    fired = threading.Event()
+
+    def fire():
+        fired.set()
+        for conn in conns:
+            conn.interrupt()
+
+    timer = threading.Timer(timeout, fire)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except sqlite3.OperationalError:
+        if fired.is_set():
+            raise TimedOut() from None
+        raise
+    finally:
+        timer.cancel()
+
+
+def search_photos(query, limit, timeout):
+    import photos_search
+
+    conn = photos_search.get_connection()
+    try:
+        with interrupt_after([conn], timeout):
+            rows = photos_search.search_metadata(conn, query)[:limit]
+    finally:
+        conn.close()
+    results = []
+    for r in rows:
+        text = f"{r['filename']} [{r['match']}]"
+        if r["context"]:
+            text += f" {r['context']}"
+        results.append((from_apple(r["ts"]), text))
+    return results
+
+
+def search_notes(query, limit, timeout):
+    import notes_read
+
+    db = notes_read.get_db()
+    try:
+        with interrupt_after([db], timeout):
+            rows = notes_read.find_notes(db, query, limit)
+    finally:
+        db.close()
+    return [(from_apple(ts), title) for title, _, ts in rows]
+
+
+def search_calendar(query, limit, timeout):
+    import calendar_read
+
+    conn = calendar_read.get_connection()
+    try:
+        with interrupt_after([conn], timeout):
+            events = calendar_read.find_events(conn, query, limit=limit)
+    finally:
+        conn.close()
+    results = []
+    for summary, start, _, cal_name, loc_name, _ in events:
+        loc = f" @ {loc_name}" if loc_name else ""
+        results.append((start, f"{summary}{loc} [{cal_name}]"))
+    return results
+
+
+def search_messages(query, limit, timeout):
+    import messages_read
+
+    conn = messages_read.get_connection()
+    try:
+        with interrupt_after([conn], timeout):
+            rows = messages_read.search_messages(conn, query, limit)
+    finally:
+        conn.close()
+    return [(when, f"{chat} | {sender}: {text}") for when, chat, sender, text in rows]
+
+
+def search_reminders(query, limit, timeout):
+    import reminders_read
+
+    conns = reminders_read.get_connections()
+    try:
+        with interrupt_after(conns, timeout):
+            rows = reminders_read.find_reminders(conns, query, limit)
+    finally:
+        for conn in conns:
+            conn.close()
+    results = []
+    for title, list_name, due, completed, _ in rows:
+        mark = "☑" if completed else "☐"
+        results.append((from_apple(due), f"{mark} {title} [{list_name}]"))
+    return results
+
+
+def search_mail(query, limit, timeout):
+    # Mail has no SQLite reader — fan out one osascript per account, so a
+    # slow account only loses its own results
+    import mail_search
+
+    # Stop just short of search_all's own deadline, so the accounts that did
+    # answer are returned before the whole source is dropped as timed out
+    deadline = time.monotonic() + timeout - MAIL_MARGIN
+    accounts = mail_search.list_accounts(timeout)
+    # Listing accounts already spent part of the budget; search gets the rest
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise subprocess.TimeoutExpired("osascript", timeout)
+    results = []
+    for _, lines, _ in mail_search.search_accounts(query, accounts, remaining):
+        results.extend((None, line) for line in lines or [])
+    return results[:limit]
+
+
+SOURCES = {
+    "photos": search_photos,
+    "notes": search_notes,
+    "calendar": search_calendar,
+    "messages": search_messages,
+    "reminders": search_reminders,
+    "mail": search_mail,
+}
+
+
+def run_source(name, func, query, limit, timeout, results):
+    """Thread body: run one source and post (name, rows, error) to results."""
+    try:
+        results.put((name, func(query, limit, timeout), None))
+    except (subprocess.TimeoutExpired, TimedOut):
+        results.put((name, None, "timed out"))
+    except SystemExit:
+        # Readers exit when their database is missing; they already said why
+        results.put((name, None, "unavailable"))
+    except BaseException as e:
+        results.put((name, None, str(e) or type(e).__name__))
+
+
+def format_result(name, when, text):
+    date_str = when.strftime("%Y-%m-%d %H:%M") if when else "----------------"
+    return f"[{date_str}] {name:<9} | {text}"
+
+
+def by_date(item):
+    # Newest first; undated results (mail) sink to the bottom
+    when = item[1]
+    return (when is None, -(when.timestamp() if when else 0))
+
+
+def search_all(query, sources, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT, merge=True):
+    started = time.monotonic()
+    deadline = started + timeout
+    results = queue.Queue()
+
+    for name in sources:
+        # Daemon threads: a source stuck past the deadline can't hold up exit
+        thread = threading.Thread(
+            target=run_source,
+            args=(name, SOURCES[name], query, limit, timeout, results),
+            daemon=True,
+        )
+        thread.start()
+
+    pending = set(sources)
+    collected = []
+    found = 0
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            name, rows, error = results.get(timeout=remaining)
+        except queue.Empty:
+            break
+        pending.discard(name)
+
+        if error:
+            print(f"  ({name}: {error})", file=sys.stderr)
+            continue
+
+        found += len(rows)
+        tagged = sorted(((name, when, text) for when, text in rows), key=by_date)
+        if merge:
+            collected.extend(tagged)
+        else:
+            for item in tagged:
+                print(format_result(*item), flush=True)
+
+    for name in sorted(pending):
+        print(f"  ({name}: timed out after {timeout}s)", file=sys.stderr)
+
+    if merge:
+        for item in sorted(collected, key=by_date):
+            print(format_result(*item))
+
+    if not found:
+        print(f"No results found matching: {query}")
+
+    elapsed = time.monotonic() - started
+    print(f"  (searched {len(sources)} sources in {elapsed:.2f}s)", file=sys.stderr)
+
+
+def usage():
+    print("Usage: search_all.py <query> [--only a,b] [--limit n] [--timeout secs] [--stream]",
+          file=sys.stderr)
+    print(f"Sources: {', '.join(SOURCES)}", file=sys.stderr)
+    sys.exit(1)
+
+
+def positive(text, kind):
+    """Parse a --limit/--timeout value; None unless it is a positive, finite kind."""
+    try:
+        value = kind(text)
+    except ValueError:
+        return None
+    return value if value > 0 and math.isfinite(value) else None
+
+
+def main():
+    if len(sys.argv) < 2:
+        usage()
+
+    query = sys.argv[1]
+    sources = list(SOURCES)
+    limit = DEFAULT_LIMIT
+    timeout = DEFAULT_TIMEOUT
+    merge = True
+
+    args = sys.argv[2:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--only" and args:
+            sources = [s.strip() for s in args.pop(0).split(",") if s.strip()]
+        elif arg == "--limit" and args and positive(args[0], int):
+            limit = positive(args.pop(0), int)
+        elif arg == "--timeout" and args and positive(args[0], float):
+            timeout = positive(args.pop(0), float)
+        elif arg == "--stream":
+            merge = False
+        else:
+            usage()
+
+    unknown = [s for s in sources if s not in SOURCES]
+    if unknown:
+        print(f"Error: unknown source(s): {', '.join(unknown)}", file=sys.stderr)
+        print(f"Sources: {', '.join(SOURCES)}", file=sys.stderr)
+        sys.exit(1)
+
+    search_all(query, sources, limit, timeout, merge)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Per-stage tracing for the macjuice readers.
+
+Enabled with `macjuice --trace ...` or MACJUICE_TRACE=1. Records are
+written to stderr as one JSON object per line:
+
+  {"trace": "sql", "ms": 3.1, "rows_fetched": 40, "sql": "SELECT ...", ...}
+  {"trace": "plan", "full_scan": true, "plan": ["SCAN m", ...], ...}
+  {"trace": "stage", "stage": "decode", "ms": 12.4, "calls": 40, "rows": 40, "bytes": 81234}
+  {"trace": "total", "ms": 21.7, "argv": [...]}
+
+Every SQL statement gets its own "sql" and "plan" record. "rows_fetched"
+counts the rows the statement returned to Python, not the rows SQLite
+visited to find them (the sqlite3 module doesn't expose that); a scan
+shows up as "full_scan" in the plan record instead. Repeated
+stages (connect, decode, format, osascript) are summed and written once
+at exit. When tracing is off, stage() and traced() do nothing and the
+decorators return the function unchanged.
+
+Also usable as a wrapper so the bash CLI can time osascript calls:
+
+  python3 tracing.py exec osascript mail.applescript accounts
+"""
+
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("MACJUICE_TRACE", "") not in ("", "0")
+
+_START = time.perf_counter()
+_stages = {}
+_open_cursors = []
+_lock = threading.Lock()
+_emit_lock = threading.Lock()
+
+
+def emit(record):
+    import json
+
+    record.setdefault("reader", os.path.basename(sys.argv[0] or "python"))
+    record["pid"] = os.getpid()
+    line = json.dumps(record, default=str) + "\n"
+    # One write per record so lines from concurrent threads never interleave
+    with _emit_lock:
+        sys.stderr.write(line)
+        sys.stderr.flush()
+
+
+class Stage:
+    """Running totals of wall time, rows and bytes for one named stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = 0
+        self.bytes = 0
+
+
+class _Span:
+    """One timed pass through a stage; set .rows/.bytes inside the block."""
+
+    def __init__(self, totals):
+        self._totals = totals
+        self.rows = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._t0
+        # Readers may trace from several threads (see search_all.py)
+        with _lock:
+            self._totals.seconds += elapsed
+            self._totals.calls += 1
+            self._totals.rows += self.rows
+            self._totals.bytes += self.bytes
+        return False
+
+
+class _NullSpan:
+    rows = 0
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def stage(name):
+    """Context manager timing one pass through a stage."""
+    if not ENABLED:
+        return _NULL_SPAN
+    with _lock:
+        if name not in _stages:
+            _stages[name] = Stage(name)
+        return _Span(_stages[name])
+
+
+def timed(name):
+    """Decorator: count each call as one row of `name`, sizing bytes-like first args."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        def wrapper(*args, **kwargs):
+            with stage(name) as st:
+                st.rows += 1
+                if args and isinstance(args[0], (bytes, bytearray, memoryview)):
+                    st.bytes += len(args[0])
+                return func(*args, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorate
+
+
+def explain(conn, sql, params):
+    """Emit EXPLAIN QUERY PLAN for a statement, flagging full-table scans."""
+    try:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except Exception as e:
+        emit({"trace": "plan", "sql": " ".join(sql.split()), "error": str(e)})
+        return
+    details = [row[-1] for row in rows]
+    # Virtual tables (FTS) plan their own lookups, so their SCAN isn't one
+    full_scan = any(
+        d.startswith("SCAN ") and "USING" not in d and "CONSTANT ROW" not in d
+        and "VIRTUAL TABLE" not in d
+        for d in details
+    )
+    emit({"trace": "plan", "sql": " ".join(sql.split()), "full_scan": full_scan, "plan": details})
+
+
+class TracedCursor:
+    """Cursor wrapper that times execute + fetches and counts rows per statement."""
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+        self._sql = None
+        self._seconds = 0.0
+        self._rows = 0
+
+    def execute(self, sql, params=()):
+        self._finish()
+        explain(self._conn, sql, params)
+        self._sql = sql
+        self._seconds = 0.0
+        self._rows = 0
+        with _lock:
+            _open_cursors.append(self)
+        t0 = time.perf_counter()
+        self._cursor.execute(sql, params)
+        self._seconds += time.perf_counter() - t0
+        return self
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._seconds += time.perf_counter() - t0
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+        self._seconds += time.perf_counter() - t0
+        self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._seconds += time.perf_counter() - t0
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        emit({
+            "trace": "sql",
+            "sql": " ".join(self._sql.split()),
+            "ms": round(self._seconds * 1000, 3),
+            "rows_fetched": self._rows,
+        })
+        self._sql = None
+        with _lock:
+            if self in _open_cursors:
+                _open_cursors.remove(self)
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """sqlite3.Connection wrapper whose statements are planned and timed."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return TracedCursor(self._conn, self._conn.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def traced(conn):
+    """Wrap a sqlite3 connection for tracing (returned unchanged when off)."""
+    return TracedConnection(conn) if ENABLED else conn
+
+
+def _flush():
+    for cursor in list(_open_cursors):
+        cursor._finish()
+    for st in _stages.values():
+        emit({
+            "trace": "stage",
+            "stage": st.name,
+            "ms": round(st.seconds * 1000, 3),
+            "calls": st.calls,
+            "rows": st.rows,
+            "bytes": st.bytes,
+        })
+    emit({
+        "trace": "total",
+        "ms": round((time.perf_counter() - _START) * 1000, 3),
+        "argv": sys.argv[1:],
+    })
+
+
+if ENABLED:
+    import atexit
+
+    atexit.register(_flush)
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "exec":
+        print("Usage: tracing.py exec <command> [args...]", file=sys.stderr)
+        sys.exit(1)
+
+    import subprocess
+
+    cmd = sys.argv[2:]
+    # Name the stage after the program, e.g. "osascript", or after the
+    # script for a Python one ("applescript_pool")
+    name = os.path.basename(cmd[0])
+    if name.startswith("python") and len(cmd) > 1:
+        name = os.path.splitext(os.path.basename(cmd[1]))[0]
+    with stage(name) as st:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE)
+        st.bytes += len(result.stdout)
+    sys.stdout.buffer.write(result.stdout)
+    sys.stdout.flush()
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/bin/bash
+# test_applescript_pool.sh — Pooled AppleScript executor tests (runs off macOS)
+#
+# The pool's worker command is swapped for a fake stand-in that speaks the
+# same JSON-lines protocol, so this exercises the server, request ids,
+# worker reuse and timeouts without osascript.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== AppleScript Pool Tests ==="
+
+POOL="$(dirname "$MACJUICE")/scripts/applescript_pool.py"
+_tmp=$(mktemp -d)
+
+# Fake worker: echoes the script name, args and its own pid; "sleep" hangs,
+# "die" notes that it ran and exits without replying, "nothing" returns no result
+cat >"$_tmp/fake_worker.py" <<'PY'
+import json, os, sys, time
+for line in sys.stdin:
+    req = json.loads(line)
+    args = req["args"]
+    if args[:1] == ["sleep"]:
+        time.sleep(30)
+    if args[:1] == ["die"]:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ran"), "a") as f:
+            f.write("die\n")
+        sys.exit(1)
+    if args[:1] == ["fail"]:
+        reply = {"id": req["id"], "error": "Can't get track.", "number": -1728}
+    elif args[:1] == ["nothing"]:
+        reply = {"id": req["id"], "output": None}
+    else:
+        name = os.path.basename(req["script"])
+        reply = {"id": req["id"], "output": f"{name} {' '.join(args)} (worker {os.getpid()})"}
+    print(json.dumps(reply), flush=True)
+PY
+
+export MACJUICE_OSASCRIPT_WORKER="python3 $_tmp/fake_worker.py"
+export MACJUICE_POOL_SOCKET="$_tmp/pool.sock"
+export MACJUICE_APPLESCRIPT_POOL=1
+
+# 1. CLI commands run through the pool
+assert_output_matches \
+    "music command runs via pool worker" \
+    "^music.applescript now \(worker [0-9]+\)$" \
+    "$MACJUICE" music now
+
+# 2. the same worker serves the next request
+_run_cmd python3 "$POOL" run music now
+_first="$_CMD_OUTPUT"
+_run_cmd python3 "$POOL" run music now
+if [[ -n "$_first" && "$_CMD_OUTPUT" == "$_first" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  worker is reused across requests"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  worker is reused across requests"
+    echo "        output:  $_first / $_CMD_OUTPUT"
+    ((_FAIL++))
+fi
+
+# 3. script errors exit non-zero
+_run_cmd python3 "$POOL" run music fail
+if [[ $? -eq 1 ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  script error exits non-zero"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  script error exits non-zero"
+    ((_FAIL++))
+fi
+
+# 4. a hung request times out, and the next request gets a fresh worker
+MACJUICE_POOL_TIMEOUT=1 _run_cmd python3 "$POOL" run music sleep
+_rc=$?
+_run_cmd python3 "$POOL" run music now
+if [[ $_rc -eq 124 && "$_CMD_OUTPUT" == music.applescript* && "$_CMD_OUTPUT" != "$_first" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  timed-out worker is replaced"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  timed-out worker is replaced"
+    echo "        exit: $_rc, output: ${_CMD_OUTPUT:-(empty)}"
+    ((_FAIL++))
+fi
+
+# 5. status reports the running worker
+assert_output_matches \
+    "status lists workers" \
+    "music: pid [0-9]+" \
+    python3 "$POOL" status
+
+# 6. --trace times the pooled run instead of switching back to osascript
+_out=$(MACJUICE_TRACE=1 "$MACJUICE" music now 2>"$_tmp/trace.err")
+if [[ "$_out" == music.applescript* ]] && grep -q '"stage": "applescript_pool"' "$_tmp/trace.err"; then
+    echo -e "  ${_GREEN}PASS${_NC}  --trace measures the pooled backend"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  --trace measures the pooled backend"
+    echo "        output: ${_out:-(empty)}"
+    ((_FAIL++))
+fi
+
+# 7. a script without a result prints nothing at all, like osascript
+python3 "$POOL" run music nothing >"$_tmp/nothing.out" 2>/dev/null
+if [[ $? -eq 0 && ! -s "$_tmp/nothing.out" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  no result prints no output"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  no result prints no output"
+    echo "        output: $(od -c "$_tmp/nothing.out" | head -2)"
+    ((_FAIL++))
+fi
+
+# 8. a worker that dies mid-request is not sent the request again
+_run_cmd python3 "$POOL" run messages die
+_rc=$?
+_runs=$(wc -l <"$_tmp/ran" | tr -d ' ')
+if [[ $_rc -eq 1 && "$_runs" == "1" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  request is not retried once delivered"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  request is not retried once delivered"
+    echo "        exit: $_rc, runs: $_runs"
+    ((_FAIL++))
+fi
+
+# 9. a worker killed while idle is replaced on the next request
+_pid=$(python3 "$POOL" status | sed -n 's/.*music: pid \([0-9]*\).*/\1/p')
+kill "$_pid" 2>/dev/null
+assert_output_matches \
+    "idle worker killed outside the pool is replaced" \
+    "^music.applescript now \(worker [0-9]+\)$" \
+    python3 "$POOL" run music now
+
+python3 "$POOL" stop >/dev/null
+
+# 10. a socket directory other users can write to is refused: plain osascript runs
+mkdir -p "$_tmp/shared/bin"
+chmod 777 "$_tmp/shared"
+printf '#!/bin/bash\necho "direct osascript"\n' >"$_tmp/shared/bin/osascript"
+chmod +x "$_tmp/shared/bin/osascript"
+assert_output_matches \
+    "pool refuses a socket directory it doesn't own exclusively" \
+    "^direct osascript$" \
+    env PATH="$_tmp/shared/bin:$PATH" MACJUICE_POOL_SOCKET="$_tmp/shared/pool.sock" \
+    python3 "$POOL" run music now
+
+# 11. servers started together leave exactly one running, reachable server
+for _i in 1 2 3 4; do
+    python3 "$POOL" serve &
+done
+sleep 1
+assert_output_matches \
+    "concurrent server starts leave one working server" \
+    "^music.applescript now \(worker [0-9]+\)$" \
+    python3 "$POOL" run music now
+_servers=$(pgrep -f -- "$POOL serve" | wc -l | tr -d ' ')
+python3 "$POOL" stop >/dev/null
+wait
+if [[ "$_servers" == "1" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  only one of the concurrent servers keeps running"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  only one of the concurrent servers keeps running"
+    echo "        servers: $_servers"
+    ((_FAIL++))
+fi
+rm -rf "$_tmp"
+
+print_summary "AppleScript Pool"
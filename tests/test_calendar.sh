@@ -22,4 +22,146 @@ assert_output_matches \
     "(No events found|.*\|.*)" \
     "$MACJUICE" calendar today
 
+# 3. calendar export writes an iCalendar wrapper even for an empty range
+assert_output_matches \
+    "calendar export output is valid" \
+    "BEGIN:VCALENDAR" \
+    "$MACJUICE" calendar export --from 2024-01-01 --to 2024-01-07
+
+# 4. export writes one VEVENT per occurrence (fixture Calendar Cache, runs off macOS):
+# a 3-day event has 3 OccurrenceCache rows, a weekly event 3 occurrences
+_fixture_home=$(mktemp -d)
+HOME="$_fixture_home" python3 - <<'PY'
+import os, sqlite3
+from datetime import datetime, timedelta
+
+APPLE_EPOCH = 978307200
+path = os.path.expanduser("~/Library/Group Containers/group.com.apple.calendar/Calendar.sqlitedb")
+os.makedirs(os.path.dirname(path))
+db = sqlite3.connect(path)
+db.executescript("""
+    CREATE TABLE Calendar (ROWID INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE CalendarItem (ROWID INTEGER PRIMARY KEY, summary TEXT, description TEXT,
+        all_day INTEGER, has_recurrences INTEGER, last_modified REAL, location_id INTEGER,
+        unique_identifier TEXT, UUID TEXT);
+    CREATE TABLE OccurrenceCache (day REAL, event_id INTEGER, calendar_id INTEGER,
+        occurrence_date REAL, occurrence_start_date REAL, occurrence_end_date REAL);
+    CREATE TABLE Location (ROWID INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE Participant (ROWID INTEGER PRIMARY KEY, owner_id INTEGER, identity_id INTEGER, email TEXT);
+    CREATE TABLE Identity (ROWID INTEGER PRIMARY KEY, display_name TEXT);
+    INSERT INTO Calendar VALUES (1, 'Work');
+    INSERT INTO CalendarItem VALUES (1, 'Offsite', NULL, 0, 0, NULL, NULL, 'offsite-uid', NULL);
+    INSERT INTO CalendarItem VALUES (2, 'Standup', NULL, 0, 1, NULL, NULL, 'standup-uid', NULL);
+""")
+apple = lambda dt: dt.timestamp() - APPLE_EPOCH
+day = datetime(2024, 3, 4)
+start = apple(day + timedelta(hours=9))
+for i in range(3):
+    db.execute("INSERT INTO OccurrenceCache VALUES (?, 1, 1, ?, ?, ?)",
+               (apple(day + timedelta(days=i)), start, start, start + 2 * 86400 + 8 * 3600))
+for week in range(3):
+    occ = apple(day + timedelta(weeks=week, hours=10))
+    db.execute("INSERT INTO OccurrenceCache VALUES (?, 2, 1, ?, ?, ?)",
+               (apple(day + timedelta(weeks=week)), occ, occ, occ + 900))
+db.commit()
+PY
+_out=$(HOME="$_fixture_home" "$MACJUICE" calendar export --from 2024-03-01 --to 2024-03-31 2>/dev/null)
+_events=$(grep -c "^BEGIN:VEVENT" <<<"$_out")
+_uids=$(grep "^UID:" <<<"$_out" | sort -u | wc -l | tr -d ' ')
+if [[ "$_events" == "4" && "$_uids" == "4" && "$_out" != *RECURRENCE-ID* ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  calendar export writes one VEVENT per occurrence"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  calendar export writes one VEVENT per occurrence"
+    echo "        VEVENTs: $_events, distinct UIDs: $_uids"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 5. a year of three daily series plus a 3-day event (more rows than one
+# export chunk): every occurrence once, in start order, read in day-index
+# order without a temp b-tree; --watermark includes edits in its own second
+_fixture_home=$(mktemp -d)
+HOME="$_fixture_home" python3 - <<'PY'
+import os, sqlite3
+from datetime import datetime, timedelta
+
+APPLE_EPOCH = 978307200
+path = os.path.expanduser("~/Library/Group Containers/group.com.apple.calendar/Calendar.sqlitedb")
+os.makedirs(os.path.dirname(path))
+db = sqlite3.connect(path)
+db.executescript("""
+    CREATE TABLE Calendar (ROWID INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE CalendarItem (ROWID INTEGER PRIMARY KEY, summary TEXT, description TEXT,
+        all_day INTEGER, has_recurrences INTEGER, last_modified REAL, location_id INTEGER,
+        unique_identifier TEXT, UUID TEXT);
+    CREATE TABLE OccurrenceCache (day REAL, event_id INTEGER, calendar_id INTEGER,
+        occurrence_date REAL, occurrence_start_date REAL, occurrence_end_date REAL);
+    CREATE INDEX OccurrenceCache_day ON OccurrenceCache (day);
+    CREATE TABLE Location (ROWID INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE Participant (ROWID INTEGER PRIMARY KEY, owner_id INTEGER, identity_id INTEGER, email TEXT);
+    CREATE TABLE Identity (ROWID INTEGER PRIMARY KEY, display_name TEXT);
+    INSERT INTO Calendar VALUES (1, 'Work');
+    INSERT INTO CalendarItem VALUES (1, 'Offsite', NULL, 0, 0, 700000000, NULL, 'offsite-uid', NULL);
+    INSERT INTO CalendarItem VALUES (2, 'Evening', NULL, 0, 1, 700000500, NULL, 'evening-uid', NULL);
+    INSERT INTO CalendarItem VALUES (3, 'Lunch', NULL, 0, 1, 700000500, NULL, 'lunch-uid', NULL);
+    INSERT INTO CalendarItem VALUES (4, 'Standup', NULL, 0, 1, 700000500, NULL, 'standup-uid', NULL);
+""")
+apple = lambda dt: dt.timestamp() - APPLE_EPOCH
+first = datetime(2024, 1, 1)
+for n in range(366):
+    day = first + timedelta(days=n)
+    # Inserted out of start order: the export sorts each day
+    for item, hour in ((2, 19), (3, 12), (4, 8)):
+        occ = apple(day + timedelta(hours=hour))
+        db.execute("INSERT INTO OccurrenceCache VALUES (?, ?, 1, ?, ?, ?)",
+                   (apple(day), item, occ, occ, occ + 1800))
+offsite = datetime(2024, 3, 4)
+start = apple(offsite + timedelta(hours=9))
+for i in range(3):
+    db.execute("INSERT INTO OccurrenceCache VALUES (?, 1, 1, ?, ?, ?)",
+               (apple(offsite + timedelta(days=i)), start, start, start + 2 * 86400 + 8 * 3600))
+db.commit()
+PY
+_export() {
+    HOME="$_fixture_home" "$MACJUICE" calendar export --from 2024-01-01 --to 2024-12-31 --format ndjson "$@"
+}
+_export >"$_fixture_home/all.ndjson" 2>/dev/null
+MACJUICE_TRACE=1 _export >/dev/null 2>"$_fixture_home/trace"
+echo 700000500 >"$_fixture_home/watermark"
+_export --watermark "$_fixture_home/watermark" >"$_fixture_home/since.ndjson" 2>/dev/null
+_check=$(python3 - "$_fixture_home" <<'PY'
+import json, sys
+
+home = sys.argv[1]
+events = [json.loads(line) for line in open(f"{home}/all.ndjson")]
+keys = [(e["uid"], e["recurrence_id"]) for e in events]
+starts = [e["start"] for e in events]
+since = [json.loads(line) for line in open(f"{home}/since.ndjson")]
+plans = [json.loads(line) for line in open(f"{home}/trace") if line.startswith("{")]
+export_plan = [p for p in plans if p.get("trace") == "plan" and "OccurrenceCache" in p.get("sql", "")]
+problems = []
+if len(events) != 3 * 366 + 1 or len(set(keys)) != len(keys):
+    problems.append(f"{len(events)} events, {len(set(keys))} distinct")
+if starts != sorted(starts):
+    problems.append("not in start order")
+if [e["summary"] for e in events[:3]] != ["Standup", "Lunch", "Evening"]:
+    problems.append(f"first day: {[e['summary'] for e in events[:3]]}")
+if len(since) != 3 * 366 or any(e["summary"] == "Offsite" for e in since):
+    problems.append(f"watermark exported {len(since)}")
+if not export_plan or any("TEMP B-TREE" in step for p in export_plan for step in p["plan"]):
+    problems.append(f"plan: {export_plan}")
+print("; ".join(problems) or "ok")
+PY
+)
+if [[ "$_check" == "ok" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  calendar export streams occurrences once, in order, from the day index"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  calendar export streams occurrences once, in order, from the day index"
+    echo "        $_check"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
 print_summary "Calendar"
@@ -34,4 +34,56 @@ else
     ((_FAIL++))
 fi
 
+# 5. Python entry point hands non-SQLite commands to the bash CLI
+assert_output_matches \
+    "python entry point delegates --version" \
+    "macjuice v[0-9]" \
+    python3 "$(dirname "$MACJUICE")/scripts/macjuice.py" --version
+
+# 6. the bash CLI execs the Python entry point for reader commands, which
+# runs the reader in the same process (fixture Reminders store, runs off
+# macOS; a sitecustomize hook records what ran in each Python process)
+_fixture_home=$(mktemp -d)
+_stores="$_fixture_home/Library/Group Containers/group.com.apple.reminders/Container_v1/Stores"
+mkdir -p "$_stores" "$_fixture_home/hook"
+python3 - "$_stores/Data-test.sqlite" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR);
+    INSERT INTO Z_PRIMARYKEY VALUES (9, 'REMCDList');
+    CREATE TABLE ZREMCDBASELIST (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, ZNAME VARCHAR,
+        ZMARKEDFORDELETION INTEGER);
+    CREATE TABLE ZREMCDREMINDER (Z_PK INTEGER PRIMARY KEY, ZTITLE VARCHAR, ZLIST INTEGER,
+        ZDUEDATE TIMESTAMP, ZCOMPLETED INTEGER, ZPRIORITY INTEGER, ZMARKEDFORDELETION INTEGER);
+    INSERT INTO ZREMCDBASELIST VALUES (1, 9, 'Groceries', 0);
+""")
+PY
+cat >"$_fixture_home/hook/sitecustomize.py" <<PY
+import atexit, os, sys
+
+def _record():
+    # The script's __file__ is gone by exit time; its loader still has the path
+    main = os.path.basename(getattr(sys.modules["__main__"].__loader__, "path", ""))
+    with open("$_fixture_home/ran", "a") as f:
+        f.write(f"{os.getpid()} {main} {'reminders_read' in sys.modules}\n")
+
+atexit.register(_record)
+PY
+HOME="$_fixture_home" PYTHONPATH="$_fixture_home/hook" "$MACJUICE" reminders lists >"$_fixture_home/out" 2>&1 &
+_cli_pid=$!
+wait "$_cli_pid"
+_ran=$(cat "$_fixture_home/ran" 2>/dev/null)
+if [[ "$_ran" == "$_cli_pid macjuice.py True" ]] && grep -q "Groceries (0 incomplete)" "$_fixture_home/out"; then
+    echo -e "  ${_GREEN}PASS${_NC}  reader commands run in-process in the Python entry point"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  reader commands run in-process in the Python entry point"
+    echo "        cli pid $_cli_pid, python processes: ${_ran:-(none)}"
+    echo "        output: $(cat "$_fixture_home/out")"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
 print_summary "CLI"
@@ -0,0 +1,85 @@
+#!/bin/bash
+# test_home_batch.sh — Concurrent HomeKit shortcut batch tests (runs off macOS)
+#
+# MACJUICE_SHORTCUTS points the batch runner at a stub `shortcuts` binary:
+# "slow-*" take a second, "flaky" fails its first attempt, "hang" never
+# finishes and "broken" always fails.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Home Batch Tests ==="
+
+_tmp=$(mktemp -d)
+cat >"$_tmp/shortcuts" <<'SH'
+#!/bin/bash
+# shortcuts run <name>
+echo "$2" >>"$STUB_LOG"
+case "$2" in
+    slow-*) sleep 1 ;;
+    flaky)  [[ -f "$STUB_LOG.flaky" ]] || { touch "$STUB_LOG.flaky"; exit 1; } ;;
+    hang)   exec sleep 30 ;;
+    broken) echo "ERROR: Shortcut not found: broken"; exit 0 ;;
+esac
+echo "OK: Ran $2"
+SH
+chmod +x "$_tmp/shortcuts"
+
+export MACJUICE_SHORTCUTS="$_tmp/shortcuts run"
+export STUB_LOG="$_tmp/log"
+
+# pass_if <description> <condition result> <details>
+pass_if() {
+    if [[ $2 -eq 0 ]]; then
+        echo -e "  ${_GREEN}PASS${_NC}  $1"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $1"
+        echo "        $3"
+        ((_FAIL++))
+    fi
+}
+
+# 1-2. four one-second shortcuts run side by side, each reported
+_started=$(date +%s)
+_run_cmd "$MACJUICE" home batch slow-1 slow-2 slow-3 slow-4 --jobs 4
+_rc=$?
+_elapsed=$(( $(date +%s) - _started ))
+[[ $_rc -eq 0 && $_elapsed -lt 3 ]]
+pass_if "batch runs shortcuts concurrently" $? "exit $_rc after ${_elapsed}s"
+[[ $(grep -c "^OK: slow-[1-4] " <<<"$_CMD_OUTPUT") -eq 4 ]]
+pass_if "each action is reported" $? "output: $_CMD_OUTPUT"
+
+# 3. a failed attempt is retried when the action is marked idempotent
+_run_cmd "$MACJUICE" home batch flaky+
+[[ $? -eq 0 && "$_CMD_OUTPUT" == "OK: flaky ("*", 2 attempts)" ]]
+pass_if "failed idempotent action is retried" $? "output: $_CMD_OUTPUT"
+
+# 4. timeouts and failures are reported without holding up the rest
+_run_cmd "$MACJUICE" home batch hang broken slow-5 --timeout 2 --retries 0
+_rc=$?
+[[ $_rc -eq 1 && "$_CMD_OUTPUT" == *"ERROR: hang: timed out after 2s"* \
+    && "$_CMD_OUTPUT" == *"ERROR: broken: Shortcut not found: broken"* \
+    && "$_CMD_OUTPUT" == *"OK: slow-5"* ]]
+pass_if "timeouts and failures are reported per action" $? "exit $_rc, output: $_CMD_OUTPUT"
+
+# 5. scene files map device=action pairs to homekit-<device>-<action>
+: >"$STUB_LOG"
+printf '# bedtime\nPorch Lights=off\n\nhomekit-good-night\n' >"$_tmp/scene.txt"
+"$MACJUICE" home batch --file "$_tmp/scene.txt" >/dev/null 2>&1
+[[ "$(sort "$STUB_LOG" | tr '\n' ' ')" == "homekit-good-night homekit-porch-lights-off " ]]
+pass_if "scene file actions resolve to shortcut names" $? "ran: $(tr '\n' ' ' <"$STUB_LOG")"
+
+# 6. unmarked actions run once: a timed-out toggle may already have run
+: >"$STUB_LOG"
+rm -f "$STUB_LOG.flaky"
+_run_cmd "$MACJUICE" home batch hang flaky --timeout 1 --retries 2
+_rc=$?
+[[ $_rc -eq 1 && "$(sort "$STUB_LOG" | tr '\n' ' ')" == "flaky hang " \
+    && "$_CMD_OUTPUT" != *"attempts"* ]]
+pass_if "actions not marked idempotent are not retried" $? \
+    "exit $_rc, ran: $(tr '\n' ' ' <"$STUB_LOG"), output: $_CMD_OUTPUT"
+
+rm -rf "$_tmp"
+
+print_summary "Home Batch"
@@ -45,6 +45,59 @@ assert_exit_zero \
     "mail list Drafts exits 0" \
     "$MACJUICE" mail list Drafts
 
+# 8-9. search fans out one osascript per account (fake osascript, runs off
+# macOS): "Slow" hangs, the others answer at once
+_tmp=$(mktemp -d)
+cat >"$_tmp/osascript" <<'SH'
+#!/bin/bash
+case "$2:$4" in
+    accounts:) printf 'Work (work@example.com)\nHome (home@example.com)\nSlow (slow@example.com)\n' ;;
+    search:Slow) exec sleep 30 ;;
+    search:*) echo "${4}-1 | boss@example.com | $3 ($4)" ;;
+esac
+SH
+chmod +x "$_tmp/osascript"
+
+_started=$(date +%s)
+_out=$(PATH="$_tmp:$PATH" "$MACJUICE" mail search "budget" --timeout 2 2>"$_tmp/err")
+_elapsed=$(( $(date +%s) - _started ))
+if [[ "$_out" == *"budget (Work)"* && "$_out" == *"budget (Home)"* && $_elapsed -lt 10 ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  mail search returns fast accounts despite a slow one"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  mail search returns fast accounts despite a slow one"
+    echo "        output (${_elapsed}s): ${_out:-(empty)}"
+    ((_FAIL++))
+fi
+
+if grep -q "Slow: timed out after 2s" "$_tmp/err"; then
+    echo -e "  ${_GREEN}PASS${_NC}  mail search reports timed-out accounts"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  mail search reports timed-out accounts"
+    echo "        stderr: $(cat "$_tmp/err")"
+    ((_FAIL++))
+fi
+
+# 10. no account's osascript is started once the deadline has passed
+cat >"$_tmp/osascript" <<'SH'
+#!/bin/bash
+echo "$4" >>"$(dirname "$0")/started"
+echo "${4}-1 | boss@example.com | $3 ($4)"
+SH
+_out=$(PATH="$_tmp:$PATH" "$MACJUICE" mail search "budget" --account Work,Home --timeout 0 2>"$_tmp/err")
+sleep 0.5
+if [[ ! -e "$_tmp/started" ]] && grep -q "Work: timed out" "$_tmp/err" && grep -q "Home: timed out" "$_tmp/err"; then
+    echo -e "  ${_GREEN}PASS${_NC}  mail search starts nothing after the deadline"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  mail search starts nothing after the deadline"
+    echo "        started: $(cat "$_tmp/started" 2>/dev/null)"
+    echo "        stderr: $(cat "$_tmp/err")"
+    ((_FAIL++))
+fi
+rm -rf "$_tmp"
+
 # End-to-end delete-draft testing is covered by test_mail_draft.sh
 
 print_summary "Mail"
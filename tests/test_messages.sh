@@ -24,4 +24,340 @@ assert_output_matches \
     "(ERROR|Could not find chat)" \
     "$MACJUICE" messages send "testuser@apple.com" "macjuice test — ignore"
 
+# 4. messages attachments for an unknown chat says so
+assert_output_matches \
+    "messages attachments with unknown chat returns message" \
+    "No attachments found" \
+    "$MACJUICE" messages attachments "test_nonexistent_chat_xyz"
+
+# 5. messages read for an unknown chat says so
+assert_output_matches \
+    "messages read with unknown chat returns message" \
+    "Chat not found" \
+    "$MACJUICE" messages read "test_nonexistent_chat_xyz"
+
+# 6. messages stats lists chats or says there are none
+assert_output_matches \
+    "messages stats output is valid" \
+    "( msgs \(sent )|No messages found" \
+    "$MACJUICE" messages stats
+
+# 7. watch prints each new message exactly once and honours --since
+# (fixture chat.db, runs off macOS: inotify on Linux, kqueue on macOS)
+_fixture_home=$(mktemp -d)
+_chat_db="$_fixture_home/Library/Messages/chat.db"
+mkdir -p "$(dirname "$_chat_db")"
+
+# add_message <rowid> <text>
+add_message() {
+    python3 - "$_chat_db" "$@" <<'PY'
+import sqlite3, sys, time
+
+db = sqlite3.connect(sys.argv[1])
+rowid, text = int(sys.argv[2]), sys.argv[3]
+date = int((time.time() - 978307200) * 1e9)
+db.execute("INSERT INTO message VALUES (?, ?, 1, ?, 0)", (rowid, text, date))
+db.execute("INSERT INTO chat_message_join VALUES (1, ?, ?)", (rowid, date))
+db.commit()
+PY
+}
+
+python3 - "$_chat_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    PRAGMA journal_mode = WAL;
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE chat_handle_join (chat_id INTEGER, handle_id INTEGER);
+    CREATE TABLE message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    INSERT INTO handle VALUES (1, '+15551234567');
+    INSERT INTO chat VALUES (1, '+15551234567', 'Family');
+    INSERT INTO chat_handle_join VALUES (1, 1);
+""")
+PY
+add_message 1 "already seen"
+add_message 2 "missed while away"
+
+HOME="$_fixture_home" "$MACJUICE" messages watch --since 1 >"$_fixture_home/out" 2>"$_fixture_home/err" &
+_watch_pid=$!
+# wait_for <file> <text>: up to 10s
+wait_for() {
+    local i
+    for ((i = 0; i < 100; i++)); do
+        grep -q "$2" "$1" 2>/dev/null && return 0
+        sleep 0.1
+    done
+    return 1
+}
+wait_for "$_fixture_home/err" "Watching" && wait_for "$_fixture_home/out" "missed while away"
+add_message 3 "fresh message"
+wait_for "$_fixture_home/out" "fresh message"
+# Another commit wakes the watcher again; the earlier rows must not repeat
+add_message 4 "one more"
+wait_for "$_fixture_home/out" "one more"
+pkill -P "$_watch_pid" 2>/dev/null
+kill "$_watch_pid" 2>/dev/null
+wait "$_watch_pid" 2>/dev/null
+
+_out=$(cat "$_fixture_home/out")
+_expected="$(printf '%s\n' "Family | +15551234567: missed while away" "Family | +15551234567: fresh message" "Family | +15551234567: one more")"
+if [[ "$(sed 's/^\[[^]]*\] //' <<<"$_out")" == "$_expected" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  messages watch prints new messages once, from --since"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  messages watch prints new messages once, from --since"
+    echo "        output: ${_out:-(empty)}"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 8. attachments and watch --chat pick chats through ChatIndex: a number
+# selects its one-to-one chat, not the group that number also writes in
+_fixture_home=$(mktemp -d)
+_chat_db="$_fixture_home/Library/Messages/chat.db"
+mkdir -p "$(dirname "$_chat_db")"
+python3 - "$_chat_db" <<'PY'
+import sqlite3, sys, time
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE chat_handle_join (chat_id INTEGER, handle_id INTEGER);
+    CREATE TABLE message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    CREATE TABLE attachment (ROWID INTEGER PRIMARY KEY, guid TEXT, filename TEXT,
+        mime_type TEXT, transfer_name TEXT, total_bytes INTEGER);
+    CREATE TABLE message_attachment_join (message_id INTEGER, attachment_id INTEGER);
+    INSERT INTO handle VALUES (1, '+15551234567'), (2, 'bob@example.com');
+    INSERT INTO chat VALUES (1, '+15551234567', ''), (2, 'chat123', 'Family Group');
+    INSERT INTO chat_handle_join VALUES (1, 1), (2, 1), (2, 2);
+    INSERT INTO attachment VALUES (1, 'a1', '/nonexistent/direct.jpg', 'image/jpeg', 'direct.jpg', 100);
+    INSERT INTO attachment VALUES (2, 'a2', '/nonexistent/group.jpg', 'image/jpeg', 'group.jpg', 100);
+    INSERT INTO message_attachment_join VALUES (1, 1), (2, 2);
+""")
+date = int((time.time() - 978307200) * 1e9)
+for rowid, chat, text in ((1, 1, "just us"), (2, 2, "hi all")):
+    db.execute("INSERT INTO message VALUES (?, ?, 1, ?, 0)", (rowid, text, date))
+    db.execute("INSERT INTO chat_message_join VALUES (?, ?, ?)", (chat, rowid, date))
+db.commit()
+PY
+_attachments=$(HOME="$_fixture_home" "$MACJUICE" messages attachments "555-123-4567" 2>/dev/null)
+HOME="$_fixture_home" "$MACJUICE" messages watch --chat "555-123-4567" --since 0 >"$_fixture_home/out" 2>/dev/null &
+_watch_pid=$!
+wait_for "$_fixture_home/out" "just us"
+sleep 0.5
+pkill -P "$_watch_pid" 2>/dev/null
+kill "$_watch_pid" 2>/dev/null
+wait "$_watch_pid" 2>/dev/null
+_watched=$(cat "$_fixture_home/out")
+if [[ "$_attachments" == *direct.jpg* && "$_attachments" != *group.jpg* \
+      && "$_watched" == *"just us"* && "$_watched" != *"hi all"* ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  messages attachments/watch --chat use the best chat match"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  messages attachments/watch --chat use the best chat match"
+    echo "        attachments: ${_attachments:-(empty)}"
+    echo "        watch: ${_watched:-(empty)}"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 9. export-attachments copies each distinct file once, keeps going past a
+# file it can't read, and a re-run copies only what is still missing
+_fixture_home=$(mktemp -d)
+_chat_db="$_fixture_home/Library/Messages/chat.db"
+_files="$_fixture_home/files"
+mkdir -p "$(dirname "$_chat_db")" "$_files" "$_files/broken.jpg"
+echo "sunset" >"$_files/sunset.jpg"
+echo "sunset" >"$_files/sunset copy.jpg"
+echo "cake" >"$_files/cake.png"
+python3 - "$_chat_db" "$_files" <<'PY'
+import sqlite3, sys, time
+
+db = sqlite3.connect(sys.argv[1])
+files = sys.argv[2]
+db.executescript("""
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE chat_handle_join (chat_id INTEGER, handle_id INTEGER);
+    CREATE TABLE message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    CREATE TABLE attachment (ROWID INTEGER PRIMARY KEY, guid TEXT, filename TEXT,
+        mime_type TEXT, transfer_name TEXT, total_bytes INTEGER);
+    CREATE TABLE message_attachment_join (message_id INTEGER, attachment_id INTEGER);
+    INSERT INTO handle VALUES (1, '+15551234567');
+    INSERT INTO chat VALUES (1, 'chat123', 'Family');
+    INSERT INTO chat_handle_join VALUES (1, 1);
+""")
+date = int((time.time() - 978307200) * 1e9)
+names = ["sunset.jpg", "sunset copy.jpg", "cake.png", "broken.jpg", "offloaded.jpg"]
+for rowid, name in enumerate(names, 1):
+    db.execute("INSERT INTO message VALUES (?, '', 1, ?, 0)", (rowid, date + rowid))
+    db.execute("INSERT INTO chat_message_join VALUES (1, ?, ?)", (rowid, date + rowid))
+    db.execute("INSERT INTO attachment VALUES (?, ?, ?, 'image/jpeg', ?, 7)",
+               (rowid, f"guid-{rowid}", f"{files}/{name}", name))
+    db.execute("INSERT INTO message_attachment_join VALUES (?, ?)", (rowid, rowid))
+db.commit()
+PY
+_dest="$_fixture_home/export"
+HOME="$_fixture_home" "$MACJUICE" messages export-attachments "Family" "$_dest" >"$_fixture_home/run1" 2>"$_fixture_home/err1"
+_rc1=$?
+_files1=$(ls "$_dest" | wc -l | tr -d ' ')
+# The unreadable attachment becomes readable; the re-run copies just that one
+rmdir "$_files/broken.jpg" && echo "fixed" >"$_files/broken.jpg"
+HOME="$_fixture_home" "$MACJUICE" messages export-attachments "Family" "$_dest" >"$_fixture_home/run2" 2>/dev/null
+_rc2=$?
+_files2=$(ls "$_dest" | wc -l | tr -d ' ')
+HOME="$_fixture_home" "$MACJUICE" messages export-attachments "" "$_fixture_home/all" >/dev/null 2>&1
+_rc3=$?
+if [[ $_rc1 -eq 1 && $_files1 -eq 2 && $_rc2 -eq 0 && $_files2 -eq 3 && $_rc3 -eq 1 \
+      && ! -e "$_fixture_home/all" ]] \
+   && grep -q "Exported 2 file" "$_fixture_home/run1" \
+   && grep -q "1 duplicate(s) skipped, 0 already exported, 1 not on disk" "$_fixture_home/run1" \
+   && grep -q "failed: broken.jpg" "$_fixture_home/err1" \
+   && grep -q "Exported 1 file" "$_fixture_home/run2" \
+   && grep -q "0 duplicate(s) skipped, 3 already exported, 1 not on disk" "$_fixture_home/run2"; then
+    echo -e "  ${_GREEN}PASS${_NC}  messages export-attachments dedups, survives failures and resumes"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  messages export-attachments dedups, survives failures and resumes"
+    echo "        exits: $_rc1/$_rc2/$_rc3, files: $_files1/$_files2"
+    echo "        run 1: $(cat "$_fixture_home/run1" "$_fixture_home/err1")"
+    echo "        run 2: $(cat "$_fixture_home/run2")"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 10. read resolves the chat through the cached chat index and prints the
+# last N messages oldest first; the index is rebuilt only when chats change
+_fixture_home=$(mktemp -d)
+_chat_db="$_fixture_home/Library/Messages/chat.db"
+_index="$_fixture_home/Library/Caches/macjuice/messages_chats.sqlite"
+mkdir -p "$(dirname "$_chat_db")"
+python3 - "$_chat_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE chat_handle_join (chat_id INTEGER, handle_id INTEGER);
+    CREATE TABLE message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    INSERT INTO handle VALUES (1, '+15551234567'), (2, 'bob@example.com');
+    INSERT INTO chat VALUES (1, '+15551234567', ''), (2, 'chat123', 'Family Group');
+    INSERT INTO chat_handle_join VALUES (1, 1), (2, 1), (2, 2);
+""")
+date = 700000000 * 10**9
+rows = [(1, "one", 0), (1, "two", 1), (2, "group hello", 2), (1, "three", 3),
+        (1, "", 4), (1, "four", 5), (2, "group bye", 6)]
+for rowid, (chat, text, offset) in enumerate(rows, 1):
+    db.execute("INSERT INTO message VALUES (?, ?, 1, ?, ?)", (rowid, text, date + offset, rowid % 2))
+    db.execute("INSERT INTO chat_message_join VALUES (?, ?, ?)", (chat, rowid, date + offset))
+db.commit()
+PY
+_direct=$(HOME="$_fixture_home" "$MACJUICE" messages read "+1 (555) 123-4567" 3 2>/dev/null | sed 's/^\[[^]]*\] //')
+_index_before=$(ls -i "$_index" 2>/dev/null)
+_group=$(HOME="$_fixture_home" "$MACJUICE" messages read "fam" 2>/dev/null | sed 's/^\[[^]]*\] //')
+_index_after=$(ls -i "$_index" 2>/dev/null)
+# A new chat changes the chat tables: the next read must see it
+python3 - "$_chat_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.execute("INSERT INTO chat VALUES (3, 'chat456', 'Book Club')")
+db.execute("INSERT INTO message VALUES (8, 'next month', 2, 700000010000000000, 0)")
+db.execute("INSERT INTO chat_message_join VALUES (3, 8, 700000010000000000)")
+db.commit()
+PY
+_book=$(HOME="$_fixture_home" "$MACJUICE" messages read "book club" 2>/dev/null | sed 's/^\[[^]]*\] //')
+if [[ "$_direct" == "$(printf '%s\n' "+15551234567: two" "+15551234567: three" "+15551234567: four")" \
+      && "$_group" == "$(printf '%s\n' "Me: group hello" "Me: group bye")" \
+      && "$_book" == "bob@example.com: next month" \
+      && -n "$_index_before" && "$_index_before" == "$_index_after" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  messages read picks the best chat from a cached index"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  messages read picks the best chat from a cached index"
+    echo "        direct: ${_direct:-(empty)}"
+    echo "        group: ${_group:-(empty)}"
+    echo "        book club: ${_book:-(empty)}"
+    echo "        index: ${_index_before:-(missing)} -> ${_index_after:-(missing)}"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 11. stats folds in only the rows added since the last run, and rollups
+# built from another chat.db are not reused
+_fixture_home=$(mktemp -d)
+_chat_db="$_fixture_home/Library/Messages/chat.db"
+mkdir -p "$(dirname "$_chat_db")"
+# add_rows <db> <rowid:chat:handle:from_me:seconds after 2024-03-01 12:00 UTC>...
+add_rows() {
+    python3 - "$@" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE IF NOT EXISTS handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE IF NOT EXISTS chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE IF NOT EXISTS chat_handle_join (chat_id INTEGER, handle_id INTEGER);
+    CREATE TABLE IF NOT EXISTS message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE IF NOT EXISTS chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    INSERT OR IGNORE INTO handle VALUES (1, '+15551234567');
+    INSERT OR IGNORE INTO chat VALUES (1, '+15551234567', ''), (2, 'chat123', 'Family Group'),
+        (3, 'chat456', 'Book Club');
+""")
+base = 1709294400 - 978307200
+for spec in sys.argv[2:]:
+    rowid, chat, handle, from_me, offset = map(int, spec.split(":"))
+    date = (base + offset) * 10**9
+    db.execute("INSERT INTO message VALUES (?, 'hi', ?, ?, ?)", (rowid, handle, date, from_me))
+    db.execute("INSERT INTO chat_message_join VALUES (?, ?, ?)", (chat, rowid, date))
+db.commit()
+PY
+}
+add_rows "$_chat_db" 1:1:1:0:0 2:1:1:1:60 3:1:1:0:180 4:2:0:1:3600
+_top=$(TZ=UTC HOME="$_fixture_home" "$MACJUICE" messages stats 2>/dev/null)
+# Next day: a message of mine (too late to be a reply) and a 30s answer
+add_rows "$_chat_db" 5:1:1:1:90000 6:1:1:0:90030
+_chat=$(TZ=UTC HOME="$_fixture_home" "$MACJUICE" messages stats "555-123-4567" 2>"$_fixture_home/err")
+_contacts=$(TZ=UTC HOME="$_fixture_home" "$MACJUICE" messages stats --contacts 2>/dev/null)
+# Another HOME sharing the cache dir: its rows must not be skipped as "seen"
+_other_home=$(mktemp -d)
+mkdir -p "$_other_home/Library/Messages"
+add_rows "$_other_home/Library/Messages/chat.db" 5:3:0:0:0 6:3:0:0:10 7:3:0:0:20 8:3:0:0:30
+_other=$(TZ=UTC HOME="$_other_home" MACJUICE_CACHE_DIR="$_fixture_home/Library/Caches/macjuice" \
+    "$MACJUICE" messages stats 2>/dev/null)
+_expected_chat="$(printf '%s\n' \
+    "+15551234567 — 5 msgs (sent 2 / received 3), 2024-03-01 to 2024-03-02" \
+    "  2024-03-01  sent     1  received     2" \
+    "  2024-03-02  sent     1  received     1")"
+if [[ "$_top" == *"+15551234567 — 3 msgs (sent 1 / received 2), 2024-03-01 to 2024-03-01"* \
+      && "$_top" == *"Family Group — 1 msgs (sent 1 / received 0)"* \
+      && "$(grep -v replies: <<<"$_chat")" == "$_expected_chat" \
+      && "$_chat" =~ "replies: you ~"[^,]*", 1), them ~"[^,]*", 2)" && ! -s "$_fixture_home/err" \
+      && "$_contacts" == "+15551234567 — 5 msgs (sent 2 / received 3), 2024-03-01 to 2024-03-02" \
+      && "$_other" == "Book Club — 4 msgs (sent 0 / received 4), 2024-03-01 to 2024-03-01" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  messages stats updates rollups incrementally"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  messages stats updates rollups incrementally"
+    echo "        top: ${_top:-(empty)}"
+    echo "        chat: ${_chat:-(empty)} $(cat "$_fixture_home/err")"
+    echo "        contacts: ${_contacts:-(empty)}"
+    echo "        other chat.db: ${_other:-(empty)}"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home" "$_other_home"
+
 print_summary "Messages"
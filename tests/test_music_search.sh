@@ -0,0 +1,167 @@
+#!/bin/bash
+# test_music_search.sh — Music library snapshot search tests (runs off macOS)
+#
+# Indexes a small library XML fixture into a temporary cache directory, so
+# no Music.app or real library is needed.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Music Search Tests ==="
+
+_tmp=$(mktemp -d)
+export MACJUICE_CACHE_DIR="$_tmp/cache"
+export MACJUICE_MUSIC_LIBRARY="$_tmp/Library.xml"
+
+# track <id> <name> <artist> <album> <year> <genre>
+track() {
+    cat <<XML
+        <key>$1</key>
+        <dict>
+            <key>Track ID</key><integer>$1</integer>
+            <key>Name</key><string>$2</string>
+            <key>Artist</key><string>$3</string>
+            <key>Album</key><string>$4</string>
+            <key>Year</key><integer>$5</integer>
+            <key>Genre</key><string>$6</string>
+            <key>Artwork</key><data>AAAA</data>
+        </dict>
+XML
+}
+
+write_library() {
+    {
+        echo '<?xml version="1.0" encoding="UTF-8"?>'
+        echo '<plist version="1.0"><dict>'
+        echo '    <key>Major Version</key><integer>1</integer>'
+        echo '    <key>Tracks</key><dict>'
+        track 1 "Money" "Pink Floyd" "The Dark Side of the Moon" 1973 "Rock"
+        track 2 "Time" "Pink Floyd" "The Dark Side of the Moon" 1973 "Rock"
+        track 3 "Wish You Were Here" "Pink Floyd" "Wish You Were Here" 1975 "Rock"
+        track 4 "Come Together" "The Beatles" "Abbey Road" 1969 "Rock"
+        track 5 "So What" "Miles Davis" "Kind of Blue" 1959 "Jazz"
+        track 7 "Über den Wolken" "Reinhard Mey" "Mein achtel Lorbeerblatt" 1974 "Chanson"
+        track 8 "Around the World" "Daft Punk" "Homework" 1997 "Électro"
+        "$@"
+        echo '    </dict>'
+        echo '    <key>Playlists</key><array>'
+        echo '        <dict><key>Name</key><string>Library</string><key>Master</key><true/>'
+        echo '            <key>Playlist ID</key><integer>100</integer></dict>'
+        echo '        <dict><key>Name</key><string>Running</string><key>Playlist ID</key><integer>101</integer>'
+        echo '            <key>Playlist Items</key><array>'
+        echo '                <dict><key>Track ID</key><integer>2</integer></dict>'
+        echo '                <dict><key>Track ID</key><integer>4</integer></dict>'
+        echo '            </array></dict>'
+        echo '    </array>'
+        echo '</dict></plist>'
+    } >"$MACJUICE_MUSIC_LIBRARY"
+}
+write_library
+
+# check <description> <expected output> <cmd...>
+check() {
+    local desc="$1" expected="$2"
+    shift 2
+    _run_cmd "$@"
+    if [[ "$_CMD_OUTPUT" == "$expected" ]]; then
+        echo -e "  ${_GREEN}PASS${_NC}  $desc"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $desc"
+        echo "        expected: $expected"
+        echo "        output:   ${_CMD_OUTPUT:-(empty)}"
+        ((_FAIL++))
+    fi
+}
+
+# 1. field filters combine
+check "artist: and year: filter together" \
+    "$(printf '%s\n' "Money - Pink Floyd [The Dark Side of the Moon]" "Time - Pink Floyd [The Dark Side of the Moon]")" \
+    "$MACJUICE" music search 'artist:"pink floyd" year:1973'
+
+# 2. free words match name, artist or album
+check "free words match across fields" \
+    "Come Together - The Beatles [Abbey Road]" \
+    "$MACJUICE" music search beatles together
+
+# 3. year ranges and playlists
+check "year range and playlist: filter" \
+    "Come Together - The Beatles [Abbey Road]" \
+    "$MACJUICE" music search playlist:running year:1960-1970
+
+# 4. no match
+check "no match reports the query" \
+    "No tracks found matching: genre:polka" \
+    "$MACJUICE" music search genre:polka
+
+# 5. name: and genre: fold case beyond ASCII
+check "name: matches non-ASCII titles in any case" \
+    "Über den Wolken - Reinhard Mey [Mein achtel Lorbeerblatt]" \
+    "$MACJUICE" music search name:über
+check "genre: matches non-ASCII genres in any case" \
+    "Around the World - Daft Punk [Homework]" \
+    "$MACJUICE" music search genre:ÉLECTRO
+
+# 6. the snapshot is rebuilt when the XML changes
+sleep 1
+write_library track 6 "Blue in Green" "Miles Davis" "Kind of Blue" 1959 "Jazz"
+check "snapshot picks up library changes" \
+    "$(printf '%s\n' "Blue in Green - Miles Davis [Kind of Blue]" "So What - Miles Davis [Kind of Blue]")" \
+    "$MACJUICE" music search 'album:"kind of blue"'
+
+# 7. short words the trigram index can't look up still match
+check "words under three letters still match" \
+    "So What - Miles Davis [Kind of Blue]" \
+    "$MACJUICE" music search name:so
+
+# 8. free words, name: and genre: are looked up, not scanned over tracks
+# plan_uses_index <description> <query...>
+plan_uses_index() {
+    local desc="$1"
+    shift
+    MACJUICE_TRACE=1 "$MACJUICE" music search "$@" >/dev/null 2>"$_tmp/trace.err"
+    if python3 - "$_tmp/trace.err" <<'PY'
+import json, sys
+
+records = [json.loads(line) for line in open(sys.argv[1]) if line.startswith("{")]
+plans = [r["plan"] for r in records if r["trace"] == "plan" and "FROM tracks t" in r["sql"]]
+sys.exit(0 if plans and not any(p == "SCAN t" or p.startswith("SCAN t ") for plan in plans for p in plan) else 1)
+PY
+    then
+        echo -e "  ${_GREEN}PASS${_NC}  $desc"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $desc"
+        echo "        records: $(grep '"plan"' "$_tmp/trace.err" | head -c 600)"
+        ((_FAIL++))
+    fi
+}
+plan_uses_index "free words use the full-text index" beatles together
+plan_uses_index "name: uses the full-text index" name:money
+plan_uses_index "genre: uses the genre index" genre:jazz
+
+# 9. without library XML, the AppleScript fallback goes through the result cache
+mkdir -p "$_tmp/bin"
+cat >"$_tmp/bin/osascript" <<SH
+#!/bin/bash
+echo run >>"$_tmp/osascript.calls"
+echo "Found: \${@: -1}"
+SH
+chmod +x "$_tmp/bin/osascript"
+export MACJUICE_MUSIC_LIBRARY="$_tmp/missing.xml"
+export PATH="$_tmp/bin:$PATH"
+check "fallback prints the AppleScript output" "Found: dance" "$MACJUICE" music search dance
+check "fallback output is reused from the cache" "Found: dance" "$MACJUICE" music search dance
+_run_cmd "$MACJUICE" --no-cache music search dance
+if [[ "$(wc -l <"$_tmp/osascript.calls" | tr -d ' ')" == "2" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  fallback runs AppleScript once, again with --no-cache"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  fallback runs AppleScript once, again with --no-cache"
+    echo "        osascript calls: $(wc -l <"$_tmp/osascript.calls")"
+    ((_FAIL++))
+fi
+
+rm -rf "$_tmp"
+
+print_summary "Music Search"
@@ -28,4 +28,93 @@ assert_output_matches \
     "No notes found" \
     "$MACJUICE" notes search "zzzz_macjuice_nonexistent_zzz"
 
+# 4. notes export writes files and a re-run finds nothing changed
+_export_dir="$(mktemp -d)"
+assert_output_matches \
+    "notes export writes notes" \
+    "OK: Exported [0-9]+ note" \
+    "$MACJUICE" notes export "$_export_dir"
+assert_output_matches \
+    "notes export re-run skips unchanged notes" \
+    "OK: Exported 0 note" \
+    "$MACJUICE" notes export "$_export_dir"
+rm -rf "$_export_dir"
+
+# 6. fixture NoteStore (runs off macOS), more notes than POOL_MIN_NOTES so
+# bodies decode on the process pool; a re-run rewrites only what changed
+_fixture_home=$(mktemp -d)
+_note_store="$_fixture_home/Library/Group Containers/group.com.apple.notes/NoteStore.sqlite"
+mkdir -p "$(dirname "$_note_store")"
+# notes_fixture <<'PY' ... PY: run python statements against `db`
+notes_fixture() {
+    python3 -c '
+import gzip, sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+
+def body(text):
+    return gzip.compress(b"\x08\x00\x12" + text.encode() + b"\x00\x1a\x02")
+
+exec(sys.stdin.read())
+db.commit()
+' "$_note_store"
+}
+notes_fixture <<'PY'
+db.executescript("""
+    CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR);
+    INSERT INTO Z_PRIMARYKEY VALUES (5, 'ICAttachment'), (12, 'ICNote'), (14, 'ICFolder');
+    CREATE TABLE ZICNOTEDATA (Z_PK INTEGER PRIMARY KEY, ZDATA BLOB);
+    CREATE TABLE ZICCLOUDSYNCINGOBJECT (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER,
+        ZTITLE1 TEXT, ZTITLE2 TEXT, ZFOLDER INTEGER, ZCREATIONDATE1 REAL,
+        ZMODIFICATIONDATE1 REAL, ZNOTEDATA INTEGER, ZMARKEDFORDELETION INTEGER,
+        ZNOTE INTEGER, ZMEDIA INTEGER, ZFILENAME TEXT, ZTYPEUTI TEXT);
+    INSERT INTO ZICCLOUDSYNCINGOBJECT (Z_PK, Z_ENT, ZTITLE2) VALUES (1, 14, 'Work'), (2, 14, 'Home');
+""")
+for n in range(1, 251):
+    db.execute("INSERT INTO ZICNOTEDATA VALUES (?, ?)", (n, body(f"Note {n}\nBody text number {n}")))
+    db.execute("""INSERT INTO ZICCLOUDSYNCINGOBJECT (Z_PK, Z_ENT, ZTITLE1, ZFOLDER, ZCREATIONDATE1,
+                  ZMODIFICATIONDATE1, ZNOTEDATA, ZMARKEDFORDELETION)
+                  VALUES (?, 12, ?, 1, 700000000, ?, ?, 0)""", (100 + n, f"Note {n}", 700000000 + n, n))
+db.execute("""INSERT INTO ZICCLOUDSYNCINGOBJECT (Z_PK, Z_ENT, ZNOTE, ZFILENAME, ZTYPEUTI)
+              VALUES (900, 5, 101, 'plan.pdf', 'com.adobe.pdf')""")
+PY
+_dest="$_fixture_home/export"
+_run1=$(HOME="$_fixture_home" "$MACJUICE" notes export "$_dest" 2>&1)
+_bodies=$(python3 - "$_dest/Work" <<'PY'
+import os, sys
+
+wrong = [n for n in range(1, 251)
+         if f"Body text number {n}\n" not in open(os.path.join(sys.argv[1], f"Note {n}.md")).read()]
+print(wrong or "ok")
+PY
+)
+_inode=$(ls -i "$_dest/Work/Note 1.md" | cut -d' ' -f1)
+# Edit note 3, rename note 4, delete note 5, move note 6 to Home
+notes_fixture <<'PY'
+db.execute("UPDATE ZICNOTEDATA SET ZDATA = ? WHERE Z_PK = 3", (body("Note 3\nEdited body"),))
+db.execute("UPDATE ZICCLOUDSYNCINGOBJECT SET ZMODIFICATIONDATE1 = 700009999 WHERE Z_PK = 103")
+db.execute("UPDATE ZICCLOUDSYNCINGOBJECT SET ZTITLE1 = 'Renamed' WHERE Z_PK = 104")
+db.execute("UPDATE ZICCLOUDSYNCINGOBJECT SET ZMARKEDFORDELETION = 1 WHERE Z_PK = 105")
+db.execute("UPDATE ZICCLOUDSYNCINGOBJECT SET ZFOLDER = 2 WHERE Z_PK = 106")
+PY
+_run2=$(HOME="$_fixture_home" "$MACJUICE" notes export "$_dest" 2>&1)
+if [[ "$_run1" == "OK: Exported 250 note(s) to $_dest" && "$_bodies" == "ok" \
+      && "$(cat "$_dest/Work/Note 1.md")" == *"- plan.pdf (com.adobe.pdf)"* \
+      && "$_run2" == "$(printf '%s\n' "OK: Exported 3 note(s) to $_dest" "  246 unchanged, 1 removed")" \
+      && "$(ls -i "$_dest/Work/Note 1.md" | cut -d' ' -f1)" == "$_inode" \
+      && "$(cat "$_dest/Work/Note 3.md")" == *"Edited body"* \
+      && -f "$_dest/Work/Renamed.md" && ! -e "$_dest/Work/Note 4.md" \
+      && ! -e "$_dest/Work/Note 5.md" \
+      && -f "$_dest/Home/Note 6.md" && ! -e "$_dest/Work/Note 6.md" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  notes export skips unchanged notes, follows renames and deletes"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  notes export skips unchanged notes, follows renames and deletes"
+    echo "        run 1: ${_run1:-(empty)} (bodies: $_bodies)"
+    echo "        run 2: ${_run2:-(empty)}"
+    echo "        files: $(cd "$_dest" && ls Work/Note\ [1-6].md Work/Renamed.md Home 2>&1 | tr '\n' ' ')"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
 print_summary "Notes"
@@ -22,4 +22,245 @@ assert_output_matches \
     "No photos found" \
     "$MACJUICE" photos search "test_nonexistent_query_xyz"
 
+# 3. photos recent lists items or says there are none
+assert_output_matches \
+    "photos recent output is valid" \
+    "( \| [0-9]{4}-[0-9]{2}-[0-9]{2} )|No photos found" \
+    "$MACJUICE" photos recent 5
+
+# 4. photos list for a missing album says so
+assert_output_matches \
+    "photos list with unknown album returns message" \
+    "Album not found" \
+    "$MACJUICE" photos list "test_nonexistent_album_xyz"
+
+# 5. photos near returns distances or says nothing is nearby
+assert_output_matches \
+    "photos near output is valid" \
+    "( km \| )|No photos found within" \
+    "$MACJUICE" photos near 0 0 --radius 1km
+
+# 6. photos people lists counts or says there are none
+assert_output_matches \
+    "photos people output is valid" \
+    "(photos\))|No named people found" \
+    "$MACJUICE" photos people
+
+# 7. photos search --person with no match returns message
+assert_output_matches \
+    "photos search --person with no match returns message" \
+    "No photos found" \
+    "$MACJUICE" photos search --person "test_nonexistent_person_xyz"
+
+# 8-10. photos near/bbox on a fixture library (runs off macOS): across the
+# antimeridian, at the pole, and after assets are added or deleted
+_fixture_dir=$(mktemp -d)
+export MACJUICE_PHOTOS_LIBRARY="$_fixture_dir/Photos Library.photoslibrary"
+export MACJUICE_CACHE_DIR="$_fixture_dir/cache"
+_photos_db="$MACJUICE_PHOTOS_LIBRARY/database/Photos.sqlite"
+mkdir -p "$(dirname "$_photos_db")"
+python3 - "$_photos_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE ZASSET (Z_PK INTEGER PRIMARY KEY, ZFILENAME TEXT, ZDATECREATED REAL,
+        ZMODIFICATIONDATE REAL, ZTRASHEDSTATE INTEGER, ZLATITUDE REAL, ZLONGITUDE REAL);
+    INSERT INTO ZASSET VALUES (1, 'EAST.HEIC', 700000000, 700000000, 0, 0.0, 179.995);
+    INSERT INTO ZASSET VALUES (2, 'WEST.HEIC', 700000001, 700000001, 0, 0.0, -179.995);
+    INSERT INTO ZASSET VALUES (3, 'POLE_A.HEIC', 700000002, 700000002, 0, 89.999, 10.0);
+    INSERT INTO ZASSET VALUES (4, 'POLE_B.HEIC', 700000003, 700000003, 0, 89.999, -170.0);
+    INSERT INTO ZASSET VALUES (5, 'FAR.HEIC', 700000004, 700000004, 0, 0.0, 178.0);
+    INSERT INTO ZASSET VALUES (6, 'EDGE.HEIC', 700000005, 700000005, 0, 10.0, 20.0);
+    INSERT INTO ZASSET VALUES (7, 'NOWHERE.HEIC', 700000006, 700000006, 0, -180.0, -180.0);
+""")
+db.commit()
+PY
+
+_near=$("$MACJUICE" photos near 0 180 --radius 2km 2>/dev/null)
+_bbox=$("$MACJUICE" photos bbox -1 179 1 -179 2>/dev/null)
+if [[ "$_near" == *EAST.HEIC* && "$_near" == *WEST.HEIC* && "$_near" != *FAR.HEIC* \
+      && "$_bbox" == *EAST.HEIC* && "$_bbox" == *WEST.HEIC* && "$_bbox" != *FAR.HEIC* ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  photos near/bbox find photos across the antimeridian"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  photos near/bbox find photos across the antimeridian"
+    echo "        near: $_near"
+    echo "        bbox: $_bbox"
+    ((_FAIL++))
+fi
+
+# The pole is one point: both photos are ~0.1 km from it, 180 degrees of longitude apart.
+# EDGE sits exactly on a cell corner, so a 10 m radius has to read the cells below it too
+_pole=$("$MACJUICE" photos near 90 0 --radius 1km 2>/dev/null)
+_edge=$("$MACJUICE" photos near 9.99995 19.99995 --radius 10m 2>/dev/null)
+if [[ "$_pole" == *POLE_A.HEIC* && "$_pole" == *POLE_B.HEIC* && "$_edge" == *EDGE.HEIC* ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  photos near handles the pole and cell boundaries"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  photos near handles the pole and cell boundaries"
+    echo "        pole: $_pole"
+    echo "        edge: $_edge"
+    ((_FAIL++))
+fi
+
+# A new or moved asset is folded into the index in place; a deletion rebuilds it
+python3 - "$_photos_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.execute("INSERT INTO ZASSET VALUES (8, 'NEW.HEIC', 700000007, 700000007, 0, 0.0, 179.996)")
+db.execute("UPDATE ZASSET SET ZLONGITUDE = 100.0, ZMODIFICATIONDATE = 700000100 WHERE Z_PK = 2")
+db.commit()
+PY
+_added=$("$MACJUICE" photos near 0 180 --radius 2km 2>&1)
+python3 - "$_photos_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.execute("DELETE FROM ZASSET WHERE Z_PK = 1")
+db.commit()
+PY
+_deleted=$("$MACJUICE" photos near 0 180 --radius 2km 2>&1)
+if [[ "$_added" == *NEW.HEIC* && "$_added" != *WEST.HEIC* && "$_added" != *"building location index"* \
+      && "$_deleted" == *"building location index"* && "$_deleted" != *EAST.HEIC* && "$_deleted" == *NEW.HEIC* ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  photos location index follows added, moved and deleted assets"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  photos location index follows added, moved and deleted assets"
+    echo "        after add: $_added"
+    echo "        after delete: $_deleted"
+    ((_FAIL++))
+fi
+unset MACJUICE_PHOTOS_LIBRARY MACJUICE_CACHE_DIR
+rm -rf "$_fixture_dir"
+
+# 11-12. people with a comma in their name, and export --person exports
+# every match (fixture library, fake osascript records what was exported)
+_fixture_dir=$(mktemp -d)
+export MACJUICE_PHOTOS_LIBRARY="$_fixture_dir/Photos Library.photoslibrary"
+_photos_db="$MACJUICE_PHOTOS_LIBRARY/database/Photos.sqlite"
+mkdir -p "$(dirname "$_photos_db")" "$_fixture_dir/bin" "$_fixture_dir/out"
+python3 - "$_photos_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE ZASSET (Z_PK INTEGER PRIMARY KEY, ZUUID TEXT, ZFILENAME TEXT,
+        ZDATECREATED REAL, ZTRASHEDSTATE INTEGER);
+    CREATE TABLE ZPERSON (Z_PK INTEGER PRIMARY KEY, ZFULLNAME TEXT, ZDISPLAYNAME TEXT);
+    CREATE TABLE ZDETECTEDFACE (Z_PK INTEGER PRIMARY KEY, ZASSETFORFACE INTEGER,
+        ZPERSONFORFACE INTEGER);
+    CREATE INDEX ZDETECTEDFACE_ZPERSONFORFACE ON ZDETECTEDFACE (ZPERSONFORFACE);
+    INSERT INTO ZPERSON VALUES (1, 'Smith, Alice', 'Alice'), (2, 'Bob', NULL);
+""")
+for pk in range(1, 41):
+    db.execute("INSERT INTO ZASSET VALUES (?, ?, ?, ?, 0)",
+               (pk, f"UUID-{pk}", f"IMG_{pk:04d}.HEIC", 700000000 + pk))
+    db.execute("INSERT INTO ZDETECTEDFACE (ZASSETFORFACE, ZPERSONFORFACE) VALUES (?, 1)", (pk,))
+db.execute("INSERT INTO ZDETECTEDFACE (ZASSETFORFACE, ZPERSONFORFACE) VALUES (40, 2)")
+db.commit()
+PY
+cat >"$_fixture_dir/bin/osascript" <<SH
+#!/bin/bash
+grep -c 'media item id' <<<"\$2" >"$_fixture_dir/exported"
+echo OK
+SH
+chmod +x "$_fixture_dir/bin/osascript"
+
+assert_output_matches \
+    "photos search --person keeps names containing commas whole" \
+    "IMG_0040.HEIC .*person: Smith, Alice$" \
+    "$MACJUICE" photos search --person "alice"
+
+_out=$(PATH="$_fixture_dir/bin:$PATH" "$MACJUICE" photos export --person "smith" "$_fixture_dir/out" 2>&1)
+_all=$(cat "$_fixture_dir/exported" 2>/dev/null)
+_out=$(PATH="$_fixture_dir/bin:$PATH" "$MACJUICE" photos export --person "smith" "$_fixture_dir/out" --limit 5 2>&1)
+_capped=$(cat "$_fixture_dir/exported" 2>/dev/null)
+if [[ "$_all" == "40" && "$_capped" == "5" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  photos export --person exports every match unless --limit is given"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  photos export --person exports every match unless --limit is given"
+    echo "        exported: ${_all:-none} / with --limit 5: ${_capped:-none}"
+    echo "        output: $_out"
+    ((_FAIL++))
+fi
+unset MACJUICE_PHOTOS_LIBRARY
+rm -rf "$_fixture_dir"
+
+# 13-14. albums, and recent/list paged 3 at a time through runs of equal
+# timestamps (fixture library): every item exactly once, newest first
+_fixture_dir=$(mktemp -d)
+export MACJUICE_PHOTOS_LIBRARY="$_fixture_dir/Photos Library.photoslibrary"
+_photos_db="$MACJUICE_PHOTOS_LIBRARY/database/Photos.sqlite"
+mkdir -p "$(dirname "$_photos_db")"
+python3 - "$_photos_db" <<'PY'
+import sqlite3, sys
+
+db = sqlite3.connect(sys.argv[1])
+db.executescript("""
+    CREATE TABLE ZASSET (Z_PK INTEGER PRIMARY KEY, ZFILENAME TEXT, ZDATECREATED REAL,
+        ZTRASHEDSTATE INTEGER);
+    CREATE INDEX ZASSET_ZDATECREATED ON ZASSET (ZDATECREATED);
+    CREATE TABLE ZADDITIONALASSETATTRIBUTES (Z_PK INTEGER PRIMARY KEY, ZASSET INTEGER);
+    CREATE TABLE ZASSETDESCRIPTION (Z_PK INTEGER PRIMARY KEY, ZASSETATTRIBUTES INTEGER,
+        ZLONGDESCRIPTION TEXT);
+    CREATE TABLE ZGENERICALBUM (Z_PK INTEGER PRIMARY KEY, ZTITLE TEXT, ZKIND INTEGER,
+        ZTRASHEDSTATE INTEGER);
+    CREATE TABLE Z_28ASSETS (Z_28ALBUMS INTEGER, Z_3ASSETS INTEGER, Z_FOK_3ASSETS INTEGER);
+    INSERT INTO ZGENERICALBUM VALUES (1, 'Trips', 2, 0), (2, 'beach', 2, 0),
+        (3, 'Folder', 4000, 0), (4, 'Gone', 2, 1);
+""")
+# Runs of 4 and 5 equal dates, so page boundaries (every 3) fall inside them
+dates = [700000100] * 4 + [700000200] * 5 + [700000300] * 3
+for pk, date in enumerate(dates, 1):
+    db.execute("INSERT INTO ZASSET VALUES (?, ?, ?, 0)", (pk, f"IMG_{pk:02d}.HEIC", date))
+    db.execute("INSERT INTO Z_28ASSETS VALUES (1, ?, ?)", (pk, pk))
+db.execute("INSERT INTO ZASSET VALUES (13, 'TRASHED.HEIC', 700000200, 1)")
+db.execute("INSERT INTO ZASSET VALUES (14, 'UNDATED.HEIC', NULL, 0)")
+db.execute("INSERT INTO Z_28ASSETS VALUES (1, 13, 13)")
+db.execute("INSERT INTO Z_28ASSETS VALUES (2, 5, 5)")
+db.execute("INSERT INTO ZADDITIONALASSETATTRIBUTES VALUES (1, 6)")
+db.execute("INSERT INTO ZASSETDESCRIPTION VALUES (1, 1, 'sunset')")
+db.commit()
+PY
+
+assert_output_matches \
+    "photos albums lists user albums with untrashed item counts" \
+    "^Trips \(12 items\)$" \
+    "$MACJUICE" photos albums
+
+# page_all <photos args...>: follow the --after cursors to the end, print filenames
+page_all() {
+    local after=() pages=0
+    while ((pages++ < 20)); do
+        "$MACJUICE" photos "$@" "${after[@]}" 2>"$_fixture_dir/err" | cut -d' ' -f1
+        local cursor
+        cursor=$(sed -n 's/.*(more: --after \(.*\))/\1/p' "$_fixture_dir/err")
+        [[ -n "$cursor" ]] || return 0
+        after=(--after "$cursor")
+    done
+}
+_expected=$(for pk in 12 11 10 9 8 7 6 5 4 3 2 1; do printf 'IMG_%02d.HEIC\n' "$pk"; done)
+_recent=$(page_all recent 3)
+_album=$(page_all list Trips 3)
+_albums=$("$MACJUICE" photos albums 2>/dev/null)
+_described=$("$MACJUICE" photos recent 20 2>/dev/null | grep IMG_06)
+if [[ "$_recent" == "$_expected" && "$_album" == "$_expected" \
+      && "$_albums" == "$(printf '%s\n' "beach (1 items)" "Trips (12 items)")" \
+      && "$_described" == *"| sunset" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  photos recent/list pages through equal dates without gaps or repeats"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  photos recent/list pages through equal dates without gaps or repeats"
+    echo "        recent: $(tr '\n' ' ' <<<"$_recent")"
+    echo "        list:   $(tr '\n' ' ' <<<"$_album")"
+    echo "        albums: $(tr '\n' ' ' <<<"$_albums")"
+    echo "        described: $_described"
+    ((_FAIL++))
+fi
+unset MACJUICE_PHOTOS_LIBRARY
+rm -rf "$_fixture_dir"
+
 print_summary "Photos"
@@ -0,0 +1,91 @@
+#!/bin/bash
+# test_photos_duplicates.sh — Duplicate photo detection against a generated library
+#
+# Builds a throwaway Photos library (Photos.sqlite + derivative JPEGs) with
+# one image saved three ways (original, resized/recompressed, exact copy)
+# plus two unrelated images, so this runs anywhere numpy and Pillow do.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Photos Duplicates Tests ==="
+
+if ! python3 -c "import numpy, PIL" 2>/dev/null; then
+    _reason="numpy and Pillow not installed (pip3 install numpy pillow)"
+    skip_test "duplicates groups near-identical photos" "$_reason"
+    skip_test "duplicates reuses cached hashes" "$_reason"
+    skip_test "strict threshold still finds exact copies" "$_reason"
+    print_summary "Photos Duplicates"
+    exit $?
+fi
+
+_tmp=$(mktemp -d)
+export MACJUICE_PHOTOS_LIBRARY="$_tmp/Fixture.photoslibrary"
+export MACJUICE_CACHE_DIR="$_tmp/cache"
+
+python3 - "$MACJUICE_PHOTOS_LIBRARY" <<'PY'
+import os, random, sqlite3, sys
+from PIL import Image, ImageDraw
+
+lib = sys.argv[1]
+os.makedirs(os.path.join(lib, "database"))
+
+def scene(seed):
+    rnd = random.Random(seed)
+    img = Image.new("RGB", (320, 240), tuple(rnd.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rnd.randrange(320), rnd.randrange(240)
+        w, h = rnd.randrange(30, 160), rnd.randrange(30, 120)
+        shape = draw.ellipse if rnd.random() < 0.5 else draw.rectangle
+        shape([x, y, x + w, y + h], fill=tuple(rnd.randrange(256) for _ in range(3)))
+    return img
+
+def save(uuid, img, quality=90):
+    folder = os.path.join(lib, "resources", "derivatives", uuid[0])
+    os.makedirs(folder, exist_ok=True)
+    img.save(os.path.join(folder, f"{uuid}_1_105_c.jpeg"), quality=quality)
+
+base = scene(1)
+save("A0000000-0001", base)
+save("B0000000-0002", base.resize((240, 180)), quality=55)
+save("C0000000-0003", base)
+save("D0000000-0004", scene(2))
+save("E0000000-0005", scene(3))
+
+db = sqlite3.connect(os.path.join(lib, "database", "Photos.sqlite"))
+db.execute("""CREATE TABLE ZASSET (Z_PK INTEGER PRIMARY KEY, ZUUID TEXT, ZDIRECTORY TEXT,
+    ZFILENAME TEXT, ZDATECREATED REAL, ZADDEDDATE REAL, ZTRASHEDSTATE INTEGER, ZKIND INTEGER)""")
+for pk, uuid in enumerate(["A0000000-0001", "B0000000-0002", "C0000000-0003",
+                           "D0000000-0004", "E0000000-0005"], 1):
+    db.execute("INSERT INTO ZASSET VALUES (?, ?, ?, ?, ?, ?, 0, 0)",
+               (pk, uuid, uuid[0], f"IMG_{pk}.JPG", 7e8 + pk, 7e8 + pk))
+db.commit()
+PY
+
+# 1. the three copies of the same scene form one group, the others none
+assert_output_matches \
+    "duplicates groups near-identical photos" \
+    "^1 group\(s\), 2 duplicate\(s\)$" \
+    "$MACJUICE" photos duplicates
+
+# 2. second run answers from the hash cache (no "hashing N photos" notice)
+_second=$("$MACJUICE" photos duplicates 2>&1)
+if ! echo "$_second" | grep -q "hashing" && echo "$_second" | grep -q "keep  IMG_1.JPG"; then
+    echo -e "  ${_GREEN}PASS${_NC}  duplicates reuses cached hashes"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  duplicates reuses cached hashes"
+    echo "        output:  ${_second:-(empty)}"
+    ((_FAIL++))
+fi
+
+# 3. threshold 0 still pairs the byte-identical copy
+assert_output_matches \
+    "strict threshold still finds exact copies" \
+    "C0000000-0003" \
+    "$MACJUICE" photos duplicates --threshold 0
+
+rm -rf "$_tmp"
+
+print_summary "Photos Duplicates"
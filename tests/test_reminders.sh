@@ -18,10 +18,86 @@ assert_output_matches \
     "(No reminders due today|☐)" \
     "$MACJUICE" reminders today
 
-# 3. reminders search for gibberish returns "No reminders found"
+# 3. reminders overdue output is valid
+assert_output_matches \
+    "reminders overdue output is valid" \
+    "(No overdue reminders|was due:)" \
+    "$MACJUICE" reminders overdue
+
+# 4. reminders search for gibberish returns "No reminders found"
 assert_output_matches \
     "reminders search with no match returns message" \
     "No reminders found" \
     "$MACJUICE" reminders search "zzzz_macjuice_nonexistent_zzz"
 
+# 5. fixture stores (runs off macOS): lists only, not smart lists; completed
+# and deleted reminders filtered; lines formatted like reminders.applescript
+_fixture_home=$(mktemp -d)
+_stores="$_fixture_home/Library/Group Containers/group.com.apple.reminders/Container_v1/Stores"
+mkdir -p "$_stores"
+TZ=UTC python3 - "$_stores" <<'PY'
+import sqlite3, sys
+from datetime import datetime
+
+def apple(*args):
+    return datetime(*args).timestamp() - 978307200
+
+def store(name, lists, reminders):
+    db = sqlite3.connect(f"{sys.argv[1]}/{name}")
+    db.executescript("""
+        CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_SUPER INTEGER, Z_MAX INTEGER);
+        INSERT INTO Z_PRIMARYKEY VALUES (8, 'REMCDBaseList', 0, 0), (9, 'REMCDList', 8, 0),
+            (10, 'REMCDSmartList', 8, 0);
+        CREATE TABLE ZREMCDBASELIST (Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, ZNAME VARCHAR,
+            ZMARKEDFORDELETION INTEGER);
+        CREATE TABLE ZREMCDREMINDER (Z_PK INTEGER PRIMARY KEY, ZTITLE VARCHAR, ZLIST INTEGER,
+            ZDUEDATE TIMESTAMP, ZCOMPLETED INTEGER, ZPRIORITY INTEGER, ZMARKEDFORDELETION INTEGER);
+    """)
+    db.executemany("INSERT INTO ZREMCDBASELIST VALUES (?, ?, ?, ?)", lists)
+    db.executemany("INSERT INTO ZREMCDREMINDER VALUES (NULL, ?, ?, ?, ?, ?, ?)", reminders)
+    db.commit()
+
+store("Data-icloud.sqlite",
+      [(1, 9, "Groceries", 0), (2, 9, "Work", 0), (3, 10, "Today", 0), (4, 9, "Old", 1)],
+      [("Milk", 1, apple(2025, 2, 14, 17), 0, 1, 0),
+       ("Eggs", 1, None, 0, 5, 0),
+       ("Bread", 1, None, 1, 0, 0),
+       ("Deleted eggs", 1, None, 0, 0, 1),
+       ("Report", 2, apple(2025, 2, 3, 9), 0, 0, 0),
+       ("Stale", 4, None, 0, 0, 0)])
+store("Data-local.sqlite", [(1, 9, "Reminders", 0)], [("Call mom", 1, None, 0, 0, 0)])
+# A store without reminder tables is skipped
+sqlite3.connect(f"{sys.argv[1]}/Data-empty.sqlite").execute("CREATE TABLE Z_METADATA (Z_VERSION INTEGER)")
+PY
+# check_reminders <description> <expected output> <args...>
+check_reminders() {
+    local desc="$1" expected="$2"
+    shift 2
+    _run_cmd env TZ=UTC HOME="$_fixture_home" "$MACJUICE" reminders "$@"
+    if [[ "$_CMD_OUTPUT" == "$expected" ]]; then
+        echo -e "  ${_GREEN}PASS${_NC}  $desc"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $desc"
+        echo "        expected: $expected"
+        echo "        output:   ${_CMD_OUTPUT:-(empty)}"
+        ((_FAIL++))
+    fi
+}
+check_reminders "reminders lists counts incomplete reminders of real lists" \
+    "$(printf '%s\n' "Groceries (2 incomplete)" "Reminders (1 incomplete)" "Work (1 incomplete)")" \
+    lists
+check_reminders "reminders list shows due dates and priorities" \
+    "$(printf '%s\n' "❗☐ Milk (due: 2/14/2025)" "❕☐ Eggs")" \
+    list Groceries
+check_reminders "reminders list does not open smart lists" "List not found: Today" list Today
+check_reminders "reminders all sorts by due date, then title" \
+    "$(printf '%s\n' "☐ Report [Work] (due: 2/3/2025)" "☐ Milk [Groceries] (due: 2/14/2025)" \
+        "☐ Call mom [Reminders]" "☐ Eggs [Groceries]")" \
+    all
+check_reminders "reminders search lists completed reminders last" \
+    "$(printf '%s\n' "☐ Report [Work]" "☐ Eggs [Groceries]" "☑ Bread [Groceries] (completed)")" \
+    search e
+rm -rf "$_fixture_home"
+
 print_summary "Reminders"
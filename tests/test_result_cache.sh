@@ -0,0 +1,83 @@
+#!/bin/bash
+# test_result_cache.sh — AppleScript result cache tests (runs off macOS)
+#
+# A fake osascript on PATH counts its invocations, so these check when the
+# cache answers a read, when it reruns it, and that writes invalidate.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Result Cache Tests ==="
+
+_tmp=$(mktemp -d)
+mkdir -p "$_tmp/bin"
+cat >"$_tmp/bin/osascript" <<'SH'
+#!/bin/bash
+n=$(( $(cat "$FAKE_CALLS" 2>/dev/null || echo 0) + 1 ))
+echo "$n" >"$FAKE_CALLS"
+shift
+echo "$* (call $n)"
+SH
+chmod +x "$_tmp/bin/osascript"
+
+export PATH="$_tmp/bin:$PATH"
+export FAKE_CALLS="$_tmp/calls"
+export MACJUICE_CACHE_DIR="$_tmp/cache"
+unset MACJUICE_APPLESCRIPT_POOL MACJUICE_TRACE MACJUICE_CACHE_TTL MACJUICE_CACHE_MAX
+
+# check <description> <expected output> <cmd...>
+check() {
+    local desc="$1" expected="$2"
+    shift 2
+    _run_cmd "$@"
+    if [[ "$_CMD_OUTPUT" == "$expected" ]]; then
+        echo -e "  ${_GREEN}PASS${_NC}  $desc"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $desc"
+        echo "        expected: $expected"
+        echo "        output:   ${_CMD_OUTPUT:-(empty)}"
+        ((_FAIL++))
+    fi
+}
+
+# 1. a repeated read is served from the cache
+check "first read runs osascript" "groups (call 1)" "$MACJUICE" contacts groups
+check "repeated read is cached" "groups (call 1)" "$MACJUICE" contacts groups
+
+# 2. different arguments get their own entry
+check "other arguments miss the cache" "search John Smith (call 2)" "$MACJUICE" contacts search "John Smith"
+check "arguments are not conflated" "search John (call 3)" "$MACJUICE" contacts search John
+
+# 3. --no-cache reruns and refreshes the entry
+check "--no-cache reruns the read" "groups (call 4)" "$MACJUICE" --no-cache contacts groups
+check "refreshed entry is reused" "groups (call 4)" "$MACJUICE" contacts groups
+
+# 4. a write drops that app's entries only
+"$MACJUICE" music playlists >/dev/null
+"$MACJUICE" contacts add "Jane Doe" >/dev/null
+check "write invalidates the app's reads" "groups (call 7)" "$MACJUICE" contacts groups
+check "other apps stay cached" "playlists (call 5)" "$MACJUICE" music playlists
+
+# 5. commands that change state are never cached
+check "playback commands are not cached" "now (call 8)" "$MACJUICE" music now
+check "playback commands rerun" "now (call 9)" "$MACJUICE" music now
+
+# 6. a TTL of 0 turns the cache off
+MACJUICE_CACHE_TTL=0 check "TTL 0 disables caching" "groups (call 10)" "$MACJUICE" contacts groups
+
+# 7. entries beyond MACJUICE_CACHE_MAX are evicted
+MACJUICE_CACHE_MAX=2 "$MACJUICE" contacts email a >/dev/null
+_entries=$(ls "$MACJUICE_CACHE_DIR/results"/*.out | wc -l | tr -d ' ')
+if [[ "$_entries" == "2" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  least recently used entries are evicted"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  least recently used entries are evicted"
+    echo "        entries: $_entries"
+    ((_FAIL++))
+fi
+
+rm -rf "$_tmp"
+
+print_summary "Result Cache"
@@ -0,0 +1,117 @@
+#!/bin/bash
+# test_search.sh — Cross-app search integration tests for macjuice
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Search Tests ==="
+
+# 1. search for gibberish returns "No results found"
+assert_output_matches \
+    "search with no match returns message" \
+    "No results found" \
+    "$MACJUICE" search "zzzz_macjuice_nonexistent_zzz" --timeout 20
+
+# 2. --only restricts to the named apps
+assert_output_matches \
+    "search --only limits sources" \
+    "No results found" \
+    "$MACJUICE" search "zzzz_macjuice_nonexistent_zzz" --only notes,calendar
+
+# 3. mail searches in whatever time listing accounts left (fake osascript,
+# runs off macOS): the listing takes half the budget and "Slow" hangs
+_tmp=$(mktemp -d)
+cat >"$_tmp/osascript" <<'SH'
+#!/bin/bash
+case "$2:$4" in
+    accounts:) sleep 1.5; printf 'Work (work@example.com)\nSlow (slow@example.com)\n' ;;
+    search:Slow) exec sleep 30 ;;
+    search:*) echo "${4}-1 | boss@example.com | $3 ($4)" ;;
+esac
+SH
+chmod +x "$_tmp/osascript"
+assert_output_matches \
+    "search returns mail found within the overall timeout" \
+    "mail +\| Work-1 \| boss@example.com" \
+    env PATH="$_tmp:$PATH" "$MACJUICE" search "budget" --only mail --timeout 3
+rm -rf "$_tmp"
+
+# 4. results from all sources come back as one list, newest first (fixture
+# HOME with a chat.db and a calendar, runs off macOS): the calendar event
+# falls between the two messages
+_fixture_home=$(mktemp -d)
+HOME="$_fixture_home" python3 - <<'PY'
+import os, sqlite3, time
+
+APPLE_EPOCH = 978307200
+now = time.time() - APPLE_EPOCH
+
+path = os.path.expanduser("~/Library/Messages/chat.db")
+os.makedirs(os.path.dirname(path))
+db = sqlite3.connect(path)
+db.executescript("""
+    CREATE TABLE handle (ROWID INTEGER PRIMARY KEY, id TEXT);
+    CREATE TABLE chat (ROWID INTEGER PRIMARY KEY, chat_identifier TEXT, display_name TEXT);
+    CREATE TABLE message (ROWID INTEGER PRIMARY KEY, text TEXT, handle_id INTEGER,
+        date INTEGER, is_from_me INTEGER);
+    CREATE TABLE chat_message_join (chat_id INTEGER, message_id INTEGER, message_date INTEGER);
+    INSERT INTO handle VALUES (1, '+15551234567');
+    INSERT INTO chat VALUES (1, 'chat123', 'Family');
+""")
+for rowid, text, age in ((1, "dinner at 7?", 3600), (2, "that dinner was great", 2 * 86400)):
+    date = int((now - age) * 1e9)
+    db.execute("INSERT INTO message VALUES (?, ?, 1, ?, 0)", (rowid, text, date))
+    db.execute("INSERT INTO chat_message_join VALUES (1, ?, ?)", (rowid, date))
+db.commit()
+
+path = os.path.expanduser("~/Library/Group Containers/group.com.apple.calendar/Calendar.sqlitedb")
+os.makedirs(os.path.dirname(path))
+db = sqlite3.connect(path)
+db.executescript("""
+    CREATE TABLE Calendar (ROWID INTEGER PRIMARY KEY, title TEXT);
+    CREATE TABLE CalendarItem (ROWID INTEGER PRIMARY KEY, summary TEXT, all_day INTEGER,
+        location_id INTEGER);
+    CREATE TABLE OccurrenceCache (day REAL, event_id INTEGER, calendar_id INTEGER,
+        occurrence_date REAL, occurrence_start_date REAL, occurrence_end_date REAL);
+    CREATE TABLE Location (ROWID INTEGER PRIMARY KEY, title TEXT);
+    INSERT INTO Calendar VALUES (1, 'Home');
+    INSERT INTO CalendarItem VALUES (1, 'Dinner with Sam', 0, NULL);
+""")
+start = now - 86400
+db.execute("INSERT INTO OccurrenceCache VALUES (?, 1, 1, ?, ?, ?)", (start, start, start, start + 3600))
+db.commit()
+PY
+_run_cmd env HOME="$_fixture_home" "$MACJUICE" search dinner --only messages,calendar
+_expected="$(printf '%s\n' \
+    "messages  | Family | +15551234567: dinner at 7?" \
+    "calendar  | Dinner with Sam [Home]" \
+    "messages  | Family | +15551234567: that dinner was great")"
+if [[ "$(sed 's/^\[[^]]*\] //' <<<"$_CMD_OUTPUT")" == "$_expected" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  search merges all sources into one date-sorted list"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  search merges all sources into one date-sorted list"
+    echo "        output: ${_CMD_OUTPUT:-(empty)}"
+    ((_FAIL++))
+fi
+rm -rf "$_fixture_home"
+
+# 5. bad --limit/--timeout values and unknown flags print usage, not a traceback
+_bad=""
+for _args in "--limit abc" "--limit 0" "--timeout -1" "--timeout nan" "--merge" "--bogus"; do
+    # shellcheck disable=SC2086
+    _out=$("$MACJUICE" search dinner $_args 2>&1)
+    if [[ $? -eq 0 || "$_out" != *"Usage: search_all.py"* || "$_out" == *Traceback* ]]; then
+        _bad+=" [$_args]"
+    fi
+done
+if [[ -z "$_bad" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  search rejects bad options with usage"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  search rejects bad options with usage"
+    echo "        accepted or crashed on:$_bad"
+    ((_FAIL++))
+fi
+
+print_summary "Search"
@@ -0,0 +1,106 @@
+#!/bin/bash
+# test_tracing.sh — --trace / MACJUICE_TRACE instrumentation tests (runs off macOS)
+#
+# Drives scripts/tracing.py directly with an in-memory SQLite database and
+# checks the JSON records it writes to stderr.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/test_helpers.sh"
+
+echo "=== Tracing Tests ==="
+
+SCRIPTS="$(dirname "$MACJUICE")/scripts"
+_tmp=$(mktemp -d)
+
+# A tiny "reader": one stage, one timed function, one query that scans
+cat >"$_tmp/reader.py" <<'PY'
+import sqlite3
+
+import tracing
+
+conn = tracing.traced(sqlite3.connect(":memory:"))
+conn.execute("CREATE TABLE t (x INTEGER)")
+conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(5)])
+
+@tracing.timed("decode")
+def decode(blob):
+    return blob.decode()
+
+with tracing.stage("format") as st:
+    rows = conn.execute("SELECT x FROM t WHERE x > ?", (1,)).fetchall()
+    st.rows += len(rows)
+    st.bytes += 10
+decode(b"abc")
+decode(b"de")
+print(len(rows))
+PY
+
+# check_records <description> <python assertion over `records`>
+check_records() {
+    local desc="$1" check="$2"
+    if python3 - "$_tmp/trace.err" "$check" <<'PY'
+import json, sys
+
+records = [json.loads(line) for line in open(sys.argv[1]) if line.strip()]
+sys.exit(0 if eval(sys.argv[2]) else 1)
+PY
+    then
+        echo -e "  ${_GREEN}PASS${_NC}  $desc"
+        ((_PASS++))
+    else
+        echo -e "  ${_RED}FAIL${_NC}  $desc"
+        echo "        records: $(head -c 600 "$_tmp/trace.err")"
+        ((_FAIL++))
+    fi
+}
+
+_out=$(MACJUICE_TRACE=1 PYTHONPATH="$SCRIPTS" python3 "$_tmp/reader.py" 2>"$_tmp/trace.err")
+
+# 1. stage() totals rows/bytes set inside the block
+check_records "stage records sum rows and bytes" \
+    'any(r["trace"] == "stage" and r["stage"] == "format" and r["calls"] == 1
+         and r["rows"] == 3 and r["bytes"] == 10 for r in records)'
+
+# 2. timed() counts calls and sizes bytes arguments
+check_records "timed counts calls and bytes" \
+    'any(r["trace"] == "stage" and r["stage"] == "decode" and r["calls"] == 2
+         and r["rows"] == 2 and r["bytes"] == 5 for r in records)'
+
+# 3. traced() writes a sql record per statement with rows fetched
+check_records "sql records carry time and rows fetched" \
+    'any(r["trace"] == "sql" and r["sql"] == "SELECT x FROM t WHERE x > ?"
+         and r["rows_fetched"] == 3 and r["ms"] >= 0 for r in records)'
+
+# 4. ... and a plan record that flags the full scan
+check_records "plan records flag full scans" \
+    'any(r["trace"] == "plan" and r["sql"] == "SELECT x FROM t WHERE x > ?"
+         and r["full_scan"] and any(p.startswith("SCAN") for p in r["plan"]) for r in records)'
+
+# 5. the run ends with a total record
+check_records "total record is written last" \
+    'records[-1]["trace"] == "total" and records[-1]["ms"] > 0'
+
+# 6. with MACJUICE_TRACE unset nothing is written
+_out=$(env -u MACJUICE_TRACE PYTHONPATH="$SCRIPTS" python3 "$_tmp/reader.py" 2>"$_tmp/trace.err")
+if [[ "$_out" == "3" && ! -s "$_tmp/trace.err" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  tracing off writes nothing"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  tracing off writes nothing"
+    echo "        stdout: $_out, stderr: $(head -c 300 "$_tmp/trace.err")"
+    ((_FAIL++))
+fi
+
+# 7. MACJUICE_TRACE=0 counts as off
+_out=$(MACJUICE_TRACE=0 PYTHONPATH="$SCRIPTS" python3 "$_tmp/reader.py" 2>"$_tmp/trace.err")
+if [[ "$_out" == "3" && ! -s "$_tmp/trace.err" ]]; then
+    echo -e "  ${_GREEN}PASS${_NC}  MACJUICE_TRACE=0 writes nothing"
+    ((_PASS++))
+else
+    echo -e "  ${_RED}FAIL${_NC}  MACJUICE_TRACE=0 writes nothing"
+    ((_FAIL++))
+fi
+
+rm -rf "$_tmp"
+
+print_summary "Tracing"